@@ -3,6 +3,7 @@
 import os
 import sys
 import re
+import time
 import logging
 import argparse
 
@@ -11,17 +12,17 @@ from snes2asm.cartridge import Cartridge
 from snes2asm.project_maker import ProjectMaker
 from snes2asm.configurator import Configurator
 from snes2asm.decoder import Headers
+from snes2asm import cache
+from snes2asm import batch
+from snes2asm.stats import Stats
 from snes2asm.tile import *
 from snes2asm.bitmap import BitmapIndex
 from snes2asm import compression
 from snes2asm import brr
 
-# Depth needed for branch tracing
-sys.setrecursionlimit(3000)
-
 def main(argv=None):
 	parser = argparse.ArgumentParser( prog="snes2asm", description='Disassembles snes cartridges into practical projects', epilog='')
-	parser.add_argument('input', metavar='snes.sfc', help="input snes file")
+	parser.add_argument('input', metavar='snes.sfc', nargs='?', help="input snes file")
 	parser.add_argument('-v', '--verbose', action='store_true', default=None, help="Verbose output")
 	parser.add_argument('-o', '--output-dir', default='.', help="File path to output project")
 	parser.add_argument('-c', '--config', default=None, help="Path to decoding configuration yaml file")
@@ -33,36 +34,97 @@ def main(argv=None):
 	parser.add_argument('-nl', '--nolabel', action='store_true', default=None, help="Use addresses instead of labels")
 	parser.add_argument('-e', '--empty-fill', default=255, help="Default byte value for fill empty ROM space")
 	parser.add_argument('-x', '--hex', action='store_true', default=None, help="Comments show instruction hex")
+	parser.add_argument('-m', '--mmap', action='store_true', default=None, help="Memory map the rom file instead of reading it")
+	parser.add_argument('-j', '--jobs', type=int, default=1, help="Number of processes for decoding and writing banks or batch roms")
+	parser.add_argument('--cache', action='store_true', default=None, help="Keep an incremental disassembly cache in ~/.cache/snes2asm")
+	parser.add_argument('--cache-dir', default=None, help="Keep the incremental disassembly cache in this directory")
+	parser.add_argument('--cache-size', type=int, default=cache.CACHE_SIZE, help="Size limit of the cache directory in megabytes")
+	parser.add_argument('--stats', action='store_true', default=None, help="Print time, memory and counters of each phase")
+	parser.add_argument('--stats-json', default=None, metavar='stats.json', help="Write time, memory and counters of each phase as JSON")
+	parser.add_argument('--batch', default=None, metavar='manifest.yaml', help="Disassemble the roms, configs and outputs listed in a manifest")
+	parser.add_argument('--timeout', type=float, default=None, help="Seconds before a batch rom is stopped")
+	parser.add_argument('--batch-report', default=None, metavar='report.json', help="Write the batch results as JSON")
 
 	args = parser.parse_args(argv[1:])
 
-	if args.input:
+	if args.batch:
+		exec_batch(args)
+	elif args.input:
 		exec_asm(args)
 	else:
 		parser.print_help()
 
+def exec_batch(options):
+	try:
+		jobs, timeout = batch.load_manifest(options.batch, options.output_dir)
+	except (OSError, ValueError) as e:
+		print("Error: %s" % str(e))
+		sys.exit(-1)
+
+	print("Disassembling %d roms..." % len(jobs))
+	start = time.perf_counter()
+	results = batch.run_batch(jobs, options, options.jobs, options.timeout or timeout)
+	seconds = time.perf_counter() - start
+
+	sys.stdout.write(batch.report_table(results, seconds))
+	if options.batch_report:
+		f = open(options.batch_report, 'w')
+		f.write(batch.report_json(results, seconds))
+		f.close()
+
+	if any(result['status'] != 'ok' for result in results):
+		sys.exit(1)
+
 def exec_asm(options):
-	cart = Cartridge(options.__dict__)
-	cart.open(options.input)
+	stats = Stats(memory=bool(options.stats or options.stats_json))
+
+	with stats.phase('load'):
+		cart = Cartridge(options.__dict__)
+		cart.open(options.input)
 
 	disasm = Disassembler(cart, options)
+	disasm.stats = stats
 	disasm.add_decoder(Headers(cart.header,cart.header+80))
 
 	if options.banks:
 		disasm.code_banks = options.banks
 
 	if options.config:
-		configurator = Configurator(options.config)
-		try:
-			configurator.apply(disasm)
-		except ValueError as e:
-			print("Error: %s" % str(e))
-			sys.exit(-1)
+		with stats.phase('config'):
+			configurator = Configurator(options.config)
+			try:
+				configurator.apply(disasm)
+			except ValueError as e:
+				print("Error: %s" % str(e))
+				sys.exit(-1)
+
+	if options.cache or options.cache_dir:
+		disasm.cache = cache.AnalysisCache(options.cache_dir or cache.default_path(), cart, options.cache_size)
 
-	disasm.run()
+	with stats.phase('disassemble'):
+		disasm.run()
+
+	if options.verbose and disasm.trace_nodes:
+		print("Traced %d code paths" % disasm.trace_nodes)
 
 	project = ProjectMaker(cart, disasm)
-	project.output(options.output_dir)
+	with stats.phase('output'):
+		project.output(options.output_dir)
+
+	if disasm.cache:
+		evicted = disasm.cache.evict()
+		if options.verbose:
+			print("Cache %d hits, %d misses, %d evicted" % (disasm.cache.hits, disasm.cache.misses, evicted))
+
+	disasm.count_stats()
+	if options.stats:
+		sys.stdout.write(stats.table())
+	if options.stats_json:
+		f = open(options.stats_json, 'w')
+		f.write(stats.json())
+		f.close()
+
+	return stats
 
 def main_gui(argv=None):
 	from PyQt5.QtWidgets import QApplication
@@ -177,6 +239,7 @@ def packer(argv=None):
 	parser.add_argument('-o', '--output', required=True, metavar='outfile', default=None, help="File path to output")
 	parser.add_argument('-x', '--encoding', metavar='|'.join(compression.get_names()), required=True, type=str, help='Encoding algorithm')
 	parser.add_argument('-f', '--fullsize', action='store_true', default=False, help="Ignore destination file size and write full data")
+	parser.add_argument('-l', '--level', metavar='level', default=None, help="Compression level, fast|greedy|optimal for lz1, lz2, lz3, lz5 and lz19 or fast|greedy|lazy for lz77")
 
 	args = parser.parse_args(argv[1:])
 
@@ -199,8 +262,12 @@ def packer(argv=None):
 			print("Unsupported encoding type: %s. Use following types %s." % (args.encoding, ",".join(compression.get_names())))
 			return -1
 
+		if args.level and args.level not in compression.get_levels(args.encoding):
+			print("Unsupported compression level %s for encoding %s." % (args.level, args.encoding))
+			return -1
+
 		if args.action == 'pack':
-			output = module.compress(data)
+			output = compression.compress(args.encoding, data, args.level)
 		else:
 			output = module.decompress(data)
 
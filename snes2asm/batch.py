@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch disassembly of many roms listed in a yaml manifest. Each job runs in
+a process forked from the already imported parent so jobs start warm, and
+a job running past its timeout is terminated without stopping the batch.
+
+Manifest format, with paths relative to the manifest:
+
+timeout: 600
+jobs:
+  - rom: game_v1.sfc
+    config: game.yaml
+    output: out/game_v1
+    options:
+      hirom: true
+"""
+
+import io
+import os
+import sys
+import copy
+import json
+import time
+import traceback
+import multiprocessing
+from multiprocessing.connection import wait
+
+import yaml
+
+# Options a manifest job may set for itself
+JOB_OPTIONS = ['banks', 'hirom', 'lorom', 'fastrom', 'slowrom', 'nolabel', 'empty_fill', 'hex', 'mmap']
+
+class BatchJob:
+
+	def __init__(self, rom, config=None, output=None, options={}):
+		self.rom = rom
+		self.config = config
+		self.output = output
+		self.options = options
+
+	def command_options(self, base):
+		"""
+		Command line options of the batch with the job's own paths and options
+		"""
+		options = copy.copy(base)
+		options.input = self.rom
+		options.config = self.config
+		options.output_dir = self.output
+		options.batch = None
+		options.stats = None
+		options.stats_json = None
+		# Batch jobs already run in parallel
+		options.jobs = 1
+		for name, value in self.options.items():
+			setattr(options, name, value)
+		return options
+
+def load_manifest(file_path, output_dir='.'):
+	"""
+	Returns the jobs and default timeout of a manifest
+	"""
+	fp = open(file_path, 'r')
+	manifest = yaml.safe_load(fp)
+	fp.close()
+
+	if isinstance(manifest, list):
+		manifest = {'jobs': manifest}
+	if not isinstance(manifest, dict) or not isinstance(manifest.get('jobs'), list):
+		raise ValueError("Manifest %s has no list of jobs" % file_path)
+
+	root = os.path.dirname(os.path.abspath(file_path))
+	jobs = []
+	for entry in manifest['jobs']:
+		if not isinstance(entry, dict) or 'rom' not in entry:
+			raise ValueError("Manifest job %s has no rom" % repr(entry))
+		options = entry.get('options') or {}
+		for name in options:
+			if name not in JOB_OPTIONS:
+				raise ValueError("Unknown option %s for rom %s. Use following options %s." % (name, entry['rom'], ",".join(JOB_OPTIONS)))
+		rom = os.path.join(root, entry['rom'])
+		config = os.path.join(root, entry['config']) if entry.get('config') else None
+		if entry.get('output'):
+			output = os.path.join(root, entry['output'])
+		else:
+			output = os.path.join(output_dir, os.path.splitext(os.path.basename(rom))[0])
+		jobs.append(BatchJob(rom, config, output, options))
+
+	return jobs, manifest.get('timeout')
+
+def run_batch(jobs, options, workers=1, timeout=None):
+	"""
+	Run jobs on up to workers processes at a time. Returns a result for
+	each job in manifest order.
+	"""
+	if 'fork' in multiprocessing.get_all_start_methods():
+		context = multiprocessing.get_context('fork')
+	else:
+		context = multiprocessing.get_context()
+
+	results = [None] * len(jobs)
+	pending = list(range(len(jobs)))
+	running = {}
+
+	while pending or running:
+		while pending and len(running) < max(1, workers):
+			i = pending.pop(0)
+			recv, send = context.Pipe(False)
+			# Forked jobs would repeat unflushed output
+			sys.stdout.flush()
+			proc = context.Process(target=_batch_job, args=(jobs[i].command_options(options), send))
+			proc.start()
+			send.close()
+			running[recv] = (i, proc, time.perf_counter())
+
+		# Wait for a job to finish or the nearest timeout
+		wait_time = None
+		if timeout:
+			now = time.perf_counter()
+			wait_time = max(0, min(start + timeout - now for i, proc, start in running.values()))
+
+		for recv in wait(list(running.keys()), wait_time):
+			i, proc, start = running.pop(recv)
+			try:
+				result = recv.recv()
+			except EOFError:
+				result = {'status': 'failed', 'error': "Worker exited with code %s" % proc.exitcode}
+			recv.close()
+			proc.join()
+			result['seconds'] = time.perf_counter() - start
+			results[i] = result
+
+		if timeout:
+			now = time.perf_counter()
+			for recv, (i, proc, start) in list(running.items()):
+				if now - start >= timeout:
+					proc.terminate()
+					proc.join()
+					recv.close()
+					del running[recv]
+					results[i] = {'status': 'timeout', 'error': "Timed out after %gs" % timeout, 'seconds': now - start}
+
+	for job, result in zip(jobs, results):
+		result['rom'] = job.rom
+		result['config'] = job.config
+		result['output'] = job.output
+	return results
+
+def _batch_job(options, conn):
+	# Imported here as the package imports this module
+	from snes2asm import exec_asm
+
+	log = io.StringIO()
+	stdout = sys.stdout
+	sys.stdout = log
+	try:
+		# Manifest outputs may be nested in directories not yet created
+		if not os.path.isdir(options.output_dir):
+			os.makedirs(options.output_dir)
+		stats = exec_asm(options)
+		result = {
+			'status': 'ok',
+			'phases': {entry['name']: entry['wall'] for entry in stats.phases if entry['depth'] == 0},
+			'counters': stats.counters
+		}
+	except SystemExit:
+		result = {'status': 'failed', 'error': (log.getvalue().strip().splitlines() or ['Exited'])[-1]}
+	except BaseException as e:
+		result = {'status': 'failed', 'error': "%s: %s" % (e.__class__.__name__, str(e)), 'traceback': traceback.format_exc()}
+	finally:
+		sys.stdout = stdout
+	conn.send(result)
+	conn.close()
+
+def summary(results, seconds):
+	counts = {'ok': 0, 'failed': 0, 'timeout': 0}
+	for result in results:
+		counts[result['status']] += 1
+	counts['jobs'] = len(results)
+	counts['seconds'] = seconds
+	return counts
+
+def report_table(results, seconds):
+	lines = ["%-48s %-8s %10s" % ("Rom", "Status", "Time (s)")]
+	for result in results:
+		lines.append("%-48s %-8s %10.2f" % (os.path.basename(result['rom'])[:48], result['status'], result['seconds']))
+		if result['status'] != 'ok':
+			lines.append("  %s" % result['error'])
+	counts = summary(results, seconds)
+	lines.append("%d jobs: %d ok, %d failed, %d timed out in %.2fs" % (counts['jobs'], counts['ok'], counts['failed'], counts['timeout'], seconds))
+	return "\n".join(lines) + "\n"
+
+def report_json(results, seconds):
+	return json.dumps({'summary': summary(results, seconds), 'jobs': results}, indent=2, sort_keys=True)
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+
+"""
+Performance benchmarks. Each module can be run directly, for example:
+
+python -m snes2asm.benchmark.rangetree
+
+The suite module runs the full set over synthetic roms and writes JSON
+results for comparison with a baseline.
+"""
+
+import time
+
+def measure(func, repeat=3):
+	"""
+	Returns the best wall time in seconds of repeated calls to func
+	"""
+	best = None
+	for i in range(0, repeat):
+		start = time.perf_counter()
+		func()
+		elapsed = time.perf_counter() - start
+		if best == None or elapsed < best:
+			best = elapsed
+	return best
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures aPLib compression of synthetic rom banks with the suffix array
+match finder against the previous search growing a match with rfind.
+
+python -m snes2asm.benchmark.aplib [bytes]
+"""
+
+import sys
+
+from snes2asm.compression import aplib
+from snes2asm.benchmark import measure
+from snes2asm.benchmark.rom import make_rom
+
+class legacy_compress(aplib.aplib_compress):
+	"""
+	Previous match search and tag handling kept as the benchmark baseline
+	"""
+	def getdata(self):
+		tagstr = aplib.int2lebin(self._tag, self._tagsize)
+		return self.out[:self._tagoffset] + tagstr + self.out[self._tagoffset + len(tagstr):]
+
+	def do(self):
+		self._literal(False)
+		while self._offset < len(self._in):
+			offset, length = legacy_find_longest_match(self._in[:self._offset], self._in[self._offset:])
+			if length == 0:
+				c = self._in[self._offset]
+				if c == 0:
+					self._singlebyte(0)
+				else:
+					self._literal()
+			elif length == 1 and 0 <= offset < 16:
+				self._singlebyte(offset)
+			elif 2 <= length <= 3 and 0 < offset <= 127:
+				self._shortblock(offset, length)
+			elif 3 <= length and 2 <= offset and length >= aplib.lengthdelta(offset) + 2:
+				self._block(offset, length)
+			else:
+				self._literal()
+		self._end()
+		return self.getdata()
+
+def legacy_find_longest_match(s, sub):
+	if len(sub) == 0:
+		return 0, 0
+	limit = len(s)
+	dic = bytearray(s)
+	l = 0
+	offset = 0
+	length = 0
+	word = bytearray()
+	word.append(sub[l])
+	pos = dic.rfind(word, 0, limit + 1)
+	if pos == -1:
+		return offset, length
+	offset = limit - pos
+	length = len(word)
+	dic.append(sub[l])
+	while l < len(sub) - 1:
+		l += 1
+		word.append(sub[l])
+		pos = dic.rfind(word, 0, limit + 1)
+		if pos == -1:
+			return offset, length
+		offset = limit - pos
+		length = len(word)
+		dic.append(sub[l])
+	return offset, length
+
+def main(argv=None):
+	size = int(argv[1]) if argv and len(argv) > 1 else 0x10000
+	rom = make_rom(0x40000, 'lorom')
+
+	print("%-8s %12s %12s %10s %8s" % ("Bank", "Legacy (s)", "Suffix (s)", "Size", "Speedup"))
+	for bank in range(0, 4):
+		data = bytearray(rom[bank*0x10000:bank*0x10000+size])
+		legacy = measure(lambda: legacy_compress(data).do(), 1)
+		current = measure(lambda: aplib.compress(data))
+		packed = aplib.compress(data)
+		if packed != legacy_compress(data).do() or aplib.decompress(packed) != data:
+			print("Error: bank %d output differs from the previous compressor" % bank)
+		print("%-8d %12.4f %12.4f %10d %7.1fx" % (bank, legacy, current, len(packed), legacy / current))
+	print("Compressing %d bytes per bank" % size)
+
+if __name__ == '__main__':
+	main(sys.argv)
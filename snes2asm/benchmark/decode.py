@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures 65816 instruction decoding throughput on the bundled test rom.
+"""
+
+import os
+import sys
+from argparse import Namespace
+
+from snes2asm.cartridge import Cartridge
+from snes2asm.disassembler import Disassembler, OrderedDictRange
+from snes2asm.decoder import Headers
+from snes2asm.benchmark import measure
+
+TEST_ROM = os.path.join(os.path.dirname(__file__), '..', 'test', 'classickong.smc')
+
+def main(argv=None):
+	path = argv[1] if argv and len(argv) > 1 else TEST_ROM
+
+	cart = Cartridge({})
+	cart.open(path)
+	disasm = Disassembler(cart, Namespace(hex=None, nolabel=None))
+	disasm.add_decoder(Headers(cart.header, cart.header+80))
+	disasm.run_decoders()
+	disasm.mark_vectors()
+	disasm.find_valid_code_paths()
+	decoded = disasm.code
+
+	def decode():
+		disasm.code = OrderedDictRange()
+		disasm.auto_run()
+
+	elapsed = measure(decode, 5)
+	count = len(disasm.code)
+	disasm.code = decoded
+
+	print("Decoded %d instructions in %.3fs (%d instructions/sec)" % (count, elapsed, count / elapsed))
+
+if __name__ == '__main__':
+	main(sys.argv)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures data directive rows/sec of the bulk hex formatter against
+formatting one value at a time.
+"""
+
+import os
+import sys
+
+from snes2asm import hexfmt
+from snes2asm.decoder import Decoder
+from snes2asm.benchmark import measure
+
+def per_value_lines(data, size=1):
+	"""
+	Formats one value at a time like the ArrayDecoder loop before the bulk
+	formatter, stopping at the last whole value of each row. The original
+	loop reads past the end of the data for 24-bit values.
+	"""
+	instr = Decoder.data_directive(size) + ' '
+	form = Decoder.hex_fmt[size-1]
+	lines = []
+	for y in range(0, len(data), 16):
+		parts = [form % Decoder.val(data, x, size) for x in range(y, min(y+16,len(data)) - size + 1, size)]
+		lines.append((y, instr + ', '.join(parts)))
+	return lines
+
+def main(argv=None):
+	size = int(argv[1]) if argv and len(argv) > 1 else 0x100000
+	data = bytearray(os.urandom(size))
+	rows = (size + 15) // 16
+
+	print("%-8s %12s %12s %8s" % ("Width", "Per value", "Bulk", "Speedup"))
+	for width in [1, 2, 3, 4]:
+		legacy = measure(lambda: per_value_lines(data, width))
+		bulk = measure(lambda: list(hexfmt.data_lines(data, width)))
+		# 24-bit bulk rows hold 15 bytes of whole values
+		bulk_rows = -(-size // (16 - 16 % width))
+		print("%-8s %12d %12d %7.1fx" % ("%d-bit" % (width * 8), rows / legacy, bulk_rows / bulk, legacy / bulk))
+	print("Rows/sec over %d bytes" % size)
+
+if __name__ == '__main__':
+	main(sys.argv)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+Measures the throughput of the hash chain LZ77 compressor at each level
+against the previous exhaustive window search.
+
+python -m snes2asm.benchmark.lz77 [bytes]
+"""
+
+import sys
+
+from snes2asm.compression import lz77
+from snes2asm.benchmark import measure
+from snes2asm.benchmark.rom import make_rom
+
+def legacy_compress(data):
+	"""
+	Previous window scan of every offset kept as the benchmark baseline
+	"""
+	data = bytes(data)
+	output = bytearray()
+	pos = 0
+	while pos < len(data):
+		blocks = []
+		control_byte = 0
+		for bit_pos in range(8):
+			if pos >= len(data):
+				break
+			window_start = max(0, pos - lz77.WINDOW_SIZE)
+			best_match_offset = 0
+			best_match_length = 0
+			for offset in range(window_start, pos):
+				match_offset = pos - offset
+				if match_offset >= lz77.WINDOW_SIZE:
+					continue
+				match_length = 0
+				while (match_length < lz77.MAX_MATCH and
+					pos + match_length < len(data) and
+					data[offset + match_length] == data[pos + match_length]):
+					match_length += 1
+				if match_length >= lz77.MIN_MATCH and match_length > best_match_length:
+					best_match_length = match_length
+					best_match_offset = match_offset
+			if best_match_length >= lz77.MIN_MATCH:
+				control_byte |= (1 << bit_pos)
+				encoded = (best_match_offset & 0x0FFF) | ((best_match_length - lz77.MIN_MATCH) << 12)
+				blocks.append(bytes([encoded & 0xFF, (encoded >> 8) & 0xFF]))
+				pos += best_match_length
+			else:
+				blocks.append(bytes([data[pos]]))
+				pos += 1
+		output.append(control_byte)
+		for block in blocks:
+			output.extend(block)
+	return bytes(output)
+
+def main(argv=None):
+	size = int(argv[1]) if argv and len(argv) > 1 else 0x4000
+	# Code and data mix of a synthetic bank
+	data = bytes(make_rom(0x20000, 'lorom')[0x8000:0x8000+size])
+
+	print("%-8s %12s %10s %8s" % ("Level", "KB/sec", "Size", "Speedup"))
+	legacy = measure(lambda: legacy_compress(data), 1)
+	print("%-8s %12.1f %10d %8s" % ("legacy", size / 1024.0 / legacy, len(legacy_compress(data)), ""))
+	for level in lz77.LEVELS:
+		seconds = measure(lambda: lz77.compress(data, level))
+		packed = lz77.compress(data, level)
+		if lz77.decompress(packed) != data:
+			print("Error: %s output does not decompress to the input" % level)
+		print("%-8s %12.1f %10d %7.1fx" % (level, size / 1024.0 / seconds, len(packed), legacy / seconds))
+	print("Compressing %d bytes" % size)
+
+if __name__ == '__main__':
+	main(sys.argv)
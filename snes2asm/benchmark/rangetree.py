@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark of the sorted array RangeTree against the previous
+binary tree implementation with decoder sized ranges.
+"""
+
+import sys
+import random
+from copy import copy
+
+from snes2asm.rangetree import RangeTree
+from snes2asm.benchmark import measure
+
+class LegacyRangeTree():
+	"""
+	Previous unbalanced tree implementation kept as the benchmark baseline
+	"""
+	def __init__(self):
+		self.root = None
+
+	def find(self, index):
+		node = self.root
+		while node:
+			if node.is_parent():
+				if node.left and node.left.contains(index):
+					node = node.left
+				elif node.right and node.right.contains(index):
+					node = node.right
+				else:
+					return None
+			elif node.contains(index):
+				return node.val
+			else:
+				return None
+
+	def items(self):
+		items = []
+		path = []
+		stack = [self.root]
+		while len(stack) != 0:
+			node = stack.pop()
+			if node not in path:
+				path.append(node)
+			if node.is_parent():
+				if node.right:
+					stack.append(node.right)
+				if node.left:
+					stack.append(node.left)
+			else:
+				path.append(node)
+				items.append(node.val)
+		return items
+
+	def intersects(self, start, end):
+		node = self.root
+		while node:
+			if node.is_parent():
+				if node.left and node.left.intersects(start, end):
+					node = node.left
+				elif node.right and node.right.intersects(start, end):
+					node = node.right
+				else:
+					return None
+			elif node.intersects(start, end):
+				return node.val
+			else:
+				return None
+
+	def add(self, start, end, value):
+		new_node = _LegacyNode(start, end, value)
+		if self.root == None:
+			self.root = new_node
+			return
+		if self.root.intersects(new_node.start, new_node.end):
+			self._add_inner(self.root, new_node)
+		elif start < self.root.start:
+			self._split_node(self.root, start, self.root.end, new_node, True)
+		else:
+			self._split_node(self.root, self.root.start, end, new_node, False)
+
+	def _add_inner(self, node, new_node):
+		if not node.is_parent():
+			raise ValueError("Range conflict")
+		if node.left.intersects(new_node.start, new_node.end):
+			self._add_inner(node.left, new_node)
+		elif node.right.intersects(new_node.start, new_node.end):
+			self._add_inner(node.right, new_node)
+		elif node.left.size() <= node.right.size():
+			self._split_node(node.left, node.start, new_node.end, new_node, False)
+		else:
+			self._split_node(node.right, new_node.start, node.end, new_node, True)
+
+	def _split_node(self, node, range_start, range_end, new_node, left):
+		tmp_node = copy(node)
+		node.val = None
+		node.start = range_start
+		node.end = range_end
+		if left:
+			node.left = new_node
+			node.right = tmp_node
+		else:
+			node.left = tmp_node
+			node.right = new_node
+
+class _LegacyNode():
+	def __init__(self, start, end, val):
+		self.start = start
+		self.end = end
+		self.left = None
+		self.right = None
+		self.val = val
+
+	def contains(self, index):
+		return self.start <= index and index < self.end
+
+	def intersects(self, start, end):
+		return min(self.end, end) - max(self.start, start) > 0
+
+	def size(self):
+		c = 1
+		if self.left:
+			c = c + self.left.size()
+		if self.right:
+			c = c + self.right.size()
+		return c
+
+	def is_parent(self):
+		return self.val == None
+
+def make_ranges(count, seed=1):
+	# Non-overlapping ranges shuffled like the entries of a config file
+	rand = random.Random(seed)
+	ranges = []
+	pos = 0
+	for i in range(0, count):
+		pos += rand.randint(0, 64)
+		width = rand.randint(1, 256)
+		ranges.append((pos, pos + width))
+		pos += width
+	rand.shuffle(ranges)
+	return ranges, pos
+
+def run(tree_class, ranges, span, queries):
+	tree = tree_class()
+	for start, end in ranges:
+		tree.add(start, end, start)
+	for q in queries:
+		tree.find(q)
+		tree.intersects(q, q + 4)
+	tree.items()
+
+def main(argv=None):
+	counts = [100, 500, 2000]
+	if argv and len(argv) > 1:
+		counts = [int(c) for c in argv[1:]]
+
+	print("%8s %12s %12s %8s" % ("ranges", "legacy (s)", "sorted (s)", "speedup"))
+	for count in counts:
+		ranges, span = make_ranges(count)
+		rand = random.Random(count)
+		queries = [rand.randrange(0, span) for i in range(0, 20000)]
+		legacy = measure(lambda: run(LegacyRangeTree, ranges, span, queries), 1)
+		current = measure(lambda: run(RangeTree, ranges, span, queries))
+		print("%8d %12.4f %12.4f %7.1fx" % (count, legacy, current, legacy / current))
+
+if __name__ == '__main__':
+	main(sys.argv)
@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+
+"""
+Synthetic rom images for benchmarks. Each bank holds a run of traceable
+65816 routines followed by a mix of graphics, text, tables, sparse fill
+and incompressible data. The reset vector calls an entry routine in every
+bank so the whole image is reachable by code tracing.
+
+python -m snes2asm.benchmark.rom lorom 1 out.sfc
+"""
+
+import sys
+import random
+import struct
+
+from snes2asm.cartridge import Cartridge
+
+# Map mode, hirom and extended of each supported mapping
+MAPPINGS = {
+	'lorom': (0x20, False, False),
+	'hirom': (0x21, True, False),
+	'exhirom': (0x25, True, True)
+}
+
+# Opcodes by operand in 16-bit accumulator and index mode
+IMPLIED = [0xE8, 0xCA, 0xC8, 0x88, 0xAA, 0xA8, 0x8A, 0x98, 0x18, 0x38, 0x0A, 0x4A, 0x1A, 0x3A, 0x48, 0x68, 0xEA]
+IMMEDIATE = [0xA9, 0xA2, 0xA0, 0xC9, 0x69, 0xE9, 0x29, 0x09]
+DIRECT = [0xA5, 0x85, 0x64, 0xE6, 0xA6, 0x86]
+ABSOLUTE = [0xAD, 0x8D, 0x9C, 0xEE, 0xBD, 0x9D, 0xAE, 0x8E]
+LONG = [0xAF, 0x8F, 0xBF, 0x9F]
+BRANCH = [0xD0, 0xF0, 0x90, 0xB0, 0x10, 0x30]
+
+REP = 0xC2
+SEP = 0xE2
+JSR = 0x20
+JSL = 0x22
+RTS = 0x60
+RTL = 0x6B
+
+# Room for the reset routine calling up to 128 banks and the interrupt handler
+BOOT_SIZE = 0x400
+
+def rom_cart(size, mapping):
+	"""
+	Cartridge holding the address mapping of an image without data
+	"""
+	map_mode, hirom, extended = MAPPINGS[mapping]
+	cart = Cartridge()
+	cart.data = bytearray(size)
+	cart.hirom = hirom
+	cart.extended = extended
+	cart.header = (0x400000 if extended else 0) + (0xFFB0 if hirom else 0x7FB0)
+	cart.build_maps()
+	return cart
+
+def make_rom(size, mapping='lorom', seed=0, code_ratio=0.35):
+	"""
+	Build a rom image of size bytes. ExHiROM images must be larger than 4MB.
+	"""
+	if mapping not in MAPPINGS:
+		raise ValueError("Unknown mapping %s. Use one of %s" % (mapping, ", ".join(sorted(MAPPINGS))))
+	if size & 0xFFFF or size < 0x20000 or size > 0x800000:
+		raise ValueError("Rom size must be a multiple of 64KB between 128KB and 8MB")
+	map_mode, hirom, extended = MAPPINGS[mapping]
+	if extended != (size > 0x400000):
+		raise ValueError("ExHiROM images are larger than 4MB and other mappings at most 4MB")
+
+	rng = random.Random(seed)
+	cart = rom_cart(size, mapping)
+	data = cart.data
+	bank_size = cart.bank_size()
+	reset = cart.index(0x8000)
+	boot_bank = reset // bank_size
+
+	entries = []
+	for bank in range(0, cart.bank_count()):
+		start = bank * bank_size
+		end = start + bank_size
+		if bank == boot_bank:
+			# Leave room for the boot routine and the header
+			write_data(data, rng, start, reset)
+			start = reset + BOOT_SIZE
+			end = cart.header
+		code_end = start + int((end - start) * code_ratio)
+		entries.append(RomBank(cart, rng).write(start, code_end))
+		write_data(data, rng, code_end, end)
+
+	write_boot(cart, reset, entries)
+	write_header(cart, map_mode, 0x8000, 0x8000 + BOOT_SIZE - 1)
+	return data
+
+class RomBank:
+	"""
+	Writes the routines of one bank and returns the position of its entry
+	routine, which calls every other routine of the bank
+	"""
+
+	def __init__(self, cart, rng):
+		self.cart = cart
+		self.rng = rng
+		self.data = cart.data
+		self.routines = []
+
+	def write(self, start, end):
+		pos = start
+		while True:
+			# Keep room for the entry routine calling every routine
+			limit = end - self.entry_size(len(self.routines) + 1)
+			if limit - pos <= 96:
+				break
+			self.routines.append(pos)
+			pos = self.routine(pos, min(limit, pos + self.rng.randint(48, 512)))
+
+		entry = pos
+		pos = self.emit(pos, [REP, 0x30])
+		for routine in self.routines:
+			pos = self.emit(pos, [JSR] + self.word(self.jsr_address(routine)))
+		pos = self.emit(pos, [RTL])
+		# Remaining room is left as padding
+		self.data[pos:end] = b'\xFF' * (end - pos)
+		return entry
+
+	def entry_size(self, count):
+		return 3 + 3 * count
+
+	def routine(self, pos, end):
+		rng = self.rng
+		starts = []
+		pos = self.emit(pos, [REP, 0x30])
+		# Stop short of the end so the return always fits
+		while pos < end - 8:
+			starts.append(pos)
+			kind = rng.random()
+			if kind < 0.25:
+				pos = self.emit(pos, [rng.choice(IMMEDIATE)] + self.word(rng.getrandbits(16)))
+			elif kind < 0.45:
+				pos = self.emit(pos, [rng.choice(ABSOLUTE)] + self.word(rng.randint(0x0100, 0x1FFF)))
+			elif kind < 0.55:
+				pos = self.emit(pos, [rng.choice(DIRECT), rng.getrandbits(8)])
+			elif kind < 0.70:
+				pos = self.emit(pos, [rng.choice(IMPLIED)])
+			elif kind < 0.75:
+				pos = self.emit(pos, [rng.choice(LONG), rng.getrandbits(8), rng.getrandbits(8), 0x7E])
+			elif kind < 0.85:
+				# Backward branch to an earlier instruction in reach
+				target = starts[max(0, len(starts) - rng.randint(1, 16))]
+				if target - pos - 2 < -128:
+					target = pos
+				pos = self.emit(pos, [rng.choice(BRANCH), (target - pos - 2) & 0xFF])
+			elif kind < 0.92 and len(self.routines) > 1:
+				target = self.routines[rng.randint(0, len(self.routines) - 2)]
+				pos = self.emit(pos, [JSR] + self.word(self.jsr_address(target)))
+			elif pos + 11 < end - 8:
+				# 8-bit accumulator section
+				value = rng.getrandbits(8)
+				pos = self.emit(pos, [SEP, 0x20, 0xA9, value, 0x8D] + self.word(rng.randint(0x2100, 0x21FF)) + [REP, 0x20])
+		return self.emit(pos, [RTS])
+
+	def emit(self, pos, code):
+		self.data[pos:pos+len(code)] = bytes(code)
+		return pos + len(code)
+
+	def word(self, value):
+		return [value & 0xFF, (value >> 8) & 0xFF]
+
+	def jsr_address(self, pos):
+		return self.cart.address(pos) & 0xFFFF
+
+def write_data(data, rng, start, end):
+	"""
+	Fill a range with a mix of typical rom data blocks
+	"""
+	pos = start
+	while pos < end:
+		size = min(end - pos, rng.choice([0x100, 0x400, 0x800, 0x1000, 0x2000]))
+		kind = rng.random()
+		if kind < 0.35:
+			block = tile_block(rng, size)
+		elif kind < 0.5:
+			block = text_block(rng, size)
+		elif kind < 0.65:
+			block = table_block(rng, size)
+		elif kind < 0.8:
+			block = bytes([rng.choice([0x00, 0xFF])]) * size
+		else:
+			block = rng.randbytes(size)
+		data[pos:pos+size] = block
+		pos += size
+
+def tile_block(rng, size):
+	# Tiles built from a few repeated rows like typical 4bpp graphics
+	rows = [rng.randbytes(2) for i in range(0, 8)] + [b'\x00\x00'] * 4
+	block = bytearray()
+	while len(block) < size:
+		block += b''.join(rng.choice(rows) for i in range(0, 16))
+	return bytes(block[0:size])
+
+def text_block(rng, size):
+	words = [b'THE', b'SNES', b'PRESS', b'START', b'GAME', b'OVER', b'LEVEL', b'SCORE', b'TIME', b'PLAYER']
+	block = bytearray()
+	while len(block) < size:
+		block += rng.choice(words) + rng.choice([b' ', b' ', b'\x00'])
+	return bytes(block[0:size])
+
+def table_block(rng, size):
+	value = rng.getrandbits(16)
+	step = rng.randint(1, 64)
+	block = bytearray()
+	while len(block) < size:
+		block += struct.pack('<H', value & 0xFFFF)
+		value += step
+	return bytes(block[0:size])
+
+def write_boot(cart, pos, entries):
+	"""
+	Reset routine calling the entry routine of every bank followed by an idle loop
+	"""
+	data = cart.data
+	code = [0x78, 0x18, 0xFB, REP, 0x30]
+	for entry in entries:
+		address = cart.address(entry)
+		code += [JSL, address & 0xFF, (address >> 8) & 0xFF, address >> 16]
+	# Idle loop and an interrupt handler
+	code += [0x80, 0xFE]
+	data[pos:pos+len(code)] = bytes(code)
+	data[pos+len(code):pos+BOOT_SIZE] = b'\xFF' * (BOOT_SIZE - len(code))
+	data[pos+BOOT_SIZE-1] = 0x40
+
+def write_header(cart, map_mode, reset, handler):
+	data = cart.data
+	header = cart.header
+	size = len(data)
+	data[header:header+16] = b'\x00' * 16
+	data[header+0x10:header+0x25] = b'SNES2ASM BENCHMARK   '
+	rom_size = (size // 1024).bit_length() - 1
+	data[header+0x25:header+0x2C] = bytes([map_mode, 0x00, rom_size, 0x00, 0x01, 0x33, 0x00])
+	data[header+0x2C:header+0x30] = struct.pack('<HH', 0xFFFF, 0x0000)
+	data[header+0x30:header+0x50] = struct.pack('<I6HI6H', 0, handler, handler, handler, handler, handler, handler, 0, handler, 0, handler, handler, reset, handler)
+
+	check_sum = sum(data) & 0xFFFF
+	data[header+0x2C:header+0x30] = struct.pack('<HH', check_sum ^ 0xFFFF, check_sum)
+
+def main(argv=None):
+	if not argv or len(argv) < 4:
+		print("usage: python -m snes2asm.benchmark.rom lorom|hirom|exhirom <megabytes> <output.sfc> [seed]")
+		return
+	data = make_rom(int(float(argv[2]) * 0x100000), argv[1], int(argv[4]) if len(argv) > 4 else 0)
+	f = open(argv[3], 'wb')
+	f.write(data)
+	f.close()
+
+if __name__ == '__main__':
+	main(sys.argv)
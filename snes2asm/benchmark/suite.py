@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite over synthetic roms. Times end to end disassembly with its
+tracing and bank emission phases, every compression codec, planar tile
+encoding and BRR sample encoding. Results are written as JSON and can be
+compared against a stored baseline:
+
+python -m snes2asm.benchmark.suite -o results.json
+python -m snes2asm.benchmark.suite -o current.json --baseline results.json
+"""
+
+import io
+import sys
+import math
+import wave
+import json
+import shutil
+import argparse
+import platform
+import tempfile
+from argparse import Namespace
+
+from snes2asm import brr
+from snes2asm import compression
+from snes2asm.tile import *
+from snes2asm.cartridge import Cartridge
+from snes2asm.disassembler import Disassembler
+from snes2asm.project_maker import ProjectMaker
+from snes2asm.decoder import Headers
+from snes2asm.stats import Stats
+from snes2asm.benchmark import measure
+from snes2asm.benchmark.rom import make_rom
+
+RESULTS_VERSION = 1
+
+# Default synthetic roms as mapping:megabytes
+ROMS = ['lorom:1', 'hirom:4', 'exhirom:8']
+
+# Planar tile formats with their bit depth
+TILE_FORMATS = [
+	('2bpp', Encode2bppTile, Decode2bppTile, 2),
+	('3bpp', Encode3bppTile, Decode3bppTile, 3),
+	('4bpp', Encode4bppTile, Decode4bppTile, 4),
+	('8bpp', Encode8bppTile, Decode8bppTile, 8)
+]
+
+class Results:
+
+	def __init__(self):
+		self.timings = {}
+		self.sizes = {}
+		self.memory = {}
+		self.errors = {}
+
+	def time(self, name, func, repeat):
+		try:
+			self.timings[name] = measure(func, repeat)
+		except Exception as e:
+			self.errors[name] = "%s: %s" % (e.__class__.__name__, str(e))
+
+	def report(self):
+		return {
+			'version': RESULTS_VERSION,
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'timings': self.timings,
+			'sizes': self.sizes,
+			'memory': self.memory,
+			'errors': self.errors
+		}
+
+def disassemble(data, memory=False):
+	"""
+	Disassemble rom data into a temporary project and return its phase stats
+	"""
+	path = tempfile.mkdtemp()
+	try:
+		cart = Cartridge({'empty_fill': 0xFF})
+		cart.set(data)
+		disasm = Disassembler(cart, Namespace(hex=None, nolabel=None))
+		disasm.stats = Stats(memory)
+		disasm.add_decoder(Headers(cart.header, cart.header+80))
+		stats = disasm.stats
+		with stats.phase('total'):
+			with stats.phase('disassemble'):
+				disasm.run()
+			with stats.phase('output'):
+				ProjectMaker(cart, disasm).output(path)
+	finally:
+		shutil.rmtree(path)
+
+	phases = {}
+	for entry in stats.phases:
+		phases.setdefault(entry['name'], entry)
+	return phases
+
+def bench_disassembly(results, mapping, megabytes, seed):
+	"""
+	Disassemble a synthetic rom using the phase timings of the disassembler.
+	Memory is traced in a separate run as tracing slows it down.
+	"""
+	name = "disassemble.%s-%gMB" % (mapping, megabytes)
+	data = make_rom(int(megabytes * 0x100000), mapping, seed)
+
+	phases = disassemble(data)
+	results.timings[name + '.total'] = phases['total']['wall']
+	results.timings[name + '.trace'] = phases['trace']['wall']
+	results.timings[name + '.decode'] = phases['decode banks']['wall']
+	results.timings[name + '.emit'] = phases['output']['wall']
+	results.memory[name] = disassemble(data, memory=True)['total']['peak_memory']
+
+def bench_compression(results, sample, repeat):
+	for codec in compression.get_names():
+		module = compression.get_encoding(codec)
+		name = "compression.%s" % codec
+		results.time(name + '.compress', lambda: module.compress(bytearray(sample)), repeat)
+		if name + '.compress' in results.errors:
+			continue
+		packed = module.compress(bytearray(sample))
+		results.sizes[codec] = len(packed)
+		results.time(name + '.decompress', lambda: module.decompress(packed), repeat)
+		if name + '.decompress' not in results.errors and bytes(module.decompress(packed)[0:len(sample)]) != bytes(sample):
+			results.errors[name + '.roundtrip'] = "Decompressed data does not match the input"
+
+def bench_tiles(results, sample, repeat, count=1024):
+	# Repeat the sample to fill count tiles of 64 pixels
+	pixels = (bytes(sample) * (count * 64 // len(sample) + 1))[0:count * 64]
+	for format, encode, decode, depth in TILE_FORMATS:
+		mask = (1 << depth) - 1
+		tiles = [bytearray(b & mask for b in pixels[i:i+64]) for i in range(0, len(pixels), 64)]
+		encoded = [encode(tile) for tile in tiles]
+		name = "tile.%s" % format
+		results.time(name + '.encode', lambda: [encode(tile) for tile in tiles], repeat)
+		results.time(name + '.decode', lambda: [decode(data) for data in encoded], repeat)
+
+def sample_wav(count, rate=32000):
+	"""
+	Mono 16-bit wav of a decaying tone with harmonics
+	"""
+	frames = bytearray()
+	for i in range(0, count):
+		t = i / float(rate)
+		value = math.sin(t * 2 * math.pi * 440) * 0.6 + math.sin(t * 2 * math.pi * 1320) * 0.2
+		value = int(value * math.exp(-t * 2) * 0x7FFF)
+		frames += (value & 0xFFFF).to_bytes(2, 'little')
+	buffer = io.BytesIO()
+	wav = wave.Wave_write(buffer)
+	wav.setparams((1, 2, rate, 0, 'NONE', 'not compressed'))
+	wav.writeframes(frames)
+	wav.close()
+	return buffer.getvalue()
+
+def bench_brr(results, count, repeat):
+	wav_data = sample_wav(count)
+	results.time('brr.encode', lambda: brr.encode(wav_data), repeat)
+	if 'brr.encode' not in results.errors:
+		brr_data = brr.encode(wav_data)
+		results.time('brr.decode', lambda: brr.decode(brr_data), repeat)
+
+def compare(current, baseline, threshold):
+	"""
+	Print timings next to a baseline and return the names of benchmarks
+	slower than the baseline by more than threshold
+	"""
+	regressions = []
+	print("%-48s %10s %10s %8s" % ("Benchmark", "Baseline", "Current", "Change"))
+	for name in sorted(current['timings']):
+		if name not in baseline.get('timings', {}):
+			continue
+		old = baseline['timings'][name]
+		new = current['timings'][name]
+		change = (new - old) / old if old > 0 else 0.0
+		flag = ''
+		if change > threshold:
+			regressions.append(name)
+			flag = ' regression'
+		print("%-48s %10.4f %10.4f %+7.1f%%%s" % (name, old, new, change * 100, flag))
+	return regressions
+
+def main(argv=None):
+	parser = argparse.ArgumentParser(prog="snes2asm.benchmark.suite", description='Benchmarks snes2asm over synthetic roms')
+	parser.add_argument('-o', '--output', default=None, help="File path to write the JSON results")
+	parser.add_argument('--baseline', default=None, help="JSON results to compare against")
+	parser.add_argument('--threshold', type=float, default=0.1, help="Slowdown ratio reported as a regression")
+	parser.add_argument('--roms', nargs='*', default=ROMS, help="Synthetic roms to disassemble as mapping:megabytes")
+	parser.add_argument('--sample-size', type=int, default=0x1000, help="Bytes of rom data for the codec and tile benchmarks")
+	parser.add_argument('--repeat', type=int, default=3, help="Repeats of the codec, tile and BRR benchmarks")
+	parser.add_argument('--seed', type=int, default=0, help="Seed of the synthetic roms")
+	args = parser.parse_args(argv[1:] if argv else [])
+
+	results = Results()
+
+	for rom in args.roms:
+		mapping, megabytes = rom.split(':')
+		bench_disassembly(results, mapping, float(megabytes), args.seed)
+
+	# Code and data mix of a synthetic bank
+	sample = make_rom(0x20000, 'lorom', args.seed)[0x8000:0x8000+args.sample_size]
+	bench_compression(results, sample, args.repeat)
+	bench_tiles(results, sample, args.repeat)
+	bench_brr(results, args.sample_size, args.repeat)
+
+	report = results.report()
+	if args.output:
+		f = open(args.output, 'w')
+		json.dump(report, f, indent=2, sort_keys=True)
+		f.close()
+
+	for name, error in sorted(results.errors.items()):
+		print("Error %s: %s" % (name, error))
+
+	if args.baseline:
+		f = open(args.baseline)
+		baseline = json.load(f)
+		f.close()
+		regressions = compare(report, baseline, args.threshold)
+		if regressions:
+			print("%d regressions over %d%%" % (len(regressions), args.threshold * 100))
+			return 1
+	else:
+		for name, seconds in sorted(results.timings.items()):
+			print("%-48s %10.4f" % (name, seconds))
+	return 0
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv))
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+"""
+Persistent cache for incremental re-disassembly. Decoder outputs, the code
+analysis and the text of each bank are pickled into a cache directory
+under keys derived from the rom, the decoder parameters and the snes2asm
+sources, so a rerun only recomputes what its inputs changed.
+
+Decoder outputs are content addressed by the data they decode rather than
+the whole rom, so rom revisions sharing the same assets share entries.
+The directory is kept under a size limit by evicting the least recently
+used entries.
+"""
+
+import os
+import glob
+import pickle
+import hashlib
+
+from snes2asm.decoder import Decoder
+
+CACHE_VERSION = 2
+
+# Default size limit of the cache directory in megabytes
+CACHE_SIZE = 512
+
+_source_digest = None
+
+def source_digest():
+	"""
+	Digest of the snes2asm sources so that any change to the tool
+	invalidates previous entries
+	"""
+	global _source_digest
+	if _source_digest == None:
+		root = os.path.dirname(__file__)
+		digest = hashlib.sha1(str(CACHE_VERSION).encode())
+		for path in sorted(glob.glob(os.path.join(root, '*.py')) + glob.glob(os.path.join(root, 'compression', '*.py'))):
+			f = open(path, 'rb')
+			digest.update(f.read())
+			f.close()
+		_source_digest = digest.hexdigest()
+	return _source_digest
+
+def default_path():
+	base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+	return os.path.join(base, 'snes2asm')
+
+def describe(value, seen=None):
+	"""
+	Deterministic description of a decoder parameter. Referenced decoders
+	are described by their own parameters.
+	"""
+	if isinstance(value, Decoder):
+		if seen == None:
+			seen = set()
+		# Break reference cycles such as index and parent
+		if id(value) in seen:
+			return ('decoder', value.label)
+		seen.add(id(value))
+		params = sorted((name, describe(v, seen)) for name, v in vars(value).items())
+		seen.discard(id(value))
+		return ('decoder', value.__class__.__name__, params)
+	elif isinstance(value, (list, tuple)):
+		return [describe(v, seen) for v in value]
+	elif isinstance(value, dict):
+		return sorted((repr(k), describe(v, seen)) for k, v in value.items())
+	elif isinstance(value, set):
+		return sorted(repr(v) for v in value)
+	elif callable(value):
+		return getattr(value, '__qualname__', repr(value))
+	return value
+
+class AnalysisCache:
+	"""
+	Disassembly results keyed by rom hash, decoder parameter hash and tool version
+	"""
+
+	def __init__(self, path, cart, max_size=CACHE_SIZE):
+		self.path = path
+		self.cart = cart
+		self.max_size = max_size * 1024 * 1024
+		self.base = (source_digest(), hashlib.sha1(cart.data).hexdigest(), cart.hirom, cart.fastrom, cart.extended, cart.header)
+		self.decoder_keys = {}
+		self.bank_decoders = {}
+		self.analysis_key = None
+		self.hits = 0
+		self.misses = 0
+
+		if not os.path.isdir(path):
+			os.makedirs(path)
+
+	def key(self, *parts):
+		return hashlib.sha1(repr((self.base,) + parts).encode('utf-8')).hexdigest()
+
+	def filename(self, kind, key):
+		return os.path.join(self.path, "%s-%s.pickle" % (kind, key))
+
+	def load(self, kind, key):
+		filename = self.filename(kind, key)
+		try:
+			f = open(filename, 'rb')
+			try:
+				value = pickle.load(f)
+			finally:
+				f.close()
+			# Modification time tracks the last use for eviction
+			os.utime(filename)
+		except (OSError, EOFError, pickle.UnpicklingError):
+			self.misses += 1
+			return None
+		self.hits += 1
+		return value
+
+	def save(self, kind, key, value):
+		filename = self.filename(kind, key)
+		# Write then rename so an interrupted run never leaves a partial entry
+		temp = "%s.%d.tmp" % (filename, os.getpid())
+		f = open(temp, 'wb')
+		pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
+		f.close()
+		os.replace(temp, filename)
+
+	def evict(self):
+		"""
+		Remove the least recently used entries until the cache fits its size limit
+		"""
+		entries = []
+		for name in os.listdir(self.path):
+			if name.endswith('.pickle'):
+				filename = os.path.join(self.path, name)
+				try:
+					stat = os.stat(filename)
+				except OSError:
+					continue
+				entries.append((stat.st_mtime, stat.st_size, filename))
+
+		total = sum(size for mtime, size, filename in entries)
+		removed = 0
+		for mtime, size, filename in sorted(entries):
+			if total <= self.max_size:
+				break
+			try:
+				os.remove(filename)
+			except OSError:
+				continue
+			total -= size
+			removed += 1
+		return removed
+
+	def content_key(self, decoder):
+		"""
+		Key a decoder by its parameters and the data of it and the decoders
+		it depends on, independent of the rest of the rom
+		"""
+		digests = []
+		seen = set()
+		stack = [decoder]
+		while stack:
+			dec = stack.pop()
+			if id(dec) in seen:
+				continue
+			seen.add(id(dec))
+			digests.append(hashlib.sha1(self.cart[dec.start:dec.end]).hexdigest())
+			stack.extend(dec.references())
+		params = (source_digest(), 'decoder', describe(decoder), digests)
+		return hashlib.sha1(repr(params).encode('utf-8')).hexdigest()
+
+	def prepare_decoders(self, decoders):
+		"""
+		Key every decoder from its parameters before any of them decode
+		"""
+		for decoder in decoders:
+			if id(decoder) not in self.decoder_keys:
+				self.decoder_keys[id(decoder)] = self.content_key(decoder)
+				self.prepare_decoders(decoder.sub_decoders)
+
+	def decoder_key(self, decoder):
+		if id(decoder) not in self.decoder_keys:
+			self.prepare_decoders([decoder])
+		return self.decoder_keys[id(decoder)]
+
+	def load_decoder(self, decoder):
+		"""
+		Restore the state and code of a decoder. Returns None on a miss.
+		"""
+		entry = self.load('decoder', self.decoder_key(decoder))
+		if entry == None:
+			return None
+		state, code = entry
+		decoder.restore(state)
+		return code
+
+	def save_decoder(self, decoder, code):
+		# Decoder references are rebuilt from the configuration
+		self.save('decoder', self.decoder_key(decoder), (decoder.state(), code))
+
+	def track_decoder(self, decoder, code):
+		# Remember which decoders have output in each bank
+		key = self.decoder_key(decoder)
+		bank_size = self.cart.bank_size()
+		for bank in set(pos // bank_size for pos, instr in code):
+			self.bank_decoders.setdefault(bank, []).append(key)
+
+	def load_analysis(self, disasm):
+		"""
+		Restore the code map, labels and bank decode plan. Returns True on a hit.
+		"""
+		self.analysis_key = self.key('analysis',
+			disasm.no_label,
+			disasm.code_banks,
+			sorted(disasm.code_labels.items()),
+			[(d.start, d.end) for d in disasm.decoders.items()]
+		)
+		entry = self.load('analysis', self.analysis_key)
+		if entry == None:
+			return False
+		code_map, disasm.code_labels, disasm.code_label_bank_aliases, disasm.bank_plan, disasm.trace_nodes = entry
+		disasm.code_map = bytearray(code_map)
+		disasm.code_cached = True
+		return True
+
+	def save_analysis(self, disasm):
+		self.save('analysis', self.analysis_key, (bytes(disasm.code_map), disasm.code_labels, disasm.code_label_bank_aliases, disasm.bank_plan, disasm.trace_nodes))
+
+	def bank_key(self, disasm, bank):
+		return self.key('bank',
+			self.analysis_key,
+			bank,
+			disasm.hex_comment,
+			sorted(disasm.variables.items()),
+			sorted(disasm.data_labels.items()),
+			sorted(self.bank_decoders.get(bank, []))
+		)
+
+	def bank_text(self, disasm, bank):
+		"""
+		Cached assembly text of a bank, decoding the bank again on a miss
+		"""
+		key = self.bank_key(disasm, bank)
+		text = self.load('bank', key)
+		if text == None:
+			if disasm.code_cached:
+				disasm.restore_bank(bank)
+			text = disasm.bank_code(bank)
+			self.save('bank', key, text)
+		return text
+
+	def missing_banks(self, disasm, banks):
+		"""
+		Banks without cached assembly text
+		"""
+		return [bank for bank in banks if not os.path.exists(self.filename('bank', self.bank_key(disasm, bank)))]
+
+	def save_bank(self, disasm, bank, text):
+		self.save('bank', self.bank_key(disasm, bank), text)
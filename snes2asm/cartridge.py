@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 
+import mmap
 import struct
 
 class Cartridge:
@@ -11,6 +12,9 @@ class Cartridge:
 		self.fastrom = False
 		self.header = 0
 		self.empty_fill = self.options.get('empty_fill')
+		self.mapping = None
+		self.page_index = []
+		self.page_address = []
 
 	# Data indexing and slicing
 	def __getitem__(self, i):
@@ -21,18 +25,33 @@ class Cartridge:
 
 	# Open rom file
 	def open(self,file_path):
+		if self.options.get('mmap'):
+			self.map(file_path)
+			return
 		file = open(file_path,"rb")
 		data = bytearray(file.read())
 		file.close()
 		self.set(data)
 
+	def map(self, file_path):
+		"""
+		Map the rom file read only. The data and every slice of it are
+		memoryviews over the mapping so the rom is never copied.
+		"""
+		file = open(file_path,"rb")
+		try:
+			self.mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		finally:
+			file.close()
+		self.set(memoryview(self.mapping))
+
 	# Assign cart data
 	def set(self, data):
 
 		self.data = data
 		size = len(self.data)
 
-		# Trim extra data
+		# Trim extra data. Mapped roms skip the copier header with a view.
 		if size & 0x2FF == 0x200:
 			self.data = self.data[0x200:]
 			size = size - 0x200
@@ -69,6 +88,8 @@ class Cartridge:
 
 		self.header = self.header + (0x0ffb0 if self.hirom else 0x07fb0)
 
+		self.build_maps()
+
 		self.parse_header()
 
 		type = "Ext" if self.extended else ""
@@ -86,37 +107,102 @@ class Cartridge:
 		type = ["ROM", "ROM+RAM", "ROM+RAM+BAT"]
 		return type[self.cart_type]
 
+	def build_maps(self):
+		"""
+		Precompute the bank mapping as tables of 32KB pages. page_index holds
+		the rom position of each page of the address space or -1 when the
+		page does not map to rom. page_address holds the address of each
+		page of the rom.
+		"""
+		size = len(self.data)
+		# Addresses beyond the rom size mirror at the next power of two
+		mask = size | (size - 1)
+
+		self.page_index = [-1] * 0x200
+		for page in range(0, 0x200):
+			bank = page >> 1
+			high = page & 1
+			# Work ram
+			if bank == 0x7E or bank == 0x7F:
+				continue
+			if self.extended:
+				if self.hirom:
+					# ExHiROM: banks C0-FF and 80-BF map the first 4MB, 40-7D and 00-3F the rest
+					if bank < 0x40 or (bank >= 0x80 and bank < 0xC0):
+						if not high:
+							continue
+					index = ((bank & 0x3F) << 16) | (high << 15)
+					if bank < 0x80:
+						index += 0x400000
+				else:
+					# ExLoROM: banks 80-FF map the first 4MB, 00-7D the rest
+					if not high:
+						continue
+					index = (bank & 0x7F) << 15
+					if bank < 0x80:
+						index += 0x400000
+			elif self.hirom:
+				if bank & 0x7F < 0x40 and not high:
+					continue
+				index = (((bank & 0x3F) << 16) | (high << 15)) & mask
+			else:
+				if not high:
+					continue
+				index = ((bank & 0x7F) << 15) & mask
+			if index < size:
+				self.page_index[page] = index
+
+		self.page_address = []
+		for page in range(0, 0x100):
+			index = page << 15
+			if self.extended:
+				if self.hirom:
+					if index < 0x400000:
+						address = 0xC00000 + index
+					elif index < 0x7E0000:
+						address = index
+					else:
+						address = index - 0x400000
+				else:
+					if index < 0x400000:
+						address = 0x808000 + (page << 16)
+					else:
+						address = 0x8000 + ((page - 0x80) << 16)
+			elif self.hirom:
+				# Banks 7E-7F are work ram so the end of a 4MB rom is only in FE-FF
+				address = (0xC00000 if index >= 0x3E0000 else 0x400000) + index
+			else:
+				address = (page << 16) + 0x8000
+			self.page_address.append(address)
+
 	# Translate rom position to address
 	def address(self, i):
-		if self.extended:
-			# TODO
-			return 0x400000 + i
-		else:
-			if self.hirom:
-				return 0x400000 + i
-			else:
-				return (((i & 0xFF8000) << 1) + (i & 0x7FFF)) + 0x8000
+		return self.page_address[(i >> 15) & 0xFF] + (i & 0x7FFF)
 
 	# Translate address to rom position
 	def index(self, address):
-		
-		if address < 0x8000 or ( address >= 0x7E0000 and address < 0x7FFFFF):
-			return -1
-		# HiROM
-		if self.hirom:
-			if address < 0x3FFFFF and address & 0x8000 == 0:
-				return -1
-		# LoROM
-		else:
-			if address & 0x8000 == 0:
-				return -1
-			address = (((address & 0x7F0000) >> 1) + (address & 0x7FFF))
-
-		mask = self.size() | self.size() - 1
-		address = address & mask
-		if address > self.size():
+		index = self.page_index[(address >> 15) & 0x1FF]
+		if index < 0:
 			return -1
-		return address
+		return index + (address & 0x7FFF)
+
+	def addresses(self, indexes):
+		"""
+		Translate a sequence of rom positions to addresses
+		"""
+		page_address = self.page_address
+		return [page_address[(i >> 15) & 0xFF] + (i & 0x7FFF) for i in indexes]
+
+	def indexes(self, addresses):
+		"""
+		Translate a sequence of addresses to rom positions, -1 where unmapped
+		"""
+		page_index = self.page_index
+		result = []
+		for address in addresses:
+			index = page_index[(address >> 15) & 0x1FF]
+			result.append(-1 if index < 0 else index + (address & 0x7FFF))
+		return result
 
 	def bank_size(self):
 		return 0x10000 if self.hirom else 0x8000
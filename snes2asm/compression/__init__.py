@@ -14,16 +14,29 @@ from snes2asm.compression import lz77
 from snes2asm.compression import hal
 
 def get_names():
+	"""
+	Names of the encodings, leaving out shared helper modules
+	"""
 	import sys
 	from inspect import getmembers, ismodule
-	return [m[0] for m in getmembers(sys.modules[__name__], ismodule)]
+	return [m[0] for m in getmembers(sys.modules[__name__], ismodule) if hasattr(m[1], 'compress') and hasattr(m[1], 'decompress')]
 
 def get_encoding(encoding):
 	import sys
 	return getattr(sys.modules[__name__], encoding)
 
-def compress(encoding, data):
-	return get_encoding(encoding).compress(data)
+def get_levels(encoding):
+	"""
+	Compression levels supported by an encoding
+	"""
+	return getattr(get_encoding(encoding), 'LEVELS', [])
+
+def compress(encoding, data, level=None):
+	if level == None:
+		return get_encoding(encoding).compress(data)
+	if level not in get_levels(encoding):
+		raise ValueError("Encoding %s does not support compression level %s" % (encoding, level))
+	return get_encoding(encoding).compress(data, level)
 
 def decompress(encoding, data):
 	return get_encoding(encoding).decompress(data)
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from snes2asm.compression.match import previous_match_lengths, repeat_copy
+
 def compress(data):
 	return aplib_compress(data).do()
 
@@ -24,10 +26,10 @@ class aplib_compress:
 		self.out = bytearray()
 
 	def getdata(self):
-		"""builds an output array of what's currently compressed:
-		currently output bit + current tag content"""
-		tagstr = int2lebin(self._tag, self._tagsize)
-		return modifybytearray(self.out, tagstr, self._tagoffset)
+		"""stores the current tag content in the output array
+		and returns what's currently compressed"""
+		self.out[self._tagoffset:self._tagoffset + self._tagsize] = int2lebin(self._tag, self._tagsize)
+		return self.out
 
 	def write_bit(self, value):
 		"""writes a bit, make space for the tag if necessary"""
@@ -114,9 +116,10 @@ class aplib_compress:
 		self.write_byte(0)
 
 	def do(self):
+		matches = match_finder(self._in)
 		self._literal(False)
 		while self._offset < len(self._in):
-			offset, length = find_longest_match(self._in[:self._offset], self._in[self._offset:])
+			offset, length = matches.find(self._offset)
 			if length == 0:
 				c = self._in[self._offset]
 				if c == 0:
@@ -127,7 +130,7 @@ class aplib_compress:
 				self._singlebyte(offset)
 			elif 2 <= length <= 3 and 0 < offset <= 127:
 				self._shortblock(offset, length)
-			elif 3 <= length and 2 <= offset:
+			elif 3 <= length and 2 <= offset and length >= lengthdelta(offset) + 2:
 				self._block(offset, length)
 			else:
 				self._literal()
@@ -195,8 +198,7 @@ class aplib_decompress:
 		return result
 
 	def back_copy(self, offset, length=1):
-		for i in range(length):
-			self.out.append(self.out[-offset])
+		self.out += repeat_copy(self.out, len(self.out) - offset, length)
 
 	def read_literal(self, value=None):
 		if value is None:
@@ -253,37 +255,46 @@ class aplib_decompress:
 				break
 		return self.out
 
+class match_finder:
+	"""
+	Finds the longest match of a position with earlier data and its most
+	recent offset. A match may only run one byte into the position itself.
+	The longest match allowing any overlap comes from the suffix array of
+	the data and bounds the search, so the most recent occurrence is
+	usually found with a single rfind.
+	"""
+	def __init__(self, data):
+		self.data = bytes(data)
+		self.longest = previous_match_lengths(self.data)
+
+	def occurrence(self, pos, length):
+		"""most recent start of a match of length overlapping pos by at most one byte"""
+		end = pos + 1 if length > 1 else pos
+		return self.data.rfind(self.data[pos:pos + length], 0, end)
+
+	def find(self, pos):
+		"""returns the number of byte to look backward and the length of byte to copy"""
+		if pos >= len(self.data) or self.longest[pos] == 0:
+			return 0, 0
+		length = self.longest[pos]
+		start = self.occurrence(pos, length)
+		if start == -1:
+			# Longer matches only overlap the position, search the shorter ones
+			low = 1
+			high = length - 1
+			while low < high:
+				mid = (low + high + 1) // 2
+				if self.occurrence(pos, mid) == -1:
+					high = mid - 1
+				else:
+					low = mid
+			length = low
+			start = self.occurrence(pos, length)
+		return pos - start, length
+
 def find_longest_match(s, sub):
 	"""returns the number of byte to look backward and the length of byte to copy)"""
-	if len(sub) == 0:
-		return 0, 0
-	limit = len(s)
-	dic = bytearray(s)
-	l = 0
-	offset = 0
-	length = 0
-	first = 0
-	word = bytearray() 
-	word.append(sub[l])
-	pos = dic.rfind(word, 0, limit + 1)
-	if pos == -1:
-		return offset, length
-
-	offset = limit - pos
-	length = len(word)
-	dic.append(sub[l])
-
-	while l < len(sub) - 1:
-		l += 1
-		word.append(sub[l])
-
-		pos = dic.rfind(word, 0, limit + 1)
-		if pos == -1:
-			return offset, length
-		offset = limit - pos
-		length = len(word)
-		dic.append(sub[l])
-	return offset, length
+	return match_finder(bytes(s) + bytes(sub)).find(len(s))
 
 def int2lebin(value, size):
 	"""ouputs value in binary, as little-endian"""
@@ -292,10 +303,6 @@ def int2lebin(value, size):
 		result.append((value >> (8 * i)) & 0xFF)
 	return result
 
-def modifybytearray(s, sub, offset):
-	"""overwrites 'sub' at 'offset' of 's'"""
-	return s[:offset] + sub + s[offset + len(sub):]
-
 def getbinlen(value):
 	"""return the bit length of an integer"""
 	result = 0
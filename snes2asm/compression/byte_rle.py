@@ -32,7 +32,7 @@ def decompress(data):
 			# End of rle found
 			if count == 0:
 				break
-			out += bytearray([last] * count)
+			out += bytes([last]) * count
 		else:
 			out.append(c)
 			last = c
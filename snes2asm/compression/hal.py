@@ -9,10 +9,17 @@ This compression format is used in various HAL Laboratory SNES games
 including Kirby's Dream Course, Kirby Super Star, and others.
 """
 
+from bisect import bisect_left
+
+from snes2asm.compression.match import match_length, increasing, repeat_copy, BIT_REVERSE
+
 DATA_SIZE = 65536
 RUN_SIZE = 32
 LONG_RUN_SIZE = 1024
 
+# Each byte minus one for finding increasing sequences
+DECREMENT = bytes((b - 1) & 0xFF for b in range(0, 256))
+
 def compress(data, fast=True):
     compressor = HalCompressor(data, fast=fast)
     return compressor.compress()
@@ -21,19 +28,6 @@ def decompress(data):
     decompressor = HalDecompressor(data)
     return decompressor.decompress()
 
-def _rotate(byte):
-    """Reverse the order of bits in a byte."""
-    result = 0
-    if byte & 0x01: result |= 0x80
-    if byte & 0x02: result |= 0x40
-    if byte & 0x04: result |= 0x20
-    if byte & 0x08: result |= 0x10
-    if byte & 0x10: result |= 0x08
-    if byte & 0x20: result |= 0x04
-    if byte & 0x40: result |= 0x02
-    if byte & 0x80: result |= 0x01
-    return result
-
 class HalDecompressor:
     """Decompressor for HAL Laboratory format."""
 
@@ -73,40 +67,29 @@ class HalDecompressor:
             # Execute command
             if command == 0:
                 # Write uncompressed bytes
-                for i in range(length):
-                    if self.inpos >= len(self.packed):
-                        break
-                    self.unpacked.append(self.packed[self.inpos])
-                    self.inpos += 1
+                self.unpacked += self.packed[self.inpos:self.inpos + length]
+                self.inpos += length
 
             elif command == 1:
                 # 8-bit RLE
                 if self.inpos >= len(self.packed):
                     break
-                value = self.packed[self.inpos]
+                self.unpacked += bytes([self.packed[self.inpos]]) * length
                 self.inpos += 1
-                for i in range(length):
-                    self.unpacked.append(value)
 
             elif command == 2:
                 # 16-bit RLE
                 if self.inpos + 1 >= len(self.packed):
                     break
-                value1 = self.packed[self.inpos]
-                value2 = self.packed[self.inpos + 1]
+                self.unpacked += self.packed[self.inpos:self.inpos + 2] * length
                 self.inpos += 2
-                for i in range(length):
-                    self.unpacked.append(value1)
-                    self.unpacked.append(value2)
 
             elif command == 3:
                 # 8-bit increasing sequence
                 if self.inpos >= len(self.packed):
                     break
-                value = self.packed[self.inpos]
+                self.unpacked += increasing(self.packed[self.inpos], length)
                 self.inpos += 1
-                for i in range(length):
-                    self.unpacked.append((value + i) & 0xFF)
 
             elif command == 4 or command == 7:
                 # Regular backref (command 7 behaves same as 4)
@@ -114,15 +97,7 @@ class HalDecompressor:
                     break
                 offset = (self.packed[self.inpos] << 8) | self.packed[self.inpos + 1]
                 self.inpos += 2
-
-                if offset + length > len(self.unpacked):
-                    # Prevent reading beyond current output
-                    for i in range(length):
-                        if offset + i < len(self.unpacked):
-                            self.unpacked.append(self.unpacked[offset + i])
-                else:
-                    for i in range(length):
-                        self.unpacked.append(self.unpacked[offset + i])
+                self.unpacked += repeat_copy(self.unpacked, offset, length)
 
             elif command == 5:
                 # Backref with bit rotation
@@ -130,36 +105,50 @@ class HalDecompressor:
                     break
                 offset = (self.packed[self.inpos] << 8) | self.packed[self.inpos + 1]
                 self.inpos += 2
-
-                for i in range(length):
-                    if offset + i < len(self.unpacked):
-                        self.unpacked.append(_rotate(self.unpacked[offset + i]))
+                self.unpacked += repeat_copy(self.unpacked, offset, length, BIT_REVERSE)
 
             elif command == 6:
-                # Backwards backref
+                # Backwards backref, skipping positions outside the output
                 if self.inpos + 1 >= len(self.packed):
                     break
                 offset = (self.packed[self.inpos] << 8) | self.packed[self.inpos + 1]
                 self.inpos += 2
-
-                for i in range(length):
-                    if offset - i >= 0 and offset - i < len(self.unpacked):
-                        self.unpacked.append(self.unpacked[offset - i])
+                low = max(offset - length + 1, 0)
+                high = min(offset, len(self.unpacked) - 1)
+                if low <= high:
+                    self.unpacked += self.unpacked[low:high + 1][::-1]
 
         return self.unpacked
 
 
 class HalCompressor:
-    """Compressor for HAL Laboratory format."""
+    """
+    Compressor for HAL Laboratory format.
+
+    References are found through indexes of the 4 byte prefixes of earlier
+    positions in the data, in a bit rotated copy of the data and read
+    backwards, each a sorted list of positions per prefix. Positions are
+    indexed as compression passes them.
+    """
 
     def __init__(self, data, fast=True):
-        self.unpacked = bytearray(data)
+        self.unpacked = bytes(data)
         self.inputsize = len(data)
         self.packed = bytearray()
         self.inpos = 0
         self.dontpack = bytearray()
         self.fast = fast
 
+        # Shadow buffers compared without building slices per candidate
+        self.rotated = self.unpacked.translate(BIT_REVERSE)
+        self.reversed = self.unpacked[::-1]
+        self.decremented = self.unpacked.translate(DECREMENT)
+
+        self.indexed = 0
+        self.forward_index = {}
+        self.rotated_index = {}
+        self.backward_index = {}
+
     def compress(self):
         """Compress the data and return result."""
         while self.inpos < self.inputsize:
@@ -191,101 +180,99 @@ class HalCompressor:
 
     def _rle_check(self):
         """Check for RLE opportunities at current position."""
-        current = self.unpacked[self.inpos:]
+        data = self.unpacked
+        pos = self.inpos
+        remaining = self.inputsize - pos
         best = {'size': 0, 'data': 0, 'method': 0}
 
-        # Check 8-bit RLE
-        size = 0
-        for i in range(min(LONG_RUN_SIZE, len(current))):
-            if current[i] == current[0]:
-                size += 1
-            else:
-                break
+        # Check 8-bit RLE, each byte equal to the one before
+        size = 1 + match_length(data, pos, data, pos + 1, min(LONG_RUN_SIZE, remaining) - 1)
         if size > best['size'] and size > 2:
-            best = {'size': size, 'data': current[0], 'method': 0}
-
-        # Check 16-bit RLE
-        if len(current) >= 2:
-            size = 0
-            first_word = current[0] | (current[1] << 8)
-            for i in range(0, min(2 * LONG_RUN_SIZE, len(current) - 1), 2):
-                if i + 1 < len(current):
-                    word = current[i] | (current[i + 1] << 8)
-                    if word == first_word:
-                        size += 2
-                    else:
-                        break
+            best = {'size': size, 'data': data[pos], 'method': 0}
+
+        # Check 16-bit RLE, each byte equal to the one two before
+        if remaining >= 2:
+            words = (min(2 * LONG_RUN_SIZE, remaining - 1) + 1) // 2
+            size = 2 + (match_length(data, pos, data, pos + 2, 2 * words - 2) // 2) * 2
             if size > best['size'] and size > 2:
-                best = {'size': size, 'data': first_word, 'method': 1}
+                best = {'size': size, 'data': data[pos] | (data[pos + 1] << 8), 'method': 1}
 
-        # Check sequence RLE (skip in fast mode)
+        # Check sequence RLE (skip in fast mode), each byte one more than the one before
         if not self.fast:
-            size = 0
-            for i in range(min(LONG_RUN_SIZE, len(current))):
-                if current[i] == (current[0] + i) & 0xFF:
-                    size += 1
-                else:
-                    break
+            size = 1 + match_length(data, pos, self.decremented, pos + 1, min(LONG_RUN_SIZE, remaining) - 1)
             if size > best['size'] and size > 2:
-                best = {'size': size, 'data': current[0], 'method': 2}
+                best = {'size': size, 'data': data[pos], 'method': 2}
 
         return best
 
+    def _index(self):
+        """Index the prefixes of the positions before the current one."""
+        data = self.unpacked
+        last = self.inputsize - 4
+        for pos in range(self.indexed, self.inpos):
+            if pos <= last:
+                self.forward_index.setdefault(data[pos:pos+4], []).append(pos)
+                if not self.fast:
+                    self.rotated_index.setdefault(self.rotated[pos:pos+4], []).append(pos)
+            # Backward references read from a position down to the start
+            if pos >= 3 and not self.fast:
+                start = self.inputsize - 1 - pos
+                self.backward_index.setdefault(self.reversed[start:start+4], []).append(pos)
+        self.indexed = max(self.indexed, self.inpos)
+
     def _ref_search(self):
         """Search for back references."""
-        current = self.unpacked[self.inpos:]
+        self._index()
+        key = self.unpacked[self.inpos:self.inpos+4]
         best = {'size': 0, 'offset': 0, 'method': 0}
 
         # Forward reference search
-        if len(current) >= 4:
-            search_pattern = bytes(current[:4])
-            # Search in previously compressed data
-            for offset in range(max(0, self.inpos - 8192), self.inpos):
-                if self.unpacked[offset:offset+4] == search_pattern:
-                    # Found a match, see how long it is
-                    size = 4
-                    while size < min(LONG_RUN_SIZE, len(current)) and \
-                          offset + size < self.inpos and \
-                          self.unpacked[offset + size] == current[size]:
-                        size += 1
-
-                    if size >= 4 and size > best['size']:
-                        best = {'size': size, 'offset': offset, 'method': 0}
+        self._longest(best, self.forward_index.get(key), self.unpacked, 0)
 
         # Skip other reference types in fast mode
         if self.fast:
             return best
 
         # Rotated reference search
-        if len(current) >= 4:
-            search_pattern = bytes([_rotate(b) for b in current[:4]])
-            for offset in range(max(0, self.inpos - 8192), self.inpos):
-                if bytes([_rotate(self.unpacked[offset + i]) for i in range(4)]) == search_pattern:
-                    size = 4
-                    while size < min(LONG_RUN_SIZE, len(current)) and \
-                          offset + size < self.inpos and \
-                          _rotate(self.unpacked[offset + size]) == current[size]:
-                        size += 1
-
-                    if size >= 4 and size > best['size']:
-                        best = {'size': size, 'offset': offset, 'method': 1}
+        self._longest(best, self.rotated_index.get(key), self.rotated, 1)
 
         # Backward reference search
-        if len(current) >= 4:
-            search_pattern = bytes(current[3::-1])
-            for offset in range(max(3, self.inpos - 8192), self.inpos):
-                if offset >= 3 and self.unpacked[offset-3:offset+1][::-1] == search_pattern:
-                    size = 4
-                    while size < min(LONG_RUN_SIZE, len(current)) and \
-                          offset - size >= 0 and \
-                          self.unpacked[offset - size] == current[size]:
-                        size += 1
-
-                    if size >= 4 and size > best['size']:
-                        best = {'size': size, 'offset': offset, 'method': 2}
+        self._longest(best, self.backward_index.get(key), self.reversed, 2)
 
         return best
 
+    def _longest(self, best, positions, source, method):
+        """
+        Update best with the longest earliest reference of a method among
+        the indexed positions within the window. Forward and rotated
+        references extend up to the current position and backward ones
+        down to the start of the data.
+        """
+        if not positions:
+            return
+        data = self.unpacked
+        pos = self.inpos
+        limit = min(LONG_RUN_SIZE, self.inputsize - pos)
+        size = self.inputsize
+        for i in range(bisect_left(positions, pos - 8192), len(positions)):
+            offset = positions[i]
+            if method == 2:
+                cap = min(limit, offset + 1)
+                start = size - 1 - offset
+            else:
+                cap = min(limit, max(4, pos - offset))
+                start = offset
+            # Only a candidate matching one byte past the best can beat it
+            if best['size'] and (cap <= best['size'] or source[start + best['size']] != data[pos + best['size']]):
+                continue
+            length = 4 + match_length(source, start + 4, data, pos + 4, cap - 4)
+            if length > best['size']:
+                best['size'] = length
+                best['offset'] = offset
+                best['method'] = method
+                if length == limit:
+                    break
+
     def _write_raw(self):
         """Write buffered literal data."""
         if len(self.dontpack) == 0:
@@ -1,5 +1,19 @@
 # -*- coding: utf-8 -*- 
 from functools import reduce
+from snes2asm.compression.match import MatchFinder, INVERT, BIT_REVERSE, increasing, repeat_copy
+
+# Compression levels. Fast bounds the match search, greedy takes the best
+# scoring command at each position and optimal finds the shortest encoding
+# over the candidates of a bounded search, never larger than greedy.
+LEVELS = ['fast', 'greedy', 'optimal']
+
+# Candidates visited per match search and the match length continued at
+# the next position without a search, for each level
+SEARCH_LIMITS = {
+	'fast': (16, 8),
+	'greedy': (None, None),
+	'optimal': (1024, 32)
+}
 
 class lz_compress:
 
@@ -10,19 +24,41 @@ class lz_compress:
 	FILL_ZERO = 3
 	REPEAT = 4
 
-	def __init__(self, data):
+	# Longest length of a long command
+	MAX_LENGTH = 0x400
+
+	# Commands whose parameter depends on their length and so are never shortened
+	EXACT_LENGTH = ()
+
+	def __init__(self, data, level='greedy'):
+		if level not in LEVELS:
+			raise ValueError("Unknown compression level %s. Use one of %s" % (level, ", ".join(LEVELS)))
 		self._in = data
 		self._offset = 0
 		self._direct = bytearray()
 		self._out = bytearray()
 		self._functions = []
+		self._level = level
+		self._matches = MatchFinder(data, *SEARCH_LIMITS[level])
+		# Last run found of each fill kind as (start, end)
+		self._runs = {}
+
+	def _run_end(self, kind):
+		# An offset inside a run found earlier shares its end
+		run = self._runs.get(kind)
+		if run and run[0] <= self._offset < run[1]:
+			return run[1]
+		return None
 
 	def _rle8(self):
 		val = self._in[self._offset]
 
-		index = self._offset + 1
-		while index < len(self._in) and val == self._in[index]:
-			index += 1
+		index = self._run_end('byte')
+		if index == None:
+			index = self._offset + 1
+			while index < len(self._in) and val == self._in[index]:
+				index += 1
+			self._runs['byte'] = (self._offset, index)
 		return (self.FILL_BYTE, index - self._offset, bytearray([val]))
 
 	def _rle16(self):
@@ -31,93 +67,50 @@ class lz_compress:
 		val1 = self._in[self._offset]
 		val2 = self._in[self._offset+1]
 
-		index = self._offset + 2
-		while index < len(self._in) and val1 == self._in[index] and val2 == self._in[index+1]:
-			index += 2
+		# Word runs starting on odd and even offsets are separate
+		kind = 'word%d' % (self._offset & 1)
+		index = self._run_end(kind)
+		if index == None:
+			index = self._offset + 2
+			while index + 1 < len(self._in) and val1 == self._in[index] and val2 == self._in[index+1]:
+				index += 2
+			self._runs[kind] = (self._offset, index)
 		length = index - self._offset
 		length = length if length > 2 else 0
 		return (self.FILL_WORD, length, bytearray([val1, val2]))
 
 	def _increment_fill(self):
-		val = self._in[self._offset]
-		index = self._offset
-		while index < len(self._in) and val == self._in[index]:
-			val = (val + 1) & 0xFF
-			index += 1
+		index = self._run_end('inc')
+		if index == None:
+			val = self._in[self._offset]
+			index = self._offset
+			while index < len(self._in) and val == self._in[index]:
+				val = (val + 1) & 0xFF
+				index += 1
+			self._runs['inc'] = (self._offset, index)
 		return (self.FILL_INC, index - self._offset, bytearray([self._in[self._offset]]))
 
 	def _zero_fill(self):
-		index = self._offset
-		while index < len(self._in) and self._in[index] == 0:
-			index += 1
+		index = self._run_end('zero')
+		if index == None:
+			index = self._offset
+			while index < len(self._in) and self._in[index] == 0:
+				index += 1
+			if index > self._offset:
+				self._runs['zero'] = (self._offset, index)
 		return (self.FILL_ZERO, index - self._offset, bytearray())
 
 	def _search(self):
-		max_length = 0
-		max_index = 0
-
-		for index in range(0, self._offset):
-			offset = self._offset
-			while offset < len(self._in) and self._in[index] == self._in[offset]:
-				offset += 1
-				index += 1
-			length = offset - self._offset
-
-			if length > max_length:
-				max_length = length
-				max_index = index - length
-
-		return (max_length, max_index)
+		return self._matches.longest(self._offset)
 
 	def _search_inverse(self):
-		max_length = 0
-		max_index = 0
-
-		for index in range(0, self._offset):
-			offset = self._offset
-			while offset < len(self._in) and self._in[index] == self._in[offset] ^ 0xFF:
-				offset += 1
-				index += 1
-			length = offset - self._offset
-
-			if length > max_length:
-				max_length = length
-				max_index = index - length
-
-		return (max_length, max_index)
+		return self._matches.longest(self._offset, INVERT)
 
 	def _search_bit_reverse(self):
-		max_length = 0
-		max_index = 0
-
-		for index in range(0, self._offset):
-			offset = self._offset
-			while offset < len(self._in) and self._in[index] == bit_reverse(self._in[offset]):
-				offset += 1
-				index += 1
-			length = offset - self._offset
-
-			if length > max_length:
-				max_length = length
-				max_index = index - length
-
-		return (max_length, max_index)
-
+		return self._matches.longest(self._offset, BIT_REVERSE)
 
 	def _search_reverse(self):
-		max_length = 0
-		max_index = 0
-		for index in range(self._offset, -1, -1):
-			offset = self._offset
-			while offset < len(self._in) and index >= 0 and self._in[index] == self._in[offset]:
-				offset += 1
-				index -= 1
-			length = offset - self._offset
-
-			if length > max_length:
-				max_length = length
-				max_index = index + 1
-		return (max_length, max_index)
+		return self._matches.longest_reverse(self._offset)
 
 	def _repeat_be(self):
 		max_length, max_index = self._search();
@@ -127,6 +120,10 @@ class lz_compress:
 		max_length, max_index = self._search();
 		return (self.REPEAT, max_length, bytearray([max_index >> 8, max_index & 0xFF]))
 		
+	def _max_length(self, command):
+		# Word fills count their length in words
+		return self.MAX_LENGTH * 2 if command == self.FILL_WORD else self.MAX_LENGTH
+
 	def _write_direct_copy(self):
 		if len(self._direct) > 0:
 			self._write_command(self.DIRECT_COPY, len(self._direct), self._direct)
@@ -145,24 +142,104 @@ class lz_compress:
 			self._out += bytearray([header]) + val
 
 	def do(self):
+		if self._level == 'optimal':
+			self._optimal_parse()
+		else:
+			self._greedy_parse()
+
+		# Terminate
+		self._out.append(0xFF)
+
+		if self._level == 'optimal':
+			# The bounded match search can miss matches the greedy parse
+			# finds, so optimal keeps the greedy encoding when it is smaller
+			greedy = self.__class__(self._in, 'greedy').do()
+			if len(greedy) < len(self._out):
+				self._out = greedy
+		return self._out
+
+	def _greedy_parse(self):
 		while self._offset < len(self._in):
-			# Run all encoding candidates
-			algs = [f() for f in self._functions]
+			# Run all encoding candidates, dropping any too long to encode
+			# that cannot be shortened
+			algs = [alg for alg in [f() for f in self._functions] if alg[0] not in self.EXACT_LENGTH or alg[1] <= self._max_length(alg[0])]
 			# Select longest running algorithm
 			(command, length, val) = reduce(lambda a, b: a if a[1] - len(a[2]) > b[1] - len(b[2]) else b, algs)
 			if length > 2:
 				self._write_direct_copy()
+				# Longer runs continue with the next command
+				length = min(length, self._max_length(command))
 				self._write_command(command, length, val)
 			else:
 				self._direct.append(self._in[self._offset])
+				if len(self._direct) == self.MAX_LENGTH:
+					self._write_direct_copy()
 				length = 1
 
 			self._offset += length
 		self._write_direct_copy()
 
-		# Terminate
-		self._out.append(0xFF)
-		return self._out
+	def _optimal_parse(self):
+		"""
+		Shortest encoding over the command candidates of every position. The
+		cost to the end of the data is found from the last position back to
+		the first, letting each command stop at any length up to its run.
+		"""
+		size = len(self._in)
+
+		# Matches are searched in increasing order of position
+		candidates = []
+		for offset in range(0, size):
+			self._offset = offset
+			candidates.append([alg for alg in [f() for f in self._functions] if alg[1] > 2])
+
+		# Encoded size from each position to the end, and that size plus the position
+		cost = [0] * (size + 1)
+		ends = [0] * (size + 1)
+		ends[size] = size
+		choice = [None] * size
+
+		for offset in range(size - 1, -1, -1):
+			# Direct copy of up to 32 bytes with a short header or longer with a long header
+			best = None
+			for header, low, high in ((1, 1, 0x20), (2, 0x21, self.MAX_LENGTH)):
+				window = ends[offset+low:min(offset+high, size)+1]
+				if window:
+					least = min(window)
+					if best == None or header + least - offset < best[0]:
+						best = (header + least - offset, low + window.index(least), self.DIRECT_COPY, None)
+
+			for command, length, val in candidates[offset]:
+				# Word fills count their length in words
+				step = 2 if command == self.FILL_WORD else 1
+				if command in self.EXACT_LENGTH:
+					if length > self._max_length(command):
+						continue
+					header = 1 if length <= 0x20 * step else 2
+					ranges = ((header, length, length),)
+				else:
+					length = min(length, self._max_length(command))
+					ranges = ((1, 3 if step == 1 else 4, min(length, 0x20 * step)), (2, 0x20 * step + step, length))
+				for header, low, high in ranges:
+					if low > high:
+						continue
+					window = cost[offset+low:offset+high+1:step]
+					least = min(window)
+					if header + len(val) + least < best[0]:
+						best = (header + len(val) + least, low + window.index(least) * step, command, val)
+
+			cost[offset] = best[0]
+			ends[offset] = best[0] + offset
+			choice[offset] = best[1:]
+
+		offset = 0
+		while offset < size:
+			length, command, val = choice[offset]
+			if command == self.DIRECT_COPY:
+				val = bytearray(self._in[offset:offset+length])
+			self._write_command(command, length, val)
+			offset += length
+		self._offset = size
 
 class lz_decompress:
 	def __init__(self, data):
@@ -179,47 +256,50 @@ class lz_decompress:
 
 	def _fill_byte(self):
 		val = self._in[self._offset]
-		self._out += bytearray([val] * self._length)
+		self._out += bytes([val]) * self._length
 		self._offset += 1
 
 	def _fill_zero(self):
-		self._out += bytearray([0] * self._length)
+		self._out += bytes(self._length)
 
 	def _fill_word(self):
 		val1 = self._in[self._offset]
 		val2 = self._in[self._offset+1]
-		self._out += bytearray([val1,val2] * self._length)
+		self._out += bytes([val1,val2]) * self._length
 		self._offset += 2
 
 	def _inc_fill(self):
 		val = self._in[self._offset]
-		self._out += bytearray([x & 0xFF for x in range(val, val + self._length)])
+		self._out += increasing(val, self._length)
 		self._offset += 1
 
 	def _repeat_be(self):
 		start = (self._in[self._offset] | (self._in[self._offset+1] << 8))
-		end = start + self._length
-		self._out += self._out[start:end]
+		self._out += self._history(start, self._length)
 		self._offset += 2
 
 	def _repeat_le(self):
 		start = ((self._in[self._offset] << 8) | self._in[self._offset+1])
-		end = start + self._length
-		self._out += self._out[start:end]
+		self._out += self._history(start, self._length)
 		self._offset += 2
 
 	def _repeat_reverse(self):
-		start = (self._in[self._offset] | (self._in[self._offset+1] << 8)) - 1
-		end = start + self._length
-		self._out += self._out[end:start:-1]
+		start = (self._in[self._offset] | (self._in[self._offset+1] << 8))
+		self._out += self._out[start:start+self._length][::-1]
 		self._offset += 2
 
 	def _repeat_bit_reverse(self):
 		start = (self._in[self._offset] | (self._in[self._offset+1] << 8))
-		end = start + self._length
-		self._out += bytearray([bit_reverse(b) for b in self._out[start:end]])
+		self._out += self._history(start, self._length, BIT_REVERSE)
 		self._offset += 2
 
+	def _history(self, start, length, table=None):
+		"""
+		Copy of earlier output translated by table. A copy overlapping its
+		own output repeats the bytes as they are written.
+		"""
+		return repeat_copy(self._out, start, length, table)
+
 	def _noop(self):
 		pass
 
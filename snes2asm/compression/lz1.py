@@ -1,16 +1,16 @@
 # -*- coding: utf-8 -*-
 
-from snes2asm.compression.lz import lz_compress, lz_decompress
+from snes2asm.compression.lz import lz_compress, lz_decompress, LEVELS
 
-def compress(data):
-	return lz1_compress(data).do()
+def compress(data, level='greedy'):
+	return lz1_compress(data, level).do()
 
 def decompress(data):
 	return lz1_decompress(data).do()
 
 class lz1_compress(lz_compress):
-	def __init__(self, data):
-		lz_compress.__init__(self, data)
+	def __init__(self, data, level='greedy'):
+		lz_compress.__init__(self, data, level)
 		self._functions = [self._rle16,self._rle8,self._increment_fill,self._repeat_le]
 
 class lz1_decompress(lz_decompress):
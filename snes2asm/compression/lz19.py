@@ -1,9 +1,9 @@
 # -*- coding: utf-8 -*-
 
-from snes2asm.compression.lz import lz_compress, lz_decompress
+from snes2asm.compression.lz import lz_compress, lz_decompress, LEVELS
 
-def compress(data):
-	return lz19_compress(data).do()
+def compress(data, level='greedy'):
+	return lz19_compress(data, level).do()
 
 def decompress(data):
 	return lz19_decompress(data).do()
@@ -13,8 +13,10 @@ class lz19_compress(lz_compress):
 	REPEAT_BITREV = 5
 	REPEAT_REV = 6
 
-	def __init__(self, data):
-		lz_compress.__init__(self, data)
+	EXACT_LENGTH = (REPEAT_REV,)
+
+	def __init__(self, data, level='greedy'):
+		lz_compress.__init__(self, data, level)
 		self._functions = [self._rle16,self._rle8,self._increment_fill,self._repeat_be,self._repeat_reverse,self._repeat_bit_reverse]
 
 	def _repeat_bit_reverse(self):
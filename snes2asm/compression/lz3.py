@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from snes2asm.compression.lz import lz_compress, lz_decompress, bit_reverse
+from snes2asm.compression.lz import lz_compress, lz_decompress, LEVELS
+from snes2asm.compression.match import BIT_REVERSE
 
-def compress(data):
-	return lz3_compress(data).do()
+def compress(data, level='greedy'):
+	return lz3_compress(data, level).do()
 
 def decompress(data):
 	return lz3_decompress(data).do()
@@ -13,8 +14,10 @@ class lz3_compress(lz_compress):
 	REPEAT_BITREV = 5
 	REPEAT_REV = 6
 
-	def __init__(self, data):
-		lz_compress.__init__(self, data)
+	EXACT_LENGTH = (REPEAT_REV,)
+
+	def __init__(self, data, level='greedy'):
+		lz_compress.__init__(self, data, level)
 		self._functions = [self._rle16,self._rle8,self._zero_fill,self._repeat_rel,self._repeat_reverse,self._repeat_bit_reverse]
 
 	def _repeat_rel(self):
@@ -47,14 +50,14 @@ class lz3_decompress(lz_decompress):
 		else:
 			start = index << 8 | self._in[self._offset+1]
 			self._offset += 2
-		end = start + self._length
-		return self._out[start:end]
+		return start
 
 	def _repeat_rel(self):
-		self._out += self._repeat_data()
+		self._out += self._history(self._repeat_data(), self._length)
 
 	def _repeat_bit_reverse(self):
-		self._out += bytearray([bit_reverse(b) for b in self._repeat_data()])
+		self._out += self._history(self._repeat_data(), self._length, BIT_REVERSE)
 
 	def _repeat_reverse(self):
-		self._out += self._repeat_data()[::-1]
+		start = self._repeat_data()
+		self._out += self._out[start:start+self._length][::-1]
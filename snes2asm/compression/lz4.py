@@ -1,64 +1,90 @@
 # -*- coding: utf-8 -*-
 
-def compress(data):
-	out = bytearray()
-	i = 0
-	anchor = 0
-	end = len(data) - 5
-	while i < len(data):
-		# Find the longest match
-		match_length = 0
-		match_offset = 0
-		for j in range(0, i):
-			length = 0
-			while i + length < end and data[j + length] == data[i + length]:
-				length += 1
-			if length > match_length:
-				match_length = length
-				match_offset = j + 1
-
-		literal_length = i - anchor
-
-		# If the match is too short
-		if match_length < 4:
-			i += 1
-			if i < len(data):
-				continue
-			# End of data reached
-			literal_length = len(data) - anchor
-			token = (min(15, literal_length) << 4)
-			match_length = -1
-		else:
-			match_length -= 4
-			token = (min(15, literal_length) << 4) | min(15, match_length)
+"""
+LZ4 style block compression. A match stores the position of its source
+plus one rather than a distance back.
+"""
 
-		out.append(token)
+from snes2asm.compression.match import match_length, repeat_copy
 
-		# Encode literals
-		if literal_length >= 15:
-			n = literal_length - 15
-			while n >= 0xFF:
-				out.append(0xFF)
-				n -= 0xFF
-			out.append(n)
+MIN_MATCH = 4
+# Bytes at the end of a block always written as literals
+LAST_LITERALS = 5
+# Highest source position of a match plus one
+MAX_OFFSET = 0xFFFF
+# Failed searches in a row before the step between searched positions grows
+SKIP_TRIGGER = 6
 
-		out.extend(data[anchor:anchor + literal_length])
+def compress(data, acceleration=1):
+	"""
+	Single pass compression with a table of the last position of each 4
+	byte sequence. Positions without a match are skipped in growing steps
+	and a higher acceleration grows the steps sooner, trading compression
+	for speed.
+	"""
+	if acceleration < 1:
+		raise ValueError("Acceleration must be at least 1")
+	data = bytes(data)
+	size = len(data)
+	end = size - LAST_LITERALS
+	out = bytearray()
+	table = {}
+	anchor = 0
+	i = 0
+	search = acceleration << SKIP_TRIGGER
+	while i + MIN_MATCH <= end:
+		key = data[i:i+MIN_MATCH]
+		p = table.get(key)
+		table[key] = i
+		if p == None or p >= MAX_OFFSET:
+			i += search >> SKIP_TRIGGER
+			search += 1
+			continue
 
-		# Encode match
-		if match_length >= 0:
-			out.append(match_offset & 0xFF)
-			out.append((match_offset >> 8) & 0xFF)
+		length = MIN_MATCH + match_length(data, p + MIN_MATCH, data, i + MIN_MATCH, end - i - MIN_MATCH)
+		# Extend the match back over pending literals
+		while i > anchor and p > 0 and data[i-1] == data[p-1]:
+			i -= 1
+			p -= 1
+			length += 1
 
-			if match_length >= 15:
-				n = match_length - 15
-				while n >= 0xFF:
-					out.append(0xFF)
-					n -= 0xFF
-				out.append(n)
-			i += match_length + 4
+		_write_sequence(out, data[anchor:i], p + 1, length)
+		i += length
 		anchor = i
+		search = acceleration << SKIP_TRIGGER
+		# Index a position inside the match for the next search
+		if i - 2 + MIN_MATCH <= end:
+			table[data[i-2:i-2+MIN_MATCH]] = i - 2
+
+	if anchor < size:
+		_write_sequence(out, data[anchor:], 0, 0)
 	return out
 
+def _write_sequence(out, literals, offset, length):
+	"""
+	Token, literals and match of a sequence. The last sequence has only
+	literals and no offset.
+	"""
+	token = min(15, len(literals)) << 4
+	if offset:
+		token |= min(15, length - MIN_MATCH)
+	out.append(token)
+	_write_length(out, len(literals))
+	out += literals
+	if offset:
+		out.append(offset & 0xFF)
+		out.append((offset >> 8) & 0xFF)
+		_write_length(out, length - MIN_MATCH)
+
+def _write_length(out, length):
+	# Lengths from 15 continue in bytes added to the token field
+	if length >= 15:
+		n = length - 15
+		while n >= 0xFF:
+			out.append(0xFF)
+			n -= 0xFF
+		out.append(n)
+
 def decompress(data):
 	out = bytearray()
 	i = 0
@@ -75,7 +101,7 @@ def decompress(data):
 					ext_direct = data[i]
 					i += 1
 					literal_length += ext_direct
-					if data[offset] != 0xFF: break
+					if ext_direct != 0xFF: break
 			# Copy literal_length
 			end = i + literal_length
 			out += data[i:end]
@@ -94,6 +120,5 @@ def decompress(data):
 				match_length += ext_length
 				if ext_length != 0xFF: break
 		match_length += 4
-		for x in range(offset, offset + match_length):
-			out.append(out[x])
+		out += repeat_copy(out, offset, match_length)
 	return out
\ No newline at end of file
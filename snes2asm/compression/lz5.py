@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from snes2asm.compression.lz import lz_compress, lz_decompress
+from snes2asm.compression.lz import lz_compress, lz_decompress, LEVELS
+from snes2asm.compression.match import INVERT
 
-def compress(data):
-	return lz5_compress(data).do()
+def compress(data, level='greedy'):
+	return lz5_compress(data, level).do()
 
 def decompress(data):
 	return lz5_decompress(data).do()
@@ -13,8 +14,8 @@ class lz5_compress(lz_compress):
 	REPEAT_INV = 5
 	REPEAT_REL = 6
 
-	def __init__(self, data):
-		lz_compress.__init__(self, data)
+	def __init__(self, data, level='greedy'):
+		lz_compress.__init__(self, data, level)
 		self._functions = [self._rle16,self._rle8,self._increment_fill,self._repeat_le,self._repeat_inverse,self._repeat_rel]
 
 	def _repeat_inverse(self):
@@ -36,12 +37,10 @@ class lz5_decompress(lz_decompress):
 
 	def _repeat_inverse(self):
 		start = (self._in[self._offset] << 8) | self._in[self._offset+1]
-		end = start + self._length
-		self._out += bytearray([b ^ 0xFF for b in self._out[start:end]])
+		self._out += self._history(start, self._length, INVERT)
 		self._offset += 2
 
 	def _repeat_rel(self):
 		start = len(self._out) - self._in[self._offset]
 		self._offset += 1
-		end = start + self._length
-		self._out += self._out[start:end]
+		self._out += self._history(start, self._length)
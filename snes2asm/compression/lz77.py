@@ -13,12 +13,108 @@ Format:
   - 4 bits for length (3-18, encoded as length-3)
 """
 
-def compress(data):
+from snes2asm.compression.match import match_length, repeat_copy
+
+# Format limits
+WINDOW_SIZE = 4096  # 12-bit offset
+MIN_MATCH = 3       # Minimum match length
+MAX_MATCH = 18      # Maximum match length (3 + 15)
+
+# Compression levels
+LEVELS = ['fast', 'greedy', 'lazy']
+
+# Match search chain depth and lazy matching of each compression level
+SEARCH_LIMITS = {
+    'fast': (8, False),
+    'greedy': (256, False),
+    'lazy': (256, True)
+}
+
+
+class HashChain:
+    """
+    Index of earlier positions by their first three bytes. The bytes are
+    rolled into a 24-bit key as positions are added, and each position
+    links to the previous one with the same key so a search walks from
+    the nearest candidate back to the edge of the window.
+    """
+
+    def __init__(self, data, max_chain):
+        self.data = data
+        self.size = len(data)
+        self.max_chain = max_chain
+        self.head = {}
+        self.prev = [-1] * len(data)
+        self.inserted = 0
+        self.key = 0
+        if len(data) >= MIN_MATCH - 1:
+            self.key = (data[0] << 8) | data[1]
+
+    def insert(self, pos):
+        """
+        Add every position before pos to the index
+        """
+        data = self.data
+        head = self.head
+        prev = self.prev
+        key = self.key
+        end = min(pos, self.size - MIN_MATCH + 1)
+        for p in range(self.inserted, end):
+            key = ((key << 8) | data[p + 2]) & 0xFFFFFF
+            prev[p] = head.get(key, -1)
+            head[key] = p
+        if end > self.inserted:
+            self.inserted = end
+            self.key = key
+
+    def find(self, pos):
+        """
+        Longest match for pos within the window.
+
+        Args:
+            pos: position of the data to match
+
+        Returns:
+            tuple: (length, offset back from pos), length 0 without a match
+        """
+        self.insert(pos)
+        data = self.data
+        limit = min(MAX_MATCH, self.size - pos)
+        if limit < MIN_MATCH:
+            return (0, 0)
+
+        best_length = 0
+        best_pos = 0
+        depth = self.max_chain
+        p = self.head.get((data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2], -1)
+        while p >= 0 and pos - p < WINDOW_SIZE and depth > 0:
+            # Only a candidate matching one byte past the best can beat it
+            if data[p + best_length] == data[pos + best_length]:
+                length = match_length(data, p, data, pos, limit)
+                if length > best_length:
+                    best_length = length
+                    best_pos = p
+                    if length == limit:
+                        break
+            p = self.prev[p]
+            depth -= 1
+
+        if best_length < MIN_MATCH:
+            return (0, 0)
+        return (best_length, pos - best_pos)
+
+
+def compress(data, level='greedy'):
     """
     Compress data using LZ77 algorithm.
 
+    Matches are found through a hash chain of three byte prefixes with a
+    search depth bounded by the level. The lazy level emits a literal
+    instead of a match when the next position has a longer match.
+
     Args:
         data: bytes-like object to compress
+        level: 'fast', 'greedy' or 'lazy'
 
     Returns:
         bytes: compressed data
@@ -28,71 +124,60 @@ def compress(data):
     else:
         raise TypeError("data must be bytes or bytearray")
 
+    if level not in LEVELS:
+        raise ValueError("Unknown compression level %s. Use one of %s" % (level, ", ".join(LEVELS)))
+
     if len(data) == 0:
         return bytes()
 
-    # Configuration
-    WINDOW_SIZE = 4096  # 12-bit offset
-    MIN_MATCH = 3       # Minimum match length
-    MAX_MATCH = 18      # Maximum match length (3 + 15)
+    max_chain, lazy = SEARCH_LIMITS[level]
+    chain = HashChain(data, max_chain)
 
     output = bytearray()
+    size = len(data)
     pos = 0
-
-    while pos < len(data):
-        # Buffer for the next 8 blocks (literals or references)
-        blocks = []
-        control_byte = 0
-
-        for bit_pos in range(8):
-            if pos >= len(data):
-                break
-
-            # Search for matches in the sliding window
-            window_start = max(0, pos - WINDOW_SIZE)
-            best_match_offset = 0
-            best_match_length = 0
-
-            # Look for the longest match
-            for offset in range(window_start, pos):
-                # Calculate offset (distance back from current position)
-                match_offset = pos - offset
-
-                # Skip if offset doesn't fit in 12 bits (max 4095)
-                if match_offset >= WINDOW_SIZE:
-                    continue
-
-                match_length = 0
-                while (match_length < MAX_MATCH and
-                       pos + match_length < len(data) and
-                       data[offset + match_length] == data[pos + match_length]):
-                    match_length += 1
-
-                if match_length >= MIN_MATCH and match_length > best_match_length:
-                    best_match_length = match_length
-                    best_match_offset = match_offset
-
-            # Decide whether to use literal or reference
-            if best_match_length >= MIN_MATCH:
-                # Use reference (set bit to 1)
-                control_byte |= (1 << bit_pos)
-
-                # Encode offset (12 bits) and length (4 bits)
-                # Length is stored as (actual_length - 3) since minimum is 3
-                encoded = (best_match_offset & 0x0FFF) | ((best_match_length - MIN_MATCH) << 12)
-
-                # Store as little-endian 16-bit value
-                blocks.append(bytes([encoded & 0xFF, (encoded >> 8) & 0xFF]))
-                pos += best_match_length
-            else:
-                # Use literal (bit is already 0)
-                blocks.append(bytes([data[pos]]))
+    # Position of the current control byte and the next block bit
+    control_pos = 0
+    bit_pos = 8
+    match = chain.find(0)
+
+    while pos < size:
+        # Start a control byte for the next 8 blocks
+        if bit_pos == 8:
+            control_pos = len(output)
+            output.append(0)
+            bit_pos = 0
+
+        length, offset = match
+        if lazy and length and length < MAX_MATCH and pos + 1 < size:
+            next_match = chain.find(pos + 1)
+            if next_match[0] > length:
+                # Defer to the longer match at the next position
+                output.append(data[pos])
                 pos += 1
-
-        # Write control byte followed by blocks
-        output.append(control_byte)
-        for block in blocks:
-            output.extend(block)
+                bit_pos += 1
+                match = next_match
+                continue
+
+        if length:
+            # Use reference (set bit to 1)
+            output[control_pos] |= (1 << bit_pos)
+
+            # Encode offset (12 bits) and length (4 bits)
+            # Length is stored as (actual_length - 3) since minimum is 3
+            encoded = (offset & 0x0FFF) | ((length - MIN_MATCH) << 12)
+
+            # Store as little-endian 16-bit value
+            output += bytes([encoded & 0xFF, (encoded >> 8) & 0xFF])
+            pos += length
+        else:
+            # Use literal (bit is already 0)
+            output.append(data[pos])
+            pos += 1
+        bit_pos += 1
+
+        if pos < size:
+            match = chain.find(pos)
 
     return bytes(output)
 
@@ -149,16 +234,9 @@ def decompress(data):
                     # Invalid offset, stop decompression
                     return bytes(output)
 
-                # Handle overlapping copies (e.g., run-length encoding)
-                # For overlapping copies, we read and append one byte at a time
-                # This allows reading from positions we just wrote
-                for i in range(length):
-                    read_pos = copy_start + i
-                    # Check if we're reading beyond available data
-                    # This can happen with malformed compressed data
-                    if read_pos >= len(output):
-                        break
-                    output.append(output[read_pos])
+                # Overlapping copies (e.g., run-length encoding) repeat
+                # the bytes between copy_start and the end of output
+                output += repeat_copy(output, copy_start, length)
             else:
                 # Literal: copy byte directly
                 output.append(data[pos])
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+"""
+Longest match search for LZ compressors. Earlier positions are indexed in
+hash chains keyed by their first three bytes so a search only visits
+positions that can match, and candidates that cannot beat the current
+best are rejected with a single byte comparison. Matches are compared a
+block at a time with slices.
+
+Matches may be made against transformed data, such as inverted or bit
+reversed bytes, or read backwards from a source position.
+
+The longest earlier match of every position can also be found at once
+from a suffix array of the data and its LCP array.
+
+Decompressors build their output from whole slices: back-references that
+overlap the bytes they produce are copied a period at a time and byte
+transforms are applied with translation tables.
+"""
+
+# Byte translation tables for transformed match modes
+INVERT = bytes(b ^ 0xFF for b in range(0, 256))
+BIT_REVERSE = bytes(int('{:08b}'.format(b)[::-1], 2) for b in range(0, 256))
+
+# One wrap of an increasing byte sequence
+SEQUENCE = bytes(range(0, 256))
+
+def increasing(start, length):
+	"""
+	Length bytes counting up from start, wrapping after 0xFF
+	"""
+	return (SEQUENCE * (((start + length) >> 8) + 1))[start:start+length]
+
+def repeat_copy(out, start, length, table=None):
+	"""
+	Copy of length bytes of out from start, translated by table. A copy
+	running past the end of out reads the bytes it writes, so it repeats
+	the bytes from start with each period translated once more.
+	"""
+	end = start + length
+	size = len(out)
+	if end <= size:
+		data = out[start:end]
+		return data.translate(table) if table else data
+	period = bytes(out[start:size])
+	if not period:
+		return bytes()
+	if table:
+		# Translated periods until the translation cycles
+		periods = [period.translate(table)]
+		chunk = periods[0].translate(table)
+		while chunk != periods[0] and len(periods) * len(period) < length:
+			periods.append(chunk)
+			chunk = chunk.translate(table)
+		period = b''.join(periods)
+	return (period * (length // len(period) + 1))[0:length]
+
+def match_length(a, i, b, j, limit):
+	"""
+	Number of equal bytes of a from i and b from j up to limit
+	"""
+	length = 0
+	step = 16
+	while length < limit:
+		n = min(step, limit - length)
+		if a[i+length:i+length+n] == b[j+length:j+length+n]:
+			length += n
+			step <<= 1
+		else:
+			while a[i+length] == b[j+length]:
+				length += 1
+			break
+	return length
+
+class MatchFinder:
+	"""
+	Finds the longest earlier match for a position. Ties resolve to the
+	earliest source position for forward matches and the latest for
+	backward matches. Positions must be searched in increasing order.
+	A max_chain limit visits only the nearest candidates of each chain,
+	bounding the search time of repetitive data. A match longer than
+	reuse found at the previous position is continued one byte on
+	instead of searching again.
+	"""
+
+	def __init__(self, data, max_chain=None, reuse=None):
+		self.data = bytes(data)
+		self.size = len(self.data)
+		self.max_chain = max_chain
+		self.reuse = reuse
+		self.translated = {None: self.data}
+		self.results = {}
+		self.results_offset = -1
+		self.previous = {}
+
+		# Forward index of three byte chains and the first position of each byte and byte pair
+		self.indexed = 0
+		self.chains = {}
+		self.first1 = {}
+		self.first2 = {}
+
+		# Backward index of chains read in reverse and the last position of each byte and pair
+		self.reverse_indexed = 0
+		self.reverse_chains = {}
+		self.last1 = {}
+		self.last2 = {}
+
+	def cached(self, offset, mode, search):
+		# Several commands of a format may search the same position
+		if offset != self.results_offset:
+			self.previous = self.results if offset == self.results_offset + 1 else {}
+			self.results = {}
+			self.results_offset = offset
+		if mode not in self.results:
+			length, pos = self.previous.get(mode, (0, 0))
+			if self.reuse and length > self.reuse:
+				# Backward matches keep their lowest position as they shorten
+				self.results[mode] = (length - 1, pos if mode == 'reverse' else pos + 1)
+			else:
+				self.results[mode] = search()
+		return self.results[mode]
+
+	def index(self, offset):
+		data = self.data
+		size = self.size
+		chains = self.chains
+		first1 = self.first1
+		first2 = self.first2
+		for p in range(self.indexed, offset):
+			first1.setdefault(data[p], p)
+			if p + 1 < size:
+				first2.setdefault(data[p:p+2], p)
+				if p + 2 < size:
+					key = data[p:p+3]
+					chain = chains.get(key)
+					if chain == None:
+						chains[key] = [p]
+					else:
+						chain.append(p)
+		if offset > self.indexed:
+			self.indexed = offset
+
+	def reverse_index(self, offset):
+		data = self.data
+		chains = self.reverse_chains
+		for p in range(self.reverse_indexed, offset):
+			self.last1[data[p]] = p
+			if p >= 1:
+				self.last2[bytes([data[p], data[p-1]])] = p
+				if p >= 2:
+					key = bytes([data[p], data[p-1], data[p-2]])
+					chain = chains.get(key)
+					if chain == None:
+						chains[key] = [p]
+					else:
+						chain.append(p)
+		if offset > self.reverse_indexed:
+			self.reverse_indexed = offset
+
+	def longest(self, offset, table=None):
+		"""
+		Longest match of the data at offset, translated by table, against
+		the data from an earlier position. The match may overlap offset.
+		Returns (length, position).
+		"""
+		return self.cached(offset, table, lambda: self.search(offset, table))
+
+	def search(self, offset, table):
+		if table not in self.translated:
+			self.translated[table] = self.data.translate(table)
+		data = self.data
+		target = self.translated[table]
+		size = self.size
+		self.index(offset)
+
+		best_length = 0
+		best_pos = 0
+		if offset + 3 <= size:
+			chain = self.chains.get(target[offset:offset+3], [])
+			if self.max_chain:
+				chain = chain[-self.max_chain:]
+			for p in chain:
+				# Only a candidate matching one byte past the best can beat it
+				if best_length and data[p+best_length] != target[offset+best_length]:
+					continue
+				length = 3 + match_length(data, p + 3, target, offset + 3, size - offset - 3)
+				if length > best_length:
+					best_length = length
+					best_pos = p
+					if offset + length == size:
+						break
+		if best_length:
+			return (best_length, best_pos)
+
+		if offset + 2 <= size:
+			p = self.first2.get(target[offset:offset+2])
+			if p != None:
+				return (2, p)
+		if offset < size:
+			p = self.first1.get(target[offset])
+			if p != None:
+				return (1, p)
+		return (0, 0)
+
+	def longest_reverse(self, offset):
+		"""
+		Longest match of the data at offset against the data read backwards
+		from an earlier position. Returns (length, lowest position).
+		"""
+		return self.cached(offset, 'reverse', lambda: self.search_reverse(offset))
+
+	def search_reverse(self, offset):
+		if 'reverse' not in self.translated:
+			self.translated['reverse'] = self.data[::-1]
+		data = self.data
+		backward = self.translated['reverse']
+		size = self.size
+		self.reverse_index(offset)
+
+		best_length = 0
+		best_pos = 0
+		if offset + 3 <= size:
+			chain = self.reverse_chains.get(data[offset:offset+3], [])
+			if self.max_chain:
+				chain = chain[-self.max_chain:]
+			for p in reversed(chain):
+				# Position p read backwards is the backward data from size - 1 - p
+				q = size - 1 - p
+				if best_length and (best_length > p or backward[q+best_length] != data[offset+best_length]):
+					continue
+				length = 3 + match_length(backward, q + 3, data, offset + 3, min(size - offset, p + 1) - 3)
+				if length > best_length:
+					best_length = length
+					best_pos = p
+					if offset + length == size:
+						break
+		if best_length:
+			return (best_length, best_pos - best_length + 1)
+
+		if offset + 2 <= size:
+			p = self.last2.get(data[offset:offset+2])
+			if p != None:
+				return (2, p - 1)
+		if offset < size:
+			p = self.last1.get(data[offset])
+			if p != None:
+				return (1, p)
+		return (0, 0)
+
+def suffix_array(data, prefix=16):
+	"""
+	Start positions of the suffixes of data in sorted order, and the rank
+	of each position in that order. Suffixes are sorted by their first
+	prefix bytes, then groups still tied are sorted by doubling the
+	compared length using the ranks of the suffixes further on.
+	"""
+	size = len(data)
+	keys = [data[i:i+prefix] for i in range(0, size)]
+	order = sorted(range(0, size), key=keys.__getitem__)
+	# A suffix ranks by the start of its group of tied suffixes in the order
+	rank = [0] * size
+	groups = _split_groups(order, rank, keys.__getitem__, 0, size)
+
+	step = prefix
+	while groups:
+		tied = []
+		for start, end in groups:
+			# Ranks of this group change as it splits so its keys are taken first
+			keys = {i: rank[i+step] if i + step < size else -1 for i in order[start:end]}
+			order[start:end] = sorted(order[start:end], key=keys.__getitem__)
+			tied += _split_groups(order, rank, keys.__getitem__, start, end)
+		groups = tied
+		step <<= 1
+	return order, rank
+
+def _split_groups(order, rank, key, start, end):
+	# Rank the sorted suffixes from start to end by group and return the groups still tied
+	tied = []
+	first = start
+	for j in range(start + 1, end + 1):
+		if j == end or key(order[j]) != key(order[first]):
+			for k in range(first, j):
+				rank[order[k]] = first
+			if j - first > 1:
+				tied.append((first, j))
+			first = j
+	return tied
+
+def lcp_array(data, order, rank):
+	"""
+	Length of the common prefix of each suffix in sorted order with the
+	one before it
+	"""
+	size = len(data)
+	lcp = [0] * size
+	length = 0
+	for i in range(0, size):
+		r = rank[i]
+		if r == 0:
+			length = 0
+			continue
+		j = order[r-1]
+		while i + length < size and j + length < size and data[i+length] == data[j+length]:
+			length += 1
+		lcp[r] = length
+		if length:
+			length -= 1
+	return lcp
+
+def previous_match_lengths(data):
+	"""
+	Length of the longest match of each position with an earlier one,
+	which may overlap the position. The longest earlier match is with
+	one of the nearest suffixes in sorted order on either side that
+	starts earlier.
+	"""
+	size = len(data)
+	order, rank = suffix_array(data)
+	lcp = lcp_array(data, order, rank)
+	longest = [0] * size
+	for forward in [True, False]:
+		# Suffixes waiting for a following one that starts earlier, with the
+		# least common prefix length up to the next suffix on the stack
+		stack = []
+		for r in (range(0, size) if forward else range(size - 1, -1, -1)):
+			common = lcp[r] if forward else (lcp[r+1] if r + 1 < size else 0)
+			if stack and stack[-1][1] > common:
+				stack[-1][1] = common
+			pos = order[r]
+			while stack and order[stack[-1][0]] > pos:
+				top, common = stack.pop()
+				if common > longest[order[top]]:
+					longest[order[top]] = common
+				if stack and stack[-1][1] > common:
+					stack[-1][1] = common
+			stack.append([r, size])
+	return longest
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from itertools import groupby	
+from itertools import groupby, islice
 
 def compress(data, terminator=True):
 	compress.out = bytearray()
@@ -44,9 +44,8 @@ def decompress(data):
 		count = (0x7FFF & header) + 1
 		# Repeat command
 		if d & 0x80 != 0:
-			out += bytearray([next(stream)] * count)
+			out += bytes([next(stream)]) * count
 		# Direct copy coomand
 		else:
-			for i in range(0,count):
-				out.append(next(stream))
+			out += bytes(islice(stream, count))
 	return out
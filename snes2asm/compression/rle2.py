@@ -10,12 +10,10 @@ def compress(data):
 	return out1 + out2
 		
 def decompress(data):
-	out = bytearray()
 	decomp = rle1.decompress(data)
-	half = len(decomp)/2
-	data1 = decomp[:half]
-	data2 = decomp[half:]
-	for i in range(0,half):
-		out.append(data1[i])
-		out.append(data2[i])
+	# Even bytes come first, odd bytes after them
+	half = (len(decomp) + 1) // 2
+	out = bytearray(len(decomp))
+	out[0::2] = decomp[:half]
+	out[1::2] = decomp[half:]
 	return out
@@ -4,6 +4,7 @@ from snes2asm.disassembler import Instruction
 from snes2asm.tile import Decode8bppTile, Decode4bppTile, Decode3bppTile, Decode2bppTile, DecodeMode7Tile
 from snes2asm.bitmap import BitmapIndex
 from snes2asm import compression
+from snes2asm import hexfmt
 from snes2asm import brr
 from snes2asm.spc700 import SPC700Disassembler
 
@@ -38,8 +39,7 @@ class Decoder:
 		if size <= 4:
 			yield (0, Instruction(Decoder.data_directive(size) + ' ' + self.hex_fmt[size-1] % Decoder.val(data, 0, size), preamble=self.label+":"))
 		else:
-			for y in range(0, len(data), 16):
-				line = '.db ' + ', '.join(("$%02X" % x) for x in data[y : min(y+16, len(data))])
+			for y, line in hexfmt.data_lines(data):
 				if show_label:
 					yield (y, Instruction(line, preamble=self.label+":"))
 					show_label = False
@@ -49,7 +49,31 @@ class Decoder:
 	def no_data(self):
 		return self.start == self.end
 
+	def references(self):
+		"""
+		Decoders this decoder refers to through its parameters
+		"""
+		refs = []
+		for value in vars(self).values():
+			if isinstance(value, Decoder):
+				refs.append(value)
+			elif type(value) == list:
+				refs.extend(v for v in value if isinstance(v, Decoder))
+		return refs
+
+	def state(self):
+		"""
+		Attributes of the decoder excluding references to other decoders
+		"""
+		return {name: value for name, value in vars(self).items() if name != 'sub_decoders' and not _is_reference(value)}
+
+	def restore(self, state):
+		vars(self).update(state)
+
 	def set_output(self, name, ext, data):
+		# Files outlive views of a mapped rom
+		if type(data) == memoryview:
+			data = data.tobytes()
 		self.file_name = "%s.%s" % (name, ext)
 		self.file_ext = ext
 		file_name = self.file_name
@@ -188,12 +212,8 @@ class ArrayDecoder(Decoder):
 			# TODO
 			pass
 		else:
-			instr = Decoder.data_directive(self.size) + ' '
-			form = Decoder.hex_fmt[self.size-1]
 			show_label = self.label != None
-			for y in range(0, len(data), 16):
-				parts = [form % Decoder.val(data, x, self.size) for x in range(y, min(y+16,len(data)), self.size)]
-				line = instr + ', '.join(parts)
+			for y, line in hexfmt.data_lines(data, self.size):
 				if show_label:
 					yield (y, Instruction(line, preamble=self.label+":"))
 					show_label = False
@@ -212,8 +232,8 @@ class IndexDecoder(Decoder):
 	def decode(self, data):
 		instr = Decoder.data_directive(self.size)
 		index = 0
-		for pos in range(0, len(data), self.size):
-			offset = Decoder.val(data, pos, self.size)
+		offsets = hexfmt.unpack_values(data, self.size)
+		for pos, offset in zip(range(0, len(data), self.size), offsets):
 			self.values.append(offset)
 			if offset + self.parent.start > self.parent.end:
 				yield(pos, Instruction('%s %i' % (instr, offset), comment='Invalid index'))
@@ -221,6 +241,11 @@ class IndexDecoder(Decoder):
 				yield(pos, Instruction('%s %s_%i - %s_0' % (instr, self.parent.label, index, self.parent.label), 
 					preamble="%s_%i:" % (self.label, index)))
 			index = index + 1
+		# Bytes short of a whole index
+		remainder = len(data) % self.size
+		if remainder:
+			pos = len(data) - remainder
+			yield(pos, Instruction('.db ' + hexfmt.hex_text(data[pos:]), comment='Partial index'))
 
 	def size(self):
 		return (self.end - self.start) // self.size
@@ -502,6 +527,11 @@ class SPC700Decoder(Decoder):
 _ESCAPE_CHARS = ['\\' + '0', '\\x01', '\\x02', '\\x03', '\\x04', '\\x05', '\\x06', '\\x07', '\\x08', '\\t', '\\n', '\\x0b', '\\x0c', '\\r', '\\x0e', '\\x0f', '\\x10', '\\x11', '\\x12', '\\x13', '\\x14', '\\x15', '\\x16', '\\x17', '\\x18', '\\x19', '\\x1a', '\\x1b', '\\x1c', '\\x1d', '\\x1e', '\\x1f', ' ', '!', '\\"', '#', '$', '%', '&', "'", '(', ')', '*', '+', ',', '-', '.', '/', '0', '1', '2', '3', '4', '5', '6', '7', '8', '9', ':', ';', '<', '=', '>', '?', '@', 'A', 'B', 'C', 'D', 'E', 'F', 'G', 'H', 'I', 'J', 'K', 'L', 'M', 'N', 'O', 'P', 'Q', 'R', 'S', 'T', 'U', 'V', 'W', 'X', 'Y', 'Z', '[', '\\', ']', '^', '_', '`', 'a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k', 'l', 'm', 'n', 'o', 'p', 'q', 'r', 's', 't', 'u', 'v', 'w', 'x', 'y', 'z', '{', '|', '}', '~', '\x7f', '\\x80', '\\x81', '\\x82', '\\x83', '\\x84', '\\x85', '\\x86', '\\x87', '\\x88', '\\x89', '\\x8a', '\\x8b', '\\x8c', '\\x8d', '\\x8e', '\\x8f', '\\x90', '\\x91', '\\x92', '\\x93', '\\x94', '\\x95', '\\x96', '\\x97', '\\x98', '\\x99', '\\x9a', '\\x9b', '\\x9c', '\\x9d', '\\x9e', '\\x9f', '\\xa0', '\\xa1', '\\xa2', '\\xa3', '\\xa4', '\\xa5', '\\xa6', '\\xa7', '\\xa8', '\\xa9', '\\xaa', '\\xab', '\\xac', '\\xad', '\\xae', '\\xaf', '\\xb0', '\\xb1', '\\xb2', '\\xb3', '\\xb4', '\\xb5', '\\xb6', '\\xb7', '\\xb8', '\\xb9', '\\xba', '\\xbb', '\\xbc', '\\xbd', '\\xbe', '\\xbf', '\\xc0', '\\xc1', '\\xc2', '\\xc3', '\\xc4', '\\xc5', '\\xc6', '\\xc7', '\\xc8', '\\xc9', '\\xca', '\\xcb', '\\xcc', '\\xcd', '\\xce', '\\xcf', '\\xd0', '\\xd1', '\\xd2', '\\xd3', '\\xd4', '\\xd5', '\\xd6', '\\xd7', '\\xd8', '\\xd9', '\\xda', '\\xdb', '\\xdc', '\\xdd', '\\xde', '\\xdf', '\\xe0', '\\xe1', '\\xe2', '\\xe3', '\\xe4', '\\xe5', '\\xe6', '\\xe7', '\\xe8', '\\xe9', '\\xea', '\\xeb', '\\xec', '\\xed', '\\xee', '\\xef', '\\xf0', '\\xf1', '\\xf2', '\\xf3', '\\xf4', '\\xf5', '\\xf6', '\\xf7', '\\xf8', '\\xf9', '\\xfa', '\\xfb', '\\xfc', '\\xfd', '\\xfe', '\\xff']
 
 
+def _is_reference(value):
+	if isinstance(value, Decoder):
+		return True
+	return type(value) == list and any(isinstance(v, Decoder) for v in value)
+
 def ansi_escape(subject):
 	if type(subject) == str:
 		return ''.join([_ESCAPE_CHARS[ord(c)] for c in subject])
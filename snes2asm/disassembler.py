@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 
-from collections import OrderedDict
 import bisect
-from snes2asm.rangetree import RangeTree
+import multiprocessing
+from snes2asm import hexfmt
+from snes2asm.stats import Stats
+from snes2asm.rangetree import RangeTree, RangeMask
 
 InstructionSizes = [
 	2, 2, 2, 2, 2, 2, 2, 2, 1, 2, 1, 1, 3, 3, 3, 4, # x0
@@ -23,6 +25,335 @@ InstructionSizes = [
 	2, 2, 2, 2, 3, 2, 2, 2, 1, 3, 1, 1, 3, 3, 3, 4, # xF 
 ]
 
+# Addressing modes
+IMPLIED = 0
+ACCUMULATOR = 1
+IMMEDIATE = 2
+IMMEDIATE_IND = 3
+ABS = 4
+ABS_LOOKUP = 5
+ABS_LONG_LOOKUP = 6
+ABS_IND_X = 7
+ABS_IND_Y = 8
+ABS_LONG_IND_X = 9
+ABS_INDIR = 10
+ABS_IND_INDIR = 11
+ABS_INDIR_LONG = 12
+DIR_PAGE = 13
+DIR_PAGE_IND_X = 14
+DIR_PAGE_IND_Y = 15
+DIR_PAGE_INDIR = 16
+DIR_PAGE_INDIR_LONG = 17
+DIR_PAGE_IND_INDIR_X = 18
+DIR_PAGE_IND_INDIR_Y = 19
+DIR_PAGE_INDIR_LONG_Y = 20
+STACK_REL = 21
+STACK_REL_INDIR_Y = 22
+STACK_INTERRUPT = 23
+BLOCK_MOVE = 24
+BRANCH = 25
+PC_REL_LONG = 26
+JMP_ABS = 27
+JMP_ABS_LONG = 28
+RETURN = 29
+REP = 30
+SEP = 31
+WDM = 32
+
+# Operand formatting of addressing modes
+# Format: (operand bytes, operand format, variable name format)
+# Modes with zero operand bytes are formatted by Disassembler.format_op
+AddressModes = [(0, None, None)] * 33
+AddressModes[ABS] = (2, " $%04X.w", None)
+AddressModes[ABS_IND_X] = (2, " $%04X.w,X", " %s.w,X")
+AddressModes[ABS_IND_Y] = (2, " $%04X.w,Y", " %s.w,Y")
+AddressModes[ABS_INDIR] = (2, " ($%04X.w)", " ($%s.w)")
+AddressModes[ABS_IND_INDIR] = (2, " ($%04X.w,X)", " (%s.w,X)")
+AddressModes[ABS_INDIR_LONG] = (2, " [$%04X]", " [%s]")
+AddressModes[DIR_PAGE] = (1, " $%02X.b", " %s.b")
+AddressModes[DIR_PAGE_IND_X] = (1, " $%02X.b,X", " %s.b,X")
+AddressModes[DIR_PAGE_IND_Y] = (1, " $%02X.b,Y", " %s.b,Y")
+AddressModes[DIR_PAGE_INDIR] = (1, " ($%02X.b)", " (%s.b)")
+AddressModes[DIR_PAGE_INDIR_LONG] = (1, " [$%02X.b]", None)
+AddressModes[DIR_PAGE_IND_INDIR_X] = (1, " ($%02X.b,X)", None)
+AddressModes[DIR_PAGE_IND_INDIR_Y] = (1, " ($%02X.b),Y", None)
+AddressModes[DIR_PAGE_INDIR_LONG_Y] = (1, " [$%02X.b],Y", None)
+AddressModes[STACK_REL] = (1, " $%02X.b,S", None)
+AddressModes[STACK_REL_INDIR_Y] = (1, " ($%02X.b,S),Y", None)
+AddressModes[STACK_INTERRUPT] = (1, " $%02X.b", None)
+
+# 65816 opcodes
+# Format: (mnemonic, addressing mode, comment)
+OpcodeTable = [
+	("brk", STACK_INTERRUPT, None), # 00
+	("ora", DIR_PAGE_IND_INDIR_X, None), # 01
+	("cop", STACK_INTERRUPT, None), # 02
+	("ora", STACK_REL, None), # 03
+	("tsb", DIR_PAGE, None), # 04
+	("ora", DIR_PAGE, None), # 05
+	("asl", DIR_PAGE, None), # 06
+	("ora", DIR_PAGE_INDIR_LONG, None), # 07
+	("php", IMPLIED, None), # 08
+	("ora", IMMEDIATE, None), # 09
+	("asl", ACCUMULATOR, None), # 0A
+	("phd", IMPLIED, None), # 0B
+	("tsb", ABS_LOOKUP, None), # 0C
+	("ora", ABS_LOOKUP, None), # 0D
+	("asl", ABS, None), # 0E
+	("ora", ABS_LONG_LOOKUP, None), # 0F
+	("bpl", BRANCH, None), # 10
+	("ora", DIR_PAGE_IND_INDIR_Y, None), # 11
+	("ora", DIR_PAGE_INDIR, None), # 12
+	("ora", STACK_REL_INDIR_Y, None), # 13
+	("trb", DIR_PAGE, None), # 14
+	("ora", DIR_PAGE_IND_X, None), # 15
+	("asl", DIR_PAGE_IND_X, None), # 16
+	("ora", DIR_PAGE_INDIR_LONG_Y, None), # 17
+	("clc", IMPLIED, 'Clear carry'), # 18
+	("ora", ABS_IND_Y, None), # 19
+	("inc", ACCUMULATOR, None), # 1A
+	("tas", IMPLIED, None), # 1B
+	("trb", ABS_LOOKUP, None), # 1C
+	("ora", ABS_IND_X, None), # 1D
+	("asl", ABS_IND_X, None), # 1E
+	("ora", ABS_LONG_IND_X, None), # 1F
+	("jsr", JMP_ABS, None), # 20
+	("and", DIR_PAGE_IND_INDIR_X, None), # 21
+	("jsl", JMP_ABS_LONG, None), # 22
+	("and", STACK_REL, None), # 23
+	("bit", DIR_PAGE, None), # 24
+	("and", DIR_PAGE, None), # 25
+	("rol", DIR_PAGE, None), # 26
+	("and", DIR_PAGE_INDIR_LONG, None), # 27
+	("plp", IMPLIED, None), # 28
+	("and", IMMEDIATE, None), # 29
+	("rol", ACCUMULATOR, None), # 2A
+	("pld", IMPLIED, None), # 2B
+	("bit", ABS, None), # 2C
+	("and", ABS, None), # 2D
+	("rol", ABS_LOOKUP, None), # 2E
+	("and", ABS_LONG_LOOKUP, None), # 2F
+	("bmi", BRANCH, None), # 30
+	("and", DIR_PAGE_IND_INDIR_Y, None), # 31
+	("and", DIR_PAGE_INDIR, None), # 32
+	("and", STACK_REL_INDIR_Y, None), # 33
+	("bit", DIR_PAGE_IND_X, None), # 34
+	("and", DIR_PAGE_IND_X, None), # 35
+	("rol", DIR_PAGE_IND_X, None), # 36
+	("and", DIR_PAGE_INDIR_LONG_Y, None), # 37
+	("sec", IMPLIED, 'Set carry'), # 38
+	("and", ABS_IND_Y, None), # 39
+	("dec", ACCUMULATOR, None), # 3A
+	("tsa", IMPLIED, None), # 3B
+	("bit", ABS_IND_X, None), # 3C
+	("and", ABS_IND_X, None), # 3D
+	("rol", ABS_IND_X, None), # 3E
+	("and", ABS_LONG_IND_X, None), # 3F
+	("rti", RETURN, None), # 40
+	("eor", DIR_PAGE_IND_INDIR_X, None), # 41
+	("wdm", WDM, None), # 42
+	("eor", STACK_REL, None), # 43
+	("mvp", BLOCK_MOVE, None), # 44
+	("eor", DIR_PAGE, None), # 45
+	("lsr", DIR_PAGE, None), # 46
+	("eor", DIR_PAGE_INDIR_LONG, None), # 47
+	("pha", IMPLIED, None), # 48
+	("eor", IMMEDIATE, None), # 49
+	("lsr", ACCUMULATOR, None), # 4A
+	("phk", IMPLIED, None), # 4B
+	("jmp", JMP_ABS, None), # 4C
+	("eor", ABS_LOOKUP, None), # 4D
+	("lsr", ABS_LOOKUP, None), # 4E
+	("eor", ABS_LONG_LOOKUP, None), # 4F
+	("bvc", BRANCH, None), # 50
+	("eor", DIR_PAGE_IND_INDIR_Y, None), # 51
+	("eor", DIR_PAGE_INDIR, None), # 52
+	("eor", STACK_REL_INDIR_Y, None), # 53
+	("mvn", BLOCK_MOVE, None), # 54
+	("eor", DIR_PAGE_IND_X, None), # 55
+	("lsr", DIR_PAGE_IND_X, None), # 56
+	("eor", DIR_PAGE_INDIR_LONG_Y, None), # 57
+	("cli", IMPLIED, 'Clear interupt'), # 58
+	("eor", ABS_IND_Y, None), # 59
+	("phy", IMPLIED, None), # 5A
+	("tad", IMPLIED, None), # 5B
+	("jmp", JMP_ABS_LONG, None), # 5C
+	("eor", ABS_IND_X, None), # 5D
+	("lsr", ABS_IND_X, None), # 5E
+	("eor", ABS_LONG_IND_X, None), # 5F
+	("rts", RETURN, None), # 60
+	("adc", DIR_PAGE_IND_INDIR_X, None), # 61
+	("per", PC_REL_LONG, None), # 62
+	("adc", STACK_REL, None), # 63
+	("stz", DIR_PAGE, None), # 64
+	("adc", DIR_PAGE, None), # 65
+	("ror", DIR_PAGE, None), # 66
+	("adc", DIR_PAGE_INDIR_LONG, None), # 67
+	("pla", IMPLIED, None), # 68
+	("adc", IMMEDIATE, None), # 69
+	("ror", ACCUMULATOR, None), # 6A
+	("rtl", RETURN, None), # 6B
+	("jmp", ABS_INDIR, None), # 6C
+	("adc", ABS, None), # 6D
+	("ror", ABS_LOOKUP, None), # 6E
+	("adc", ABS_LONG_LOOKUP, None), # 6F
+	("bvs", BRANCH, None), # 70
+	("adc", DIR_PAGE_IND_INDIR_Y, None), # 71
+	("adc", DIR_PAGE_INDIR, None), # 72
+	("adc", STACK_REL_INDIR_Y, None), # 73
+	("stz", DIR_PAGE_IND_X, None), # 74
+	("adc", DIR_PAGE_IND_X, None), # 75
+	("ror", DIR_PAGE_IND_X, None), # 76
+	("adc", DIR_PAGE_INDIR_LONG_Y, None), # 77
+	("sei", IMPLIED, 'Disable interrupts'), # 78
+	("adc", ABS_IND_Y, None), # 79
+	("ply", IMPLIED, None), # 7A
+	("tda", IMPLIED, None), # 7B
+	("jmp", ABS_IND_INDIR, None), # 7C
+	("adc", ABS_IND_X, None), # 7D
+	("ror", ABS_IND_X, None), # 7E
+	("adc", ABS_LONG_IND_X, None), # 7F
+	("bra", BRANCH, None), # 80
+	("sta", DIR_PAGE_IND_INDIR_X, None), # 81
+	("brl", PC_REL_LONG, None), # 82
+	("sta", STACK_REL, None), # 83
+	("sty", DIR_PAGE, None), # 84
+	("sta", DIR_PAGE, None), # 85
+	("stx", DIR_PAGE, None), # 86
+	("sta", DIR_PAGE_INDIR_LONG, None), # 87
+	("dey", IMPLIED, None), # 88
+	("bit", IMMEDIATE, None), # 89
+	("txa", IMPLIED, None), # 8A
+	("phb", IMPLIED, None), # 8B
+	("sty", ABS_LOOKUP, None), # 8C
+	("sta", ABS_LOOKUP, None), # 8D
+	("stx", ABS_LOOKUP, None), # 8E
+	("sta", ABS_LONG_LOOKUP, None), # 8F
+	("bcc", BRANCH, None), # 90
+	("sta", DIR_PAGE_IND_INDIR_Y, None), # 91
+	("sta", DIR_PAGE_INDIR, None), # 92
+	("sta", STACK_REL_INDIR_Y, None), # 93
+	("sty", DIR_PAGE_IND_X, None), # 94
+	("sta", DIR_PAGE_IND_X, None), # 95
+	("stx", DIR_PAGE_IND_Y, None), # 96
+	("sta", DIR_PAGE_INDIR_LONG_Y, None), # 97
+	("tya", IMPLIED, None), # 98
+	("sta", ABS_IND_Y, None), # 99
+	("txs", IMPLIED, None), # 9A
+	("txy", IMPLIED, None), # 9B
+	("stz", ABS_LOOKUP, None), # 9C
+	("sta", ABS_IND_X, None), # 9D
+	("stz", ABS_IND_X, None), # 9E
+	("sta", ABS_LONG_IND_X, None), # 9F
+	("ldy", IMMEDIATE_IND, None), # A0
+	("lda", DIR_PAGE_IND_INDIR_X, None), # A1
+	("ldx", IMMEDIATE_IND, None), # A2
+	("lda", STACK_REL, None), # A3
+	("ldy", DIR_PAGE, None), # A4
+	("lda", DIR_PAGE, None), # A5
+	("ldx", DIR_PAGE, None), # A6
+	("lda", DIR_PAGE_INDIR_LONG, None), # A7
+	("tay", IMPLIED, None), # A8
+	("lda", IMMEDIATE, None), # A9
+	("tax", IMPLIED, None), # AA
+	("plb", IMPLIED, None), # AB
+	("ldy", ABS_LOOKUP, None), # AC
+	("lda", ABS_LOOKUP, None), # AD
+	("ldx", ABS_LOOKUP, None), # AE
+	("lda", ABS_LONG_LOOKUP, None), # AF
+	("bcs", BRANCH, None), # B0
+	("lda", DIR_PAGE_IND_INDIR_Y, None), # B1
+	("lda", DIR_PAGE_INDIR, None), # B2
+	("lda", STACK_REL_INDIR_Y, None), # B3
+	("ldy", DIR_PAGE_IND_X, None), # B4
+	("lda", DIR_PAGE_IND_X, None), # B5
+	("ldx", DIR_PAGE_IND_Y, None), # B6
+	("lda", DIR_PAGE_INDIR_LONG_Y, None), # B7
+	("clv", IMPLIED, 'Clear overflow'), # B8
+	("lda", ABS_IND_Y, None), # B9
+	("tsx", IMPLIED, None), # BA
+	("tyx", IMPLIED, None), # BB
+	("ldy", ABS_IND_X, None), # BC
+	("lda", ABS_IND_X, None), # BD
+	("ldx", ABS_IND_Y, None), # BE
+	("lda", ABS_LONG_IND_X, None), # BF
+	("cpy", IMMEDIATE_IND, None), # C0
+	("cmp", DIR_PAGE_IND_INDIR_X, None), # C1
+	("rep", REP, None), # C2
+	("cmp", STACK_REL, None), # C3
+	("cpy", DIR_PAGE, None), # C4
+	("cmp", DIR_PAGE, None), # C5
+	("dec", DIR_PAGE, None), # C6
+	("cmp", DIR_PAGE_INDIR_LONG, None), # C7
+	("iny", IMPLIED, None), # C8
+	("cmp", IMMEDIATE, None), # C9
+	("dex", IMPLIED, None), # CA
+	("wai", IMPLIED, None), # CB
+	("cpy", ABS_LOOKUP, None), # CC
+	("cmp", ABS, None), # CD
+	("dec", ABS_LOOKUP, None), # CE
+	("cmp", ABS_LONG_LOOKUP, None), # CF
+	("bne", BRANCH, None), # D0
+	("cmp", DIR_PAGE_IND_INDIR_Y, None), # D1
+	("cmp", DIR_PAGE_INDIR, None), # D2
+	("cmp", STACK_REL_INDIR_Y, None), # D3
+	("pei", DIR_PAGE_INDIR, None), # D4
+	("cmp", DIR_PAGE_IND_X, None), # D5
+	("dec", DIR_PAGE_IND_X, None), # D6
+	("cmp", DIR_PAGE_INDIR_LONG_Y, None), # D7
+	("cld", IMPLIED, 'Clear decimal'), # D8
+	("cmp", ABS_IND_Y, None), # D9
+	("phx", IMPLIED, None), # DA
+	("stp", IMPLIED, None), # DB
+	("jmp.w", ABS_INDIR_LONG, None), # DC
+	("cmp", ABS_IND_X, None), # DD
+	("dec", ABS_IND_X, None), # DE
+	("cmp", ABS_LONG_IND_X, None), # DF
+	("cpx", IMMEDIATE_IND, None), # E0
+	("sbc", DIR_PAGE_IND_INDIR_X, None), # E1
+	("sep", SEP, None), # E2
+	("sbc", STACK_REL, None), # E3
+	("cpx", DIR_PAGE, None), # E4
+	("sbc", DIR_PAGE, None), # E5
+	("inc", DIR_PAGE, None), # E6
+	("sbc", DIR_PAGE_INDIR_LONG, None), # E7
+	("inx", IMPLIED, None), # E8
+	("sbc", IMMEDIATE, None), # E9
+	("nop", IMPLIED, None), # EA
+	("xba", IMPLIED, None), # EB
+	("cpx", ABS_LOOKUP, None), # EC
+	("sbc", ABS_LOOKUP, None), # ED
+	("inc", ABS_LOOKUP, None), # EE
+	("sbc", ABS_LONG_LOOKUP, None), # EF
+	("beq", BRANCH, None), # F0
+	("sbc", DIR_PAGE_IND_INDIR_Y, None), # F1
+	("sbc", DIR_PAGE_INDIR, None), # F2
+	("sbc", STACK_REL_INDIR_Y, None), # F3
+	("pea", ABS, None), # F4
+	("sbc", DIR_PAGE_IND_X, None), # F5
+	("inc", DIR_PAGE_IND_X, None), # F6
+	("sbc", DIR_PAGE_INDIR_LONG_Y, None), # F7
+	("sed", IMPLIED, 'Set decimal'), # F8
+	("sbc", ABS_IND_Y, None), # F9
+	("plx", IMPLIED, None), # FA
+	("xce", IMPLIED, 'Exchange carry bit to set emulation or native mode'), # FB
+	("jsr", ABS_IND_INDIR, None), # FC
+	("sbc", ABS_IND_X, None), # FD
+	("inc", ABS_IND_X, None), # FE
+	("sbc", ABS_LONG_IND_X, None), # FF
+]
+
+def _opcode_sizes(acc16, ind16):
+	sizes = list(InstructionSizes)
+	for op in range(256):
+		mode = OpcodeTable[op][1]
+		if (acc16 and mode == IMMEDIATE) or (ind16 and mode == IMMEDIATE_IND):
+			sizes[op] += 1
+	return sizes
+
+# Instruction sizes indexed by the index/accumulator flag bits (flags >> 4 & 3) and opcode
+OpcodeSizes = [_opcode_sizes(not flag_bits & 2, not flag_bits & 1) for flag_bits in range(4)]
+
 # Static Regions of memory 
 # Format: Address: ["Symbol", "Comment"]
 StaticAddresses = {
@@ -222,48 +553,75 @@ StaticAddresses = {
 
 class Disassembler:
 
+	# Code map byte encoding
+	# bit 0: opcode, bit 1: operand, bit 4: 8-bit index, bit 5: 8-bit accumulator
 	NO_CODE = 0
 	OP_CODE = 1
 	OP_PARAM = 2
 	OP_IND16 = 0x10
 	OP_ACC16 = 0x20
+	OP_FLAGS = OP_IND16 | OP_ACC16
+
+	# Operand fill patterns indexed by instruction size
+	PARAM_FILL = [b'', b'', b'\x02', b'\x02\x02', b'\x02\x02\x02']
 
 	def __init__(self, cart, options={}):
 		self.cart = cart
 		self.options = options
 		self.pos = 0
 		self.flags = 0
-		self.op_func = [getattr(self, 'op%02X' % op) for op in range(256)]
-		self.code_map = [self.NO_CODE] * self.cart.size()
+		self.code_map = bytearray(self.cart.size())
 		self.code_labels = dict()
 		self.code_label_bank_aliases = dict()
 		self.data_labels = dict()
 		self.variables = dict()
 		self.code = OrderedDictRange()
 		self.decoders = RangeTree()
+		self.decoder_mask = None
 		self.support_decoders = []
 		self.hex_comment = bool(self.options.hex)
 		self.no_label = bool(self.options.nolabel)
 		self.code_banks = []
+		self.trace_nodes = 0
+		self.jobs = getattr(self.options, 'jobs', None) or 1
+		self.cache = None
+		self.code_cached = False
+		self.decoder_jobs = None
+		self.bank_plan = dict()
+		self.stats = Stats()
 
 	def run(self):
 		print("Disassembling...")
 
-		self.run_decoders()
+		with self.stats.phase('decoders'):
+			self.run_decoders()
 
 		self.mark_vectors()
 
-		self.find_valid_code_paths()
+		# Restore the code analysis of an unchanged rom and configuration
+		if self.cache and self.cache.load_analysis(self):
+			return
+
+		with self.stats.phase('trace'):
+			self.find_valid_code_paths()
 
 		if self.code_banks:
+			banks = []
 			for b in self.code_banks:
 				if b < self.cart.bank_count():
-					self.decode_bank(b)
+					banks.append(b)
 				else:
 					print("Invalid bank %d" % b)
-			self.fill_data_banks()
+			with self.stats.phase('decode banks'):
+				self.decode_banks(banks)
+			with self.stats.phase('fill data banks'):
+				self.fill_data_banks()
 		else:
-			self.auto_run()
+			with self.stats.phase('decode banks'):
+				self.auto_run()
+
+		if self.cache:
+			self.cache.save_analysis(self)
 
 	def add_decoder(self, decoder):
 		if decoder.no_data():
@@ -275,8 +633,26 @@ class Disassembler:
 		if decoder.end > self.cart.size() or decoder.start > self.cart.size():
 			raise ValueError("Decoder %s has an invalid range with between 0x%06X-0x%06X" % (decoder.label, decoder.start, decoder.end))
 		self.decoders.add(decoder.start, decoder.end, decoder)
+		self.decoder_mask = None
+
+	def decoder_coverage(self):
+		"""
+		Returns the precomputed decoder coverage for the whole rom
+		"""
+		if self.decoder_mask == None:
+			self.decoder_mask = RangeMask(self.decoders, self.cart.size())
+		return self.decoder_mask
 
 	def run_decoders(self):
+		if self.cache:
+			self.cache.prepare_decoders(self.decoders.items())
+
+		order = self.decoder_order()
+		components = self.decoder_components(order)
+		if self.use_pool(len(components)):
+			self.run_decoders_pool(order, components)
+			return
+
 		for decoder in self.decoders.items():
 			# Process sub decoders
 			for sub in decoder.sub_decoders:
@@ -288,14 +664,94 @@ class Disassembler:
 			self.run_sub_decoder(sub_dec)
 		self.process_decoder(decoder)
 
+	def decoder_order(self):
+		"""
+		Decoders in the order run_decoders processes them, sub decoders first
+		"""
+		order = []
+		seen = set()
+		stack = [(decoder, False) for decoder in reversed(self.decoders.items())]
+		while stack:
+			decoder, expanded = stack.pop()
+			if expanded:
+				if id(decoder) not in seen:
+					seen.add(id(decoder))
+					order.append(decoder)
+				continue
+			stack.append((decoder, True))
+			for sub in reversed(decoder.sub_decoders):
+				stack.append((sub, False))
+		return order
+
+	def decoder_components(self, order):
+		"""
+		Group decoders connected by sub decoders or parameter references.
+		Groups are independent and listed by position in the run order.
+		"""
+		index = {id(decoder): i for i, decoder in enumerate(order)}
+		parent = list(range(len(order)))
+
+		def root(i):
+			while parent[i] != i:
+				parent[i] = parent[parent[i]]
+				i = parent[i]
+			return i
+
+		for i, decoder in enumerate(order):
+			for ref in decoder.references():
+				j = index.get(id(ref))
+				if j != None:
+					a, b = root(i), root(j)
+					parent[max(a, b)] = min(a, b)
+
+		components = {}
+		for i in range(len(order)):
+			components.setdefault(root(i), []).append(i)
+		return [components[r] for r in sorted(components)]
+
+	def run_decoders_pool(self, order, components):
+		"""
+		Decode independent decoder groups on the pool and merge the results
+		in run order
+		"""
+		self.decoder_jobs = order
+		results = {}
+		for code, states, hits, misses in self.pool_map(_decoder_group_job, components):
+			results.update(code)
+			for i, state in states:
+				order[i].restore(state)
+			if self.cache:
+				self.cache.hits += hits
+				self.cache.misses += misses
+		self.decoder_jobs = None
+
+		for i, decoder in enumerate(order):
+			self.apply_decoder(decoder, results[i])
+
 	def process_decoder(self, decoder):
 		if decoder.processed: return
-		data = self.cart[decoder.start:decoder.end]
-		for pos, instr in decoder.decode(data):
-			pos += decoder.start
+		with self.stats.phase('decoder %s' % decoder.label):
+			self.apply_decoder(decoder, self.decoder_code(decoder))
+
+	def decoder_code(self, decoder):
+		"""
+		Decode the rom range of a decoder into positioned instructions
+		"""
+		code = self.cache.load_decoder(decoder) if self.cache else None
+		if code == None:
+			data = self.cart[decoder.start:decoder.end]
+			code = [(pos + decoder.start, instr) for pos, instr in decoder.decode(data)]
+			if self.cache:
+				self.cache.save_decoder(decoder, code)
+		return code
+
+	def apply_decoder(self, decoder, code):
+		for pos, instr in code:
 			if instr.has_label():
 				self.data_labels[self.cart.address(pos)] = instr.preamble[:-1]
 			self.code[pos] = instr
+		if self.cache:
+			self.cache.track_decoder(decoder, code)
 		decoder.processed = True
 
 	def get_compress_targets(self):
@@ -318,8 +774,26 @@ class Disassembler:
 				self.label_name(addr)
 
 	def auto_run(self):
-		for bank in range(0, self.cart.bank_count()):
-			self.decode_bank(bank)
+		self.decode_banks(list(range(0, self.cart.bank_count())))
+
+	def use_pool(self, count):
+		return self.jobs > 1 and count > 1 and 'fork' in multiprocessing.get_all_start_methods()
+
+	def pool_map(self, func, items):
+		"""
+		Map a module level job function over items on a forked process pool.
+		Workers inherit the rom, code map and labels of this disassembler.
+		Results are yielded in item order.
+		"""
+		global _pool_disasm
+		_pool_disasm = self
+		try:
+			context = multiprocessing.get_context('fork')
+			with context.Pool(min(self.jobs, len(items))) as pool:
+				for result in pool.imap(func, items):
+					yield result
+		finally:
+			_pool_disasm = None
 
 	def find_bank_labels(self, start, end):
 		# Find existing labels inside bank
@@ -348,27 +822,15 @@ class Disassembler:
 				self.find_valid_code(end)
 		# Dynamic code analysis
 		else:
-			# Emulated vectors
-			evec_reset = self.cart.index(self.cart.evec_reset)
-			self.find_valid_code_recursive(evec_reset)
-
-			evec_nmi = self.cart.index(self.cart.evec_nmi)
-			self.find_valid_code_recursive(evec_nmi)
-
-			evec_irq = self.cart.index(self.cart.evec_irq)
-			self.find_valid_code_recursive(evec_irq)
-
-			# Native vectors
-			nvec_nmi = self.cart.index(self.cart.nvec_nmi)
-			self.find_valid_code_recursive(nvec_nmi)
-
-			nvec_irq = self.cart.index(self.cart.nvec_irq)
-			self.find_valid_code_recursive(nvec_irq)
+			# Emulated and native vectors
+			vectors = [self.cart.evec_reset, self.cart.evec_nmi, self.cart.evec_irq, self.cart.nvec_nmi, self.cart.nvec_irq]
+			for index in self.cart.indexes(vectors):
+				self.trace_nodes += self.trace_code(index)
 
 			# Search for remaining code in config provided labels
 			for addr in self.code_labels.copy():
 				if addr < len(self.code_map) and not self.code_map[addr]:
-					self.find_valid_code_recursive(addr)
+					self.trace_nodes += self.trace_code(addr)
 
 		# Reset state
 		self.pos = 0
@@ -376,18 +838,19 @@ class Disassembler:
 
 	def mark_code(self, pos, size):
 		# Mark as valid code and set include Accumulator with Index status flags
-		self.code_map[pos] = self.OP_CODE | (self.flags & 0x30)
-		# Mark opcode parameters
-		for i in range(pos+1, pos+size):
-			self.code_map[i] = self.OP_PARAM
+		self.code_map[pos] = self.OP_CODE | (self.flags & self.OP_FLAGS)
+		# Mark opcode parameters without growing the map past the rom end
+		end = min(pos + size, len(self.code_map))
+		self.code_map[pos+1:end] = self.PARAM_FILL[size][:end-pos-1]
 
 	def find_valid_code(self, end):
+		decoders = self.decoder_coverage()
 		while self.pos < end:
 			op = self.cart[self.pos]
 			opSize = self.opSize(op)
 
 			# Detect decoders and skip over them
-			decoder = self.decoders.intersects(self.pos, self.pos + opSize)
+			decoder = decoders.intersects(self.pos, self.pos + opSize)
 			if decoder:
 				self.pos = decoder.end
 				continue
@@ -397,107 +860,119 @@ class Disassembler:
 
 			# Follow flag changes
 			if op == 0xC2:
-				self.opC2()
+				self.flags = self.flags & (~self.pipe8())
 			elif op == 0xE2:
-				self.opE2()
+				self.flags = self.flags | self.pipe8()
 			# Return instructions - stop scanning to avoid disassembling padding/data after functions
 			elif op == 0x40 or op == 0x6B or op == 0x60:  # rti, rtl, rts
 				self.pos = self.pos + opSize
 				break
 			self.pos = self.pos + opSize
 
-	def find_valid_code_recursive(self, start):
+	def trace_code(self, start):
+		"""
+		Trace reachable code from a rom position using an explicit worklist.
+		Each entry is a (position, flags) state which is only visited once.
+		Branch targets are traced before resuming the fall through path
+		so the code map is marked in the same depth first order.
+		Returns the number of worklist nodes visited.
+		"""
 		if start == -1:
-			return
+			return 0
 
-		self.pos = start
-		end = self.cart.bank_end(start)
+		decoders = self.decoder_coverage()
+		visited = set()
+		worklist = [(start, self.flags, self.cart.bank_end(start))]
 
-		while self.pos < end:
-			op = self.cart[self.pos]
-			opSize = self.opSize(op)
-
-			# Detect decoders and skip over them
-			decoder = self.decoders.intersects(self.pos, self.pos + opSize)
-			if decoder:
-				self.pos = decoder.end
+		while worklist:
+			state = worklist.pop()
+			self.pos, self.flags, end = state
+			if state in visited:
 				continue
+			visited.add(state)
 
-			# Skip code already processed
-			if self.code_map[self.pos]:
-				break
+			while self.pos < end:
+				op = self.cart[self.pos]
+				opSize = self.opSize(op)
 
-			# Mark each opcode's address
-			self.mark_code(self.pos, opSize)
+				# Detect decoders and skip over them
+				decoder = decoders.intersects(self.pos, self.pos + opSize)
+				if decoder:
+					self.pos = decoder.end
+					continue
 
-			# Follow flag changes
-			if op == 0xC2:
-				self.opC2()
-			elif op == 0xE2:
-				self.opE2()
-			# jmp and jsr absolute long
-			elif op == 0x5C or op == 0x22:
-				address = self.pipe24()
-				index = self.cart.index(address)
-				self.follow_branch(index)
-				# jmp does not return
-				if op == 0x5C:
+				# Skip code already processed
+				if self.code_map[self.pos]:
 					break
-			# jmp absolute
-			elif op == 0x4C or op == 0x20:
-				pipe = self.pipe16()
-				if self.cart.hirom:
-					index = (self.pos & 0xFF0000) | pipe
-				else:
-					address = (self.pos << 1 & 0xFF0000 ) | pipe
+
+				# Mark each opcode's address
+				self.mark_code(self.pos, opSize)
+
+				index = -1
+				resume = True
+
+				# Follow flag changes
+				if op == 0xC2:
+					self.flags = self.flags & (~self.pipe8())
+				elif op == 0xE2:
+					self.flags = self.flags | self.pipe8()
+				# jmp and jsr absolute long
+				elif op == 0x5C or op == 0x22:
+					address = self.pipe24()
 					index = self.cart.index(address)
-				self.follow_branch(index)
-				if op == 0x4C:
+					# jmp does not return
+					resume = op != 0x5C
+				# jmp absolute
+				elif op == 0x4C or op == 0x20:
+					pipe = self.pipe16()
+					if self.cart.hirom:
+						index = (self.pos & 0xFF0000) | pipe
+					else:
+						address = (self.pos << 1 & 0xFF0000 ) | pipe
+						index = self.cart.index(address)
+					resume = op != 0x4C
+				# BRL - Branch Long
+				elif op == 0x82:
+					pipe = self.pipe16_signed()
+					if self.cart.hirom:
+						index = (self.pos & 0xFF0000 ) | ((self.pos + pipe + 3) & 0xFFFF)
+					else:
+						address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + 3)
+						index = self.cart.index(address)
+					resume = False
+				# Branch
+				elif self.is_branch(op):
+					pipe = self.pipe8_signed()
+					if self.cart.hirom:
+						index = (self.pos & 0xFF0000 ) | ((self.pos + pipe + 2) & 0xFFFF)
+					else:
+						address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + 2)
+						index = self.cart.index(address)
+					# BRA doesn't return
+					resume = op != 0x80
+				# STP
+				elif op == 0xDB:
+					self.pos = self.pos + opSize
+					break
+				# Return and end decode
+				elif op == 0x40 or op == 0x6B or op == 0x60:
+					self.pos = self.pos + opSize
 					break
 
-			# BRL - Branch Long
-			elif op == 0x82:
-				pipe = self.pipe16_signed()
-				if self.cart.hirom:
-					index = (self.pos & 0xFF0000 ) | ((self.pos + pipe + 3) & 0xFFFF)
-				else:
-					address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + 3)
-					index = self.cart.index(address)
-				self.follow_branch(index)
-				if op == 0x82:
+				# Queue unvisited branch target ahead of the fall through path
+				if index >= 0 and index not in self.code_labels:
+					self.label_name(index)
+					if resume:
+						worklist.append((self.pos + opSize, self.flags, end))
+					worklist.append((index, self.flags, self.cart.bank_end(index)))
 					break
 
-			# Branch
-			elif self.is_branch(op):
-				pipe = self.pipe8_signed()
-				if self.cart.hirom:
-					index = (self.pos & 0xFF0000 ) | ((self.pos + pipe + 2) & 0xFFFF)
-				else:
-					address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + 2)
-					index = self.cart.index(address)
-	
-				self.follow_branch(index)
-				# BRA doesn't return
-				if op == 0x80:
+				if not resume:
 					break
-			# STP
-			elif op == 0xDB:
-				self.pos = self.pos + opSize
-				break
-			# Return and end decode
-			elif op == 0x40 or op == 0x6B or op == 0x60:
+
 				self.pos = self.pos + opSize
-				break
-			self.pos = self.pos + opSize
 
-	def follow_branch(self, index):
-		if index >= 0 and index not in self.code_labels:
-			self.label_name(index)
-			pos = self.pos
-			flags = self.flags
-			self.find_valid_code_recursive(index)
-			self.pos = pos
-			self.flags = flags
+		return len(visited)
 
 	def get_bank_end(self, bank):
 		"""Get the end address for a bank, excluding the header area if present."""
@@ -513,128 +988,226 @@ class Disassembler:
 
 		return end
 
-	def decode_bank(self, bank):
-
+	def bank_sections(self, bank):
 		start = self.cart.bank_size() * bank
 		end = self.get_bank_end(bank)
 
-		# Decode sections in bank
+		# Split bank into sections at labels
+		sections = []
 		pos = start
 		for label in self.find_bank_labels(start, end):
-			self.decode(pos, label)
+			sections.append((pos, label))
 			pos = label
-		self.decode(pos, end)
-	
-	def decode(self, start, end):
-		self.pos = start
-		while self.pos < end:
-			op = self.cart[self.pos]
+		sections.append((pos, end))
+		return sections
+
+	def decode_bank(self, bank):
+		sections = self.bank_sections(bank)
+		self.bank_plan[bank] = (sections, self.flags)
+		for start, end in sections:
+			self.decode(start, end)
+
+	def restore_bank(self, bank):
+		"""
+		Decode a bank again from its recorded sections and starting flags
+		"""
+		plan = self.bank_plan.get(bank)
+		if plan == None:
+			self.fill_data_bank(bank)
+			return
+		sections, self.flags = plan
+		for start, end in sections:
+			self.decode(start, end)
+
+	def decode_banks(self, banks):
+		if not self.use_pool(len(banks)):
+			for bank in banks:
+				with self.stats.phase('bank %d' % bank):
+					self.decode_bank(bank)
+			return
+
+		# Scan banks in order to settle the flags and labels each bank starts
+		# with, then decode the banks independently on the pool
+		jobs = []
+		for bank in banks:
+			sections = self.bank_sections(bank)
+			jobs.append((sections, self.flags))
+			self.bank_plan[bank] = (sections, self.flags)
+			for start, end in sections:
+				self.decode(start, end, scan=True)
+
+		for code in self.pool_map(_decode_bank_job, jobs):
+			decoded = 0
+			for pos, instr in code:
+				self.code[pos] = instr
+				if isinstance(instr, OpcodeRecord):
+					decoded += 1
+			self.stats.count('instructions', decoded)
+
+	def decode(self, start, end, scan=False):
+		"""
+		Decode instructions between rom positions. Opcodes are stored as
+		records and rendered by render_op. When scanning only the flag and
+		label side effects are applied and no code is output.
+		"""
+		decoders = self.decoder_coverage()
+		decoder_dist = decoders.dist
+		data = self.cart.data
+		code_map = self.code_map
+		code = self.code
+		op_sizes = OpcodeSizes
+		page_address = self.cart.page_address
+		decoded = 0
+		pos = start
+		while pos < end:
+			op = data[pos]
 
 			# If code was mapped then pull in status registers
-			code_status = self.code_map[self.pos]
+			code_status = code_map[pos]
 			if code_status != 0:
-				self.flags = code_status & 0x30
+				self.flags = code_status & self.OP_FLAGS
 			# Skip bytes that weren't marked as code (e.g., padding after functions)
 			elif self.code_banks:  # Only skip when using explicit bank mode
-				self.pos += 1
+				pos += 1
 				continue
 
-			op_size = self.opSize(op)
+			op_size = op_sizes[(self.flags >> 4) & 3][op]
 
 			# If intersects decoder
-			decoder = self.decoders.intersects(self.pos, self.pos + op_size)
+			if decoder_dist[pos] >= op_size:
+				decoder = None
+			else:
+				decoder = decoders.intersects(pos, pos + op_size)
 
 			if decoder:
 				# Check if the last opcode intersected with decoder
-				if self.pos < decoder.start:
-					self.code[self.pos] = self.ins('.db ' + ', '.join(("$%02X" % x) for x in self.cart[self.pos : decoder.start]), comment = 'Opcode overrunning decoder')
-					self.pos = decoder.end
-				elif self.pos + op_size > decoder.end:
-					data_end = self.pos + op_size
+				if pos < decoder.start:
+					if not scan:
+						code[pos] = self.ins('.db ' + hexfmt.hex_text(data[pos:decoder.start]), comment = 'Opcode overrunning decoder')
+					pos = decoder.end
+				elif pos + op_size > decoder.end:
+					data_end = pos + op_size
 					if data_end > end:
 						data_end = end
-					if decoder.end + 1 < data_end:
-						self.code[self.pos] = self.ins('.db ' + ', '.join(("$%02X" % x) for x in self.cart[decoder.end + 1: data_end]), comment = 'Opcode overrunning decoder')
-					self.pos = data_end
+					if decoder.end + 1 < data_end and not scan:
+						code[pos] = self.ins('.db ' + hexfmt.hex_text(data[decoder.end + 1:data_end]), comment = 'Opcode overrunning decoder')
+					pos = data_end
 				else:
-					self.pos = decoder.end
+					pos = decoder.end
 				continue
 			# If opcode overruns bank boundry
-			elif (self.cart.address(self.pos) & 0xFFFF) + op_size > 0xFFFF:
-				self.code[self.pos] = self.ins(".db $%02X" % op, comment = "Opcode %02X overrunning bank boundry at %06X. Skipping." % (op, self.pos))
-				self.pos = self.pos + 1
+			elif ((page_address[pos >> 15] + (pos & 0x7FFF)) & 0xFFFF) + op_size > 0xFFFF:
+				if not scan:
+					code[pos] = self.ins(".db $%02X" % op, comment = "Opcode %02X overrunning bank boundry at %06X. Skipping." % (op, pos))
+				pos = pos + 1
 				continue
-			elif self.pos + op_size > end:
-				self.code[self.pos] = self.ins(".db $%02X" % op, comment = "Opcode overrunning section")
-				self.pos = self.pos + 1
+			elif pos + op_size > end:
+				if not scan:
+					code[pos] = self.ins(".db $%02X" % op, comment = "Opcode overrunning section")
+				pos = pos + 1
 				continue
 
-			# Decode op codes	
-			func = self.op_func[op]
-			ins = func()
+			# Record the opcode for rendering when the bank is written
+			if not scan:
+				code[pos] = OpcodeRecord(pos, self.flags)
+				decoded += 1
 
-			valid_code = bool(code_status & self.OP_CODE)
+			self.pos = pos
+			self.follow_op(op)
+			pos = pos + op_size
+
+		self.pos = pos
+		if decoded:
+			self.stats.count('instructions', decoded)
+
+	def follow_op(self, op):
+		"""
+		Apply the flag and label changes formatting the opcode at the
+		current position would make
+		"""
+		mode = OpcodeTable[op][1]
+		if mode == REP:
+			self.flags = self.flags & (~self.pipe8())
+			return
+		elif mode == SEP:
+			self.flags = self.flags | self.pipe8()
+			return
 
-			if self.hex_comment or not valid_code:
-				if op_size == 1:
-					ins.comment = "%02X" % op
-				elif op_size == 2:
-					ins.comment = "%02X %02X" % (op, self.cart[self.pos + 1])
-				elif op_size == 3:
-					ins.comment = "%02X %02X %02X" % (op, self.cart[self.pos + 1], self.cart[self.pos + 2])
-				elif op_size == 4:
-					ins.comment = "%02X %02X %02X %02X" % (op, self.cart[self.pos + 1], self.cart[self.pos + 2], self.cart[self.pos + 3])
+		if self.no_label:
+			return
 
-			self.code[self.pos] = ins
-			self.pos = self.pos + op_size
+		if mode == BRANCH:
+			index = self.branch_index(self.pipe8_signed(), 2)
+		elif mode == PC_REL_LONG:
+			index = self.branch_index(self.pipe16_signed(), 3)
+		elif mode == JMP_ABS:
+			index = self.jmp_abs_index(self.pipe16())
+		elif mode == JMP_ABS_LONG:
+			pipe = self.pipe24()
+			index = self.cart.index(pipe)
+			if index != -1 and self.valid_label(index):
+				self.long_label(pipe, index)
+			return
+		else:
+			return
+
+		if self.valid_label(index):
+			self.label_name(index)
 
 	def fill_data_banks(self):
-		for bank in range(0, self.cart.bank_count()):
-			if bank in self.code_banks:
-				continue
-			self.pos = bank * self.cart.bank_size()
-			end = self.get_bank_end(bank)
+		banks = [bank for bank in range(0, self.cart.bank_count()) if bank not in self.code_banks]
+		if self.use_pool(len(banks)):
+			for code in self.pool_map(_fill_data_bank_job, banks):
+				for pos, instr in code:
+					self.code[pos] = instr
+		else:
+			for bank in banks:
+				with self.stats.phase('bank %d' % bank):
+					self.fill_data_bank(bank)
 
-			while self.pos < end:
-				decoder = self.decoders.intersects(self.pos, end)
-				if decoder != None:
-					if self.pos < decoder.start:
-						self.make_data(self.pos, decoder.start)
-					self.pos = decoder.end
-				else:
-					self.make_data(self.pos, end)
-					break
+	def fill_data_bank(self, bank):
+		decoders = self.decoder_coverage()
+		self.pos = bank * self.cart.bank_size()
+		end = self.get_bank_end(bank)
+
+		while self.pos < end:
+			decoder = decoders.intersects(self.pos, end)
+			if decoder != None:
+				if self.pos < decoder.start:
+					self.make_data(self.pos, decoder.start)
+				self.pos = decoder.end
+			else:
+				self.make_data(self.pos, end)
+				break
 
 	def make_data(self, start, end):
-		for y in range(start, end, 16):
-			line = '.db ' + ', '.join(("$%02X" % x) for x in self.cart[y : y+16])
-			self.code[y] = self.ins(line)
-		remaining = (end - start) % 16
-		if remaining != 0:
-			line = '.db ' + ', '.join(("$%02X" % x) for x in self.cart[end - remaining : end])
-			self.code[y] = self.ins(line)
+		for y, line in hexfmt.data_lines(self.cart[start:end]):
+			self.code[start + y] = self.ins(line)
 
 	def support_code(self):
-		code = []
+		return "".join(self.support_lines())
 
+	def support_lines(self):
+		"""
+		Yields the lines of the support code
+		"""
 		if self.variables:
 			for index, variable in sorted(self.variables.items()):
-				code.append(".define %s $%x\n" % (variable, index))
-			code.append("\n")
+				yield ".define %s $%x\n" % (variable, index)
+			yield "\n"
 
 		for dec in self.support_decoders:
 			for pos, instr in dec.decode(self.cart):
-				code.append(instr.text()+"\n")
-
-		# Ensure code is ordered
-		self.code.sort_keys()
-
-		return "".join(code)
+				yield instr.text() + "\n"
 
 	def bank_code(self, bank):
+		return "".join(self.bank_lines(bank))
 
-		code = []
-		code.append(".BANK %d SLOT 0\n.ORG $0000\n\n.SECTION \"Bank%d\" FORCE\n\n" % (bank, bank))
+	def bank_lines(self, bank):
+		"""
+		Yields the assembly lines of a bank
+		"""
+		yield ".BANK %d SLOT 0\n.ORG $0000\n\n.SECTION \"Bank%d\" FORCE\n\n" % (bank, bank)
 
 		addr = bank * self.cart.bank_size()
 		bank_end = self.get_bank_end(bank)
@@ -647,20 +1220,81 @@ class Disassembler:
 					for bank_alias in bank_set:
 						base = (bank_alias >> 16) & 0xE0
 						bank_label = bank_alias | (addr & 0xFFFF)
-						code.append(".BASE $%02X\nL%06X:\n" % (base, bank_label))
-					code.append(".BASE $00\n")
+						yield ".BASE $%02X\nL%06X:\n" % (base, bank_label)
+					yield ".BASE $00\n"
 				# Label
-				code.append("%s:\n" % self.code_labels[addr])
-			code.append(instr.text() + "\n")
-
-		code.append(".ENDS\n")
-		return "".join(code)
+				yield "%s:\n" % self.code_labels[addr]
+			if instr.__class__ is OpcodeRecord:
+				instr = self.render_op(instr)
+			yield instr.text() + "\n"
+
+		yield ".ENDS\n"
+
+	def banks_code(self, banks):
+		"""
+		Yields the assembly text for each bank in order
+		"""
+		for lines in self.banks_lines(banks):
+			yield "".join(lines)
+
+	def banks_lines(self, banks):
+		"""
+		Yields an iterable of assembly lines for each bank in order.
+		Serial banks are rendered lazily as the lines are consumed.
+		"""
+		if self.cache:
+			# Banks missing from the cache are rendered on the pool
+			missing = self.cache.missing_banks(self, banks) if self.use_pool(len(banks)) else []
+			if self.use_pool(len(missing)):
+				rendered = self.pool_map(_bank_code_job, missing)
+			else:
+				missing, rendered = [], None
+			for bank in banks:
+				if bank in missing:
+					text = next(rendered)
+					self.cache.misses += 1
+					self.cache.save_bank(self, bank, text)
+				else:
+					text = self.cache.bank_text(self, bank)
+				yield (text,)
+			if rendered:
+				rendered.close()
+		elif self.use_pool(len(banks)):
+			for code in self.pool_map(_bank_code_job, banks):
+				yield (code,)
+		else:
+			for bank in banks:
+				yield self.bank_lines(bank)
+
+	def count_stats(self):
+		"""
+		Record the code analysis counters of the run
+		"""
+		code_bytes = len(self.code_map) - self.code_map.count(0)
+		decoder_bytes = sum(decoder.end - decoder.start for decoder in self.decoders.items())
+		self.stats.set('code bytes', code_bytes)
+		self.stats.set('data bytes', self.cart.size() - code_bytes)
+		self.stats.set('decoder bytes', decoder_bytes)
+		self.stats.set('decoders', len(self.decoders.items()) + len(self.support_decoders))
+		self.stats.set('code labels', len(self.code_labels))
+		self.stats.set('data labels', len(self.data_labels))
+		self.stats.set('trace nodes', self.trace_nodes)
+		if self.cache:
+			self.stats.set('cache hits', self.cache.hits)
+			self.stats.set('cache misses', self.cache.misses)
+
+	def release_bank(self, bank):
+		"""
+		Drop the decoded entries of a bank once it has been written
+		"""
+		start = bank * self.cart.bank_size()
+		self.code.delete_range(start, start + self.cart.bank_size())
 
 	def valid_label(self, index):
 		if index >= self.cart.size():
 			return False
 
-		if self.decoders.find(index) != None:
+		if self.decoder_coverage().find(index) != None:
 			return False
 
 		return bool(self.code_map[index] & self.OP_CODE)
@@ -691,391 +1325,126 @@ class Disassembler:
 		return Instruction(code,preamble,comment)
 
 	def opSize(self, op):
-		size = InstructionSizes[op]
-		# Calculate variable size instructions from accumulator state
-		if self.acc16() and op in [0x09,0x69, 0x29, 0x89, 0xC9, 0x49, 0xE9, 0xA9]:
-			size = size + 1
-		elif self.ind16() and op in [0xE0, 0xC0, 0xA2, 0xA0]:
-			size = size + 1
-		return size
-
-	# OP Codes
-
-	def op01(self):
-		return self.ins("ora" + self.dir_page_ind_indir_x())
-
-	# ADC
-	def op69(self):
-		return self.ins("adc" + self.immediate())
-
-	def op6D(self):
-		return self.ins("adc" + self.abs())
-
-	def op6F(self):
-		return self.abs_long_lookup("adc")
-
-	def op65(self):
-		return self.ins("adc" + self.dir_page())
-
-	def op72(self):
-		return self.ins("adc" + self.dir_page_indir())
-
-	def op67(self):
-		return self.ins("adc" + self.dir_page_indir_long())
-
-	def op7D(self):
-		return self.ins("adc" + self.abs_ind_x())
-
-	def op7F(self):
-		return self.ins("adc" + self.abs_long_ind_x())
-
-	def op79(self):
-		return self.ins("adc" + self.abs_ind_y())
-
-	def op75(self):
-		return self.ins("adc" + self.dir_page_ind_x())
-
-	def op61(self):
-		return self.ins("adc" + self.dir_page_ind_indir_x())
-
-	def op71(self):
-		return self.ins("adc" + self.dir_page_ind_indir_y())
-
-	def op77(self):
-		return self.ins("adc" + self.dir_page_indir_long_y())
-
-	def op63(self):
-		return self.ins("adc" + self.stack_rel())
-
-	def op73(self):
-		return self.ins("adc" + self.stack_rel_indir_y())
-
-	# AND
-	def op29(self):
-		return self.ins("and" + self.immediate())
-
-	def op2D(self):
-		return self.ins("and" + self.abs())
-
-	def op2F(self):
-		return self.abs_long_lookup("and")
-
-	def op25(self):
-		return self.ins("and" + self.dir_page())
-
-	def op32(self):
-		return self.ins("and" + self.dir_page_indir())
-
-	def op27(self):
-		return self.ins("and" + self.dir_page_indir_long())
-
-	def op3D(self):
-		return self.ins("and" + self.abs_ind_x())
-
-	def op3F(self):
-		return self.ins("and" + self.abs_long_ind_x())
-
-	def op39(self):
-		return self.ins("and" + self.abs_ind_y())
-
-	def op35(self):
-		return self.ins("and" + self.dir_page_ind_x())
-
-	def op21(self):
-		return self.ins("and" + self.dir_page_ind_indir_x())
-
-	def op31(self):
-		return self.ins("and" + self.dir_page_ind_indir_y())
-
-	def op37(self):
-		return self.ins("and" + self.dir_page_indir_long_y())
-
-	def op23(self):
-		return self.ins("and" + self.stack_rel())
-
-	def op33(self):
-		return self.ins("and" + self.stack_rel_indir_y())
-
-	# ASL
-	def op0A(self):
-		return self.ins("asl A")
-
-	def op0E(self):
-		return self.ins("asl" + self.abs())
-
-	def op06(self):
-		return self.ins("asl" + self.dir_page())
-
-	def op1E(self):
-		return self.ins("asl" + self.abs_ind_x())
-
-	def op16(self):
-		return self.ins("asl" + self.dir_page_ind_x())
-
-	# BCC
-	def op90(self):
-		return self.branch("bcc")
- 
- 	# BCS
-	def opB0(self):
-		return self.branch("bcs")
- 
- 	# BEQ
-	def opF0(self):
-		return self.branch("beq")
- 
- 	# BNE
-	def opD0(self):
-		return self.branch("bne")
- 
- 	# BMI
-	def op30(self):
-		return self.branch("bmi")
- 
- 	# BPL
-	def op10(self):
-		return self.branch("bpl")
- 
- 	# BVC
-	def op50(self):
-		return self.branch("bvc")
- 
- 	# BVS
-	def op70(self):
-		return self.branch("bvs")
- 
- 	# BRA
-	def op80(self):
-		return self.branch("bra")
- 
- 	# BRL
-	def op82(self):
-		return self.pc_rel_long("brl")
-
-	# BIT
-	def op89(self):
-		return self.ins("bit" + self.immediate())
-
-	def op2C(self):
-		return self.ins("bit" + self.abs())
-
-	def op24(self):
-		return self.ins("bit" + self.dir_page())
-
-	def op3C(self):
-		return self.ins("bit" + self.abs_ind_x())
-
-	def op34(self):
-		return self.ins("bit" + self.dir_page_ind_x())
- 
- 	# BRK
-	def op00(self):
-		return self.ins("brk" + self.stack_interrupt())
- 
- 	# CLC
-	def op18(self):
-		return self.ins("clc", comment='Clear carry')
- 
- 	# CLD
-	def opD8(self):
-		return self.ins("cld", comment='Clear decimal')
- 
- 	# CLI
-	def op58(self):
-		return self.ins("cli", comment='Clear interupt')
- 
- 	# CLV
-	def opB8(self):
-		return self.ins("clv", comment='Clear overflow')
- 
- 	# SEC
-	def op38(self):
-		return self.ins("sec", comment='Set carry')
- 
- 	# SED
-	def opF8(self):
-		return self.ins("sed", comment='Set decimal')
- 
- 	# SEI
-	def op78(self):
-		return self.ins("sei", comment='Disable interrupts')
-
-	# CMP
-	def opC9(self):
-		return self.ins("cmp" + self.immediate())
-
-	def opCD(self):
-		return self.ins("cmp" + self.abs())
-
-	def opCF(self):
-		return self.abs_long_lookup("cmp")
-
-	def opC5(self):
-		return self.ins("cmp" + self.dir_page())
-
-	def opD2(self):
-		return self.ins("cmp" + self.dir_page_indir())
-
-	def opC7(self):
-		return self.ins("cmp" + self.dir_page_indir_long())
-
-	def opDD(self):
-		return self.ins("cmp" + self.abs_ind_x())
-
-	def opDF(self):
-		return self.ins("cmp" + self.abs_long_ind_x())
-
-	def opD9(self):
-		return self.ins("cmp" + self.abs_ind_y())
-
-	def opD5(self):
-		return self.ins("cmp" + self.dir_page_ind_x())
-
-	def opC1(self):
-		return self.ins("cmp" + self.dir_page_ind_indir_x())
-
-	def opD1(self):
-		return self.ins("cmp" + self.dir_page_ind_indir_y())
-
-	def opD7(self):
-		return self.ins("cmp" + self.dir_page_indir_long_y())
-
-	def opC3(self):
-		return self.ins("cmp" + self.stack_rel())
-
-	def opD3(self):
-		return self.ins("cmp" + self.stack_rel_indir_y())
-
-	# COP
-	def op02(self):
-		return self.ins("cop" + self.stack_interrupt())
-
-	# CPX
-	def opE0(self):
-		return self.ins("cpx" + self.immediate_ind())
-
-	def opEC(self):
-		return self.abs_lookup("cpx")
-
-	def opE4(self):
-		return self.ins("cpx" + self.dir_page())
-
-	# CPY
-	def opC0(self):
-		return self.ins("cpy" + self.immediate_ind())
-
-	def opCC(self):
-		return self.abs_lookup("cpy")
-
-	def opC4(self):
-		return self.ins("cpy" + self.dir_page())
-
-	# DEC
-	def op3A(self):
-		return self.ins("dec A")
-
-	def opCE(self):
-		return self.abs_lookup("dec")
-
-	def opC6(self):
-		return self.ins("dec" + self.dir_page())
-
-	def opDE(self):
-		return self.ins("dec" + self.abs_ind_x())
-
-	def opD6(self):
-		return self.ins("dec" + self.dir_page_ind_x())
-
-	# DEX
-	def opCA(self):
-		return self.ins("dex")
-
-	# DEY
-	def op88(self):
-		return self.ins("dey")
-
-	# EOR
-	def op49(self):
-		return self.ins("eor" + self.immediate())
-
-	def op4D(self):
-		return self.abs_lookup("eor")
-
-	def op4F(self):
-		return self.abs_long_lookup("eor")
-
-	def op45(self):
-		return self.ins("eor" + self.dir_page())
-
-	def op52(self):
-		return self.ins("eor" + self.dir_page_indir())
-
-	def op47(self):
-		return self.ins("eor" + self.dir_page_indir_long())
-
-	def op5D(self):
-		return self.ins("eor" + self.abs_ind_x())
-
-	def op5F(self):
-		return self.ins("eor" + self.abs_long_ind_x())
-
-	def op59(self):
-		return self.ins("eor" + self.abs_ind_y())
-
-	def op55(self):
-		return self.ins("eor" + self.dir_page_ind_x())
-
-	def op41(self):
-		return self.ins("eor" + self.dir_page_ind_indir_x())
-
-	def op51(self):
-		return self.ins("eor" + self.dir_page_ind_indir_y())
-
-	def op57(self):
-		return self.ins("eor" + self.dir_page_indir_long_y())
-
-	def op43(self):
-		return self.ins("eor" + self.stack_rel())
-
-	def op53(self):
-		return self.ins("eor" + self.stack_rel_indir_y())
-
-	# INC
-	def op1A(self):
-		return self.ins("inc A")
-
-	def opEE(self):
-		return self.abs_lookup("inc")
-
-	def opE6(self):
-		return self.ins("inc" + self.dir_page())
-
-	def opFE(self):
-		return self.ins("inc" + self.abs_ind_x())
-
-	def opF6(self):
-		return self.ins("inc" + self.dir_page_ind_x())
-
-	# INX
-	def opE8(self):
-		return self.ins("inx")
-
-	# INY
-	def opC8(self):
-		return self.ins("iny")
-
-	# JMP
-	def op4C(self):
-		return self.jmp_abs("jmp")
-
-	def jmp_abs(self, op):
-		pipe = self.pipe16()
-
+		# Variable size immediate instructions follow the accumulator and index flags
+		return OpcodeSizes[(self.flags >> 4) & 3][op]
+
+	def render_op(self, record):
+		"""
+		Render a decoded opcode record to an instruction
+		"""
+		pos = record.pos
+		op = self.cart.data[pos]
+		self.pos = pos
+		self.flags = record.flags
+		op_size = OpcodeSizes[(record.flags >> 4) & 3][op]
+		ins = self.format_op(op)
+
+		# Show instruction bytes for unmapped code
+		if self.hex_comment or not self.code_map[pos] & self.OP_CODE:
+			ins.comment = self.cart.data[pos:pos + op_size].hex(' ').upper()
+		return ins
+
+	# Format the opcode at the current position
+	def format_op(self, op):
+		mnemonic, mode, comment = OpcodeTable[op]
+
+		if mode == IMPLIED:
+			return Instruction(mnemonic, None, comment)
+
+		data = self.cart.data
+		pos = self.pos
+		width, form, variable_form = AddressModes[mode]
+
+		# Operand modes with optional variable names
+		if width == 1:
+			operand = data[pos+1]
+		elif width == 2:
+			operand = data[pos+1] | (data[pos+2] << 8)
+		elif width == 3:
+			operand = data[pos+1] | (data[pos+2] << 8) | (data[pos+3] << 16)
+
+		if width:
+			if variable_form and operand in self.variables:
+				return Instruction(mnemonic + variable_form % self.variables[operand])
+			return Instruction(mnemonic + form % operand)
+
+		# Modes with their own formatting rules
+		if mode == ABS_LOOKUP or mode == ABS_LONG_LOOKUP:
+			if mode == ABS_LOOKUP:
+				address = data[pos+1] | (data[pos+2] << 8)
+				size = ".w"
+			else:
+				address = data[pos+1] | (data[pos+2] << 8) | (data[pos+3] << 16)
+				size = ".l"
+			address_info = StaticAddresses.get(address)
+			if address_info:
+				return Instruction("%s %s%s" % (mnemonic, address_info[0], size), None, address_info[1])
+			elif address in self.variables:
+				return Instruction("%s %s%s" % (mnemonic, self.variables[address], size))
+			elif mode == ABS_LOOKUP:
+				return Instruction("%s $%04X.w" % (mnemonic, address))
+			else:
+				return Instruction("%s $%06X.l" % (mnemonic, address))
+		elif mode == BRANCH:
+			return self.branch(mnemonic)
+		elif mode == IMMEDIATE:
+			if self.flags & 0x20 == 0:
+				return Instruction("%s #$%04X.w" % (mnemonic, data[pos+1] | (data[pos+2] << 8)))
+			return Instruction("%s #$%02X.b" % (mnemonic, data[pos+1]))
+		elif mode == IMMEDIATE_IND:
+			if self.flags & 0x10 == 0:
+				return Instruction("%s #$%04X.w" % (mnemonic, data[pos+1] | (data[pos+2] << 8)))
+			return Instruction("%s #$%02X.b" % (mnemonic, data[pos+1]))
+		elif mode == JMP_ABS:
+			return self.jmp_abs(mnemonic)
+		elif mode == JMP_ABS_LONG:
+			return self.jmp_abs_long(mnemonic)
+		elif mode == RETURN:
+			return Instruction(mnemonic, post="")
+		elif mode == ACCUMULATOR:
+			return Instruction(mnemonic + " A")
+		elif mode == ABS_LONG_IND_X:
+			address = data[pos+1] | (data[pos+2] << 8) | (data[pos+3] << 16)
+			if address in self.data_labels:
+				return Instruction("%s %s.l,X" % (mnemonic, self.data_labels[address]))
+			return Instruction("%s $%06X.l,X" % (mnemonic, address))
+		elif mode == REP:
+			val = data[pos+1]
+			self.flags = self.flags & (~val)
+			pre = None
+			if val & 0x20:
+				pre = ".ACCU 16"
+			if val & 0x10:
+				pre = pre + "\n" if pre else ""
+				pre = pre + ".INDEX 16"
+			return Instruction("rep #$%02X" % val, pre)
+		elif mode == SEP:
+			val = data[pos+1]
+			self.flags = self.flags | val
+			pre = None
+			if val & 0x20:
+				pre = ".ACCU 8"
+			if val & 0x10:
+				pre = pre + "\n" if pre else ""
+				pre = pre + ".INDEX 8"
+			return Instruction("sep #$%02X" % val, pre)
+		elif mode == PC_REL_LONG:
+			return self.pc_rel_long(mnemonic)
+		elif mode == BLOCK_MOVE:
+			return Instruction("%s $%02X,$%02X" % (mnemonic, data[pos+2], data[pos+1]))
+		elif mode == WDM:
+			return Instruction(".db $42, $%02X" % data[pos+1], None, "opcode wdm $%02X" % data[pos+1])
+
+	def jmp_abs_index(self, pipe):
 		if self.cart.hirom:
-			index = (self.pos & 0xFF0000) | pipe
+			return (self.pos & 0xFF0000) | pipe
 		else:
 			address = (self.pos << 1 & 0xFF0000 ) | pipe
-			index = self.cart.index(address)
+			return self.cart.index(address)
+
+	def jmp_abs(self, op):
+		pipe = self.pipe16()
+		index = self.jmp_abs_index(pipe)
 
 		if self.valid_label(index) and not self.no_label:
 			return self.ins("%s %s.w" % (op, self.label_name(index)))
@@ -1091,6 +1460,9 @@ class Disassembler:
 		if index == -1 or not self.valid_label(index) or self.no_label:
 			return self.ins("%s $%06X.l" % (op, pipe))
 
+		return self.ins("%s %s.l" % (op, self.long_label(pipe, index)))
+
+	def long_label(self, pipe, index):
 		pipe_bank = 0xFF0000 & pipe
 		if self.cart.hirom:
 			shadow = pipe_bank != 0xFF0000 & index
@@ -1112,664 +1484,20 @@ class Disassembler:
 			else:
 				label = pipe_bank | (0xFFFF & index)
 
-			return self.ins("%s L%06X.l" % (op, label))
-		else:
-			return self.ins("%s %s.l" % (op, self.label_name(index)))
-
-	def op6C(self):
-		return self.ins("jmp" + self.abs_indir())
-
-	def op7C(self):
-		return self.ins("jmp" + self.abs_ind_indir())
-
-	def op5C(self):
-		return self.jmp_abs_long("jmp")
-
-	def opDC(self):
-		return self.ins("jmp.w" + self.abs_indir_long())
-
-	# JSR
-	def op22(self):
-		return self.jmp_abs_long("jsl")
-
-	def op20(self):
-		return self.jmp_abs("jsr")
-
-	def opFC(self):
-		return self.ins("jsr" + self.abs_ind_indir())
-
-	# LDA
-	def opA9(self):
-		return self.ins("lda" + self.immediate())
-
-	def opAD(self):
-		return self.abs_lookup("lda")
-
-	def opAF(self):
-		return self.abs_long_lookup("lda")
-
-	def opA5(self):
-		return self.ins("lda" + self.dir_page())
-
-	def opB2(self):
-		return self.ins("lda" + self.dir_page_indir())
-
-	def opA7(self):
-		return self.ins("lda" + self.dir_page_indir_long())
-
-	def opBD(self):
-		return self.ins("lda" + self.abs_ind_x())
-
-	def opBF(self):
-		return self.ins("lda" + self.abs_long_ind_x())
-
-	def opB9(self):
-		return self.ins("lda" + self.abs_ind_y())
-
-	def opB5(self):
-		return self.ins("lda" + self.dir_page_ind_x())
-
-	def opA1(self):
-		return self.ins("lda" + self.dir_page_ind_indir_x())
-
-	def opB1(self):
-		return self.ins("lda" + self.dir_page_ind_indir_y())
-
-	def opB7(self):
-		return self.ins("lda" + self.dir_page_indir_long_y())
-
-	def opA3(self):
-		return self.ins("lda" + self.stack_rel())
-
-	def opB3(self):
-		return self.ins("lda" + self.stack_rel_indir_y())
-
-	# LDX
-	def opA2(self):
-		return self.ins("ldx" + self.immediate_ind())
-
-	def opAE(self):
-		return self.abs_lookup("ldx")
-
-	def opA6(self):
-		return self.ins("ldx" + self.dir_page())
-
-	def opBE(self):
-		return self.ins("ldx" + self.abs_ind_y())
-
-	def opB6(self):
-		return self.ins("ldx" + self.dir_page_ind_y())
-
-	# LDY
-	def opA0(self):
-		return self.ins("ldy" + self.immediate_ind())
-
-	def opAC(self):
-		return self.abs_lookup("ldy")
-
-	def opA4(self):
-		return self.ins("ldy" + self.dir_page())
-
-	def opBC(self):
-		return self.ins("ldy" + self.abs_ind_x())
-
-	def opB4(self):
-		return self.ins("ldy" + self.dir_page_ind_x())
-
-	# LSR
-	def op4A(self):
-		return self.ins("lsr A")
-
-	def op4E(self):
-		return self.abs_lookup("lsr")
-
-	def op46(self):
-		return self.ins("lsr" + self.dir_page())
-
-	def op5E(self):
-		return self.ins("lsr" + self.abs_ind_x())
-
-	def op56(self):
-		return self.ins("lsr" + self.dir_page_ind_x())
-
-	# MVN
-	def op54(self):
-		return self.ins("mvn" + self.block_move())
-
-	# MVP
-	def op44(self):
-		return self.ins("mvp" + self.block_move())
-
-	# NOP
-	def opEA(self):
-		return self.ins("nop")
-
-	# ORA
-	def op09(self):
-		return self.ins("ora" + self.immediate())
-
-	def op0D(self):
-		return self.abs_lookup("ora")
-
-	def op0F(self):
-		return self.abs_long_lookup("ora")
-
-	def op05(self):
-		return self.ins("ora" + self.dir_page())
-
-	def op12(self):
-		return self.ins("ora" + self.dir_page_indir())
-
-	def op07(self):
-		return self.ins("ora" + self.dir_page_indir_long())
-
-	def op1D(self):
-		return self.ins("ora" + self.abs_ind_x())
-
-	def op1F(self):
-		return self.ins("ora" + self.abs_long_ind_x())
-
-	def op19(self):
-		return self.ins("ora" + self.abs_ind_y())
-
-	def op15(self):
-		return self.ins("ora" + self.dir_page_ind_x())
-
-	def op01(self):
-		return self.ins("ora" + self.dir_page_ind_indir_x())
-
-	def op11(self):
-		return self.ins("ora" + self.dir_page_ind_indir_y())
-
-	def op17(self):
-		return self.ins("ora" + self.dir_page_indir_long_y())
-
-	def op03(self):
-		return self.ins("ora" + self.stack_rel())
-
-	def op13(self):
-		return self.ins("ora" + self.stack_rel_indir_y())
-
- 	# PEA
-	def opF4(self):
-		return self.ins("pea" + self.abs())
- 
- 	# PEI
-	def opD4(self):
-		return self.ins("pei" + self.dir_page_indir())
- 
- 	# PER
-	def op62(self):
-		return self.pc_rel_long("per")
- 
- 	# PHA
-	def op48(self):
-		return self.ins("pha")
- 
- 	# PHP
-	def op08(self):
-		return self.ins("php")
- 
- 	# PHX
-	def opDA(self):
-		return self.ins("phx")
- 
- 	# PHY
-	def op5A(self):
-		return self.ins("phy")
- 
- 	# PLA
-	def op68(self):
-		return self.ins("pla")
- 
- 	# PLP
-	def op28(self):
-		return self.ins("plp")
- 
- 	# PLX
-	def opFA(self):
-		return self.ins("plx")
- 
- 	# PLY
-	def op7A(self):
-		return self.ins("ply")
- 
- 	# PHB
-	def op8B(self):
-		return self.ins("phb")
- 
- 	# PHD
-	def op0B(self):
-		return self.ins("phd")
- 
- 	# PHK
-	def op4B(self):
-		return self.ins("phk")
- 
- 	# PLB
-	def opAB(self):
-		return self.ins("plb")
- 
- 	# PLD
-	def op2B(self):
-		return self.ins("pld")
-
-	# REP
-	def opC2(self):
-		val = self.pipe8()
-		self.flags = self.flags & (~val)
-		pre = None
-		if val & 0x20:
-			pre = ".ACCU 16"
-		if val & 0x10:
-			pre = pre + "\n" if pre else ""
-			pre = pre + ".INDEX 16"
-		return self.ins("rep #$%02X" % self.pipe8(), pre )
-
-	# SEP
-	def opE2(self):
-		val = self.pipe8()
-		self.flags = self.flags | val
-		pre = None
-		if val & 0x20:
-			pre = ".ACCU 8"
-		if val & 0x10:
-			pre = pre + "\n" if pre else ""
-			pre = pre + ".INDEX 8"
-		return self.ins("sep #$%02X" % self.pipe8(), pre )
-
-	# ROL
-	def op2A(self):
-		return self.ins("rol A")
-
-	def op2E(self):
-		return self.abs_lookup("rol")
-
-	def op26(self):
-		return self.ins("rol" + self.dir_page())
-
-	def op3E(self):
-		return self.ins("rol" + self.abs_ind_x())
-
-	def op36(self):
-		return self.ins("rol" + self.dir_page_ind_x())
-
-	# ROR
-	def op6A(self):
-		return self.ins("ror A")
-
-	def op6E(self):
-		return self.abs_lookup("ror")
-
-	def op66(self):
-		return self.ins("ror" + self.dir_page())
-
-	def op7E(self):
-		return self.ins("ror" + self.abs_ind_x())
-
-	def op76(self):
-		return self.ins("ror" + self.dir_page_ind_x())
-
-	# RTI
-	def op40(self):
-		return Instruction("rti", post="")
-
-	# RTL
-	def op6B(self):
-		return Instruction("rtl", post="")
-
-	# RTS
-	def op60(self):
-		return Instruction("rts", post="")
-
-	# SBC
-	def opE9(self):
-		return self.ins("sbc" + self.immediate())
-
-	def opED(self):
-		return self.abs_lookup("sbc")
-
-	def opEF(self):
-		return self.abs_long_lookup("sbc")
-
-	def opE5(self):
-		return self.ins("sbc" + self.dir_page())
-
-	def opF2(self):
-		return self.ins("sbc" + self.dir_page_indir())
-
-	def opE7(self):
-		return self.ins("sbc" + self.dir_page_indir_long())
-
-	def opFD(self):
-		return self.ins("sbc" + self.abs_ind_x())
-
-	def opFF(self):
-		return self.ins("sbc" + self.abs_long_ind_x())
-
-	def opF9(self):
-		return self.ins("sbc" + self.abs_ind_y())
-
-	def opF5(self):
-		return self.ins("sbc" + self.dir_page_ind_x())
-
-	def opE1(self):
-		return self.ins("sbc" + self.dir_page_ind_indir_x())
-
-	def opF1(self):
-		return self.ins("sbc" + self.dir_page_ind_indir_y())
-
-	def opF7(self):
-		return self.ins("sbc" + self.dir_page_indir_long_y())
-
-	def opE3(self):
-		return self.ins("sbc" + self.stack_rel())
-
-	def opF3(self):
-		return self.ins("sbc" + self.stack_rel_indir_y())
-
-	# STA
-	def op8D(self):
-		return self.abs_lookup("sta")
-
-	def op8F(self):
-		return self.abs_long_lookup("sta")
-
-	def op85(self):
-		return self.ins("sta" + self.dir_page())
-
-	def op92(self):
-		return self.ins("sta" + self.dir_page_indir())
-
-	def op87(self):
-		return self.ins("sta" + self.dir_page_indir_long())
-
-	def op9D(self):
-		return self.ins("sta" + self.abs_ind_x())
-
-	def op9F(self):
-		return self.ins("sta" + self.abs_long_ind_x())
-
-	def op99(self):
-		return self.ins("sta" + self.abs_ind_y())
-
-	def op95(self):
-		return self.ins("sta" + self.dir_page_ind_x())
-
-	def op81(self):
-		return self.ins("sta" + self.dir_page_ind_indir_x())
-
-	def op91(self):
-		return self.ins("sta" + self.dir_page_ind_indir_y())
-
-	def op97(self):
-		return self.ins("sta" + self.dir_page_indir_long_y())
-
-	def op83(self):
-		return self.ins("sta" + self.stack_rel())
-
-	def op93(self):
-		return self.ins("sta" + self.stack_rel_indir_y())
-
-	# STP
-	def opDB(self):
-		return self.ins("stp")
-
-	# STX
-	def op8E(self):
-		return self.abs_lookup("stx")
-
-	def op86(self):
-		return self.ins("stx" + self.dir_page())
-
-	def op96(self):
-		return self.ins("stx" + self.dir_page_ind_y())
-
-	# STY
-	def op8C(self):
-		return self.abs_lookup("sty")
-
-	def op84(self):
-		return self.ins("sty" + self.dir_page())
-
-	def op94(self):
-		return self.ins("sty" + self.dir_page_ind_x())
-
-	# STZ
-	def op9C(self):
-		return self.abs_lookup("stz")
-
-	def op64(self):
-		return self.ins("stz" + self.dir_page())
-
-	def op9E(self):
-		return self.ins("stz" + self.abs_ind_x())
-
-	def op74(self):
-		return self.ins("stz" + self.dir_page_ind_x())
-
- 	# TAX
-	def opAA(self):
-		return self.ins("tax")
- 
- 	# TAY
-	def opA8(self):
-		return self.ins("tay")
- 
- 	# TXA
-	def op8A(self):
-		return self.ins("txa")
- 
- 	# TYA
-	def op98(self):
-		return self.ins("tya")
- 
- 	# TSX
-	def opBA(self):
-		return self.ins("tsx")
- 
- 	# TXS
-	def op9A(self):
-		return self.ins("txs")
- 
- 	# TXY
-	def op9B(self):
-		return self.ins("txy")
- 
- 	# TYX
-	def opBB(self):
-		return self.ins("tyx")
- 
- 	# TAD
-	def op5B(self):
-		return self.ins("tad")
- 
- 	# TDA
-	def op7B(self):
-		return self.ins("tda")
-
- 	# TAS
-	def op1B(self):
-		return self.ins("tas")
- 
- 	# TSA
-	def op3B(self):
-		return self.ins("tsa")
- 
- 	# TRB
-	def op1C(self):
-		return self.abs_lookup("trb")
-
-	def op14(self):
-		return self.ins("trb" + self.dir_page())
- 
- 	# TSB
-	def op0C(self):
-		return self.abs_lookup("tsb")
-
-	def op04(self):
-		return self.ins("tsb" + self.dir_page())
- 
- 	# WAI
-	def opCB(self):
-		return self.ins("wai")
- 
- 	# WDM
-	def op42(self):
-		return self.ins(".db $42, $%02X" % self.pipe8(), comment = "opcode wdm $%02X" % self.pipe8())
- 
- 	# XBA
-	def opEB(self):
-		return self.ins("xba")
- 
- 	# XCE
-	def opFB(self):
-		return self.ins("xce", comment='Exchange carry bit to set emulation or native mode')
-
-	# Address modes
-
-	def immediate(self):
-		if self.acc16():
-			return " #$%04X.w" % self.pipe16()
-		else:
-			return " #$%02X.b" % self.pipe8()
-
-	def immediate_ind(self):
-		if self.ind16():
-			return " #$%04X.w" % self.pipe16()
-		else:
-			return " #$%02X.b" % self.pipe8()
-
-	def abs(self):
-		return " $%04X.w" % self.pipe16()
-
-	def abs_lookup(self, op):
-		address = self.pipe16()
-		address_info = StaticAddresses.get(address)
-
-		if address_info:
-			return self.ins("%s %s.w" % (op, address_info[0]), comment = address_info[1])
-		elif address in self.variables:
-			return self.ins("%s %s.w" %  (op, self.variables[address]))
-		else:
-			return self.ins(op + self.abs())
-
-	def abs_long_lookup(self, op):
-		address = self.pipe24()
-		address_info = StaticAddresses.get(address)
-
-		if address_info:
-			return self.ins("%s %s.l" % (op, address_info[0]), comment = address_info[1])
-		elif address in self.variables:
-			return self.ins("%s %s.l" %  (op, self.variables[address]))
-		else:
-			return self.ins(op + self.abs_long())
-
-	def abs_indir(self):
-		address = self.pipe16()
-		if address in self.variables:
-			return " ($%s.w)" % self.variables[address]
-		else:
-			return " ($%04X.w)" % address
-
-	def abs_ind_indir(self):
-		address = self.pipe16()
-		if address in self.variables:
-			return " (%s.w,X)" % self.variables[address]
+			return "L%06X" % label
 		else:
-			return " ($%04X.w,X)" % address
+			return self.label_name(index)
 
-	def abs_indir_long(self):
-		address = self.pipe16()
-		if address in self.variables:
-			return " [%s]" % self.variables[address]
-		else:
-			return " [$%04X]" % address
-
-	def abs_ind_x(self):
-		address = self.pipe16()
-		if address in self.variables:
-			return " %s.w,X" % self.variables[address]
-		else:
-			return " $%04X.w,X" % address
-
-	def abs_ind_y(self):
-		address = self.pipe16()
-		if address in self.variables:
-			return " %s.w,Y" % self.variables[address]
-		else:
-			return " $%04X.w,Y" % address
-
-	def abs_long(self):
-		return " $%06X.l" % self.pipe24()
-	
-	def abs_long_ind_x(self):
-		address = self.pipe24()
-		if address in self.data_labels:
-			return " %s.l,X" % self.data_labels[address]
-		else:
-			return " $%06X.l,X" % address
-
-	def dir_page(self):
-		address = self.pipe8()
-		if address in self.variables:
-			return " %s.b" % self.variables[address]
-		else:
-			return " $%02X.b" % address
-
-	def dir_page_indir(self):
-		address = self.pipe8()
-		if address in self.variables:
-			return " (%s.b)" % self.variables[address]
-		else:
-			return " ($%02X.b)" % address
-
-	def dir_page_ind_x(self):
-		address = self.pipe8()
-		if address in self.variables:
-			return " %s.b,X" % self.variables[address]
-		else:
-			return " $%02X.b,X" % address
-
-	def dir_page_ind_y(self):
-		address = self.pipe8()
-		if address in self.variables:
-			return " %s.b,Y" % self.variables[address]
+	def branch_index(self, pipe, size):
+		if self.cart.hirom:
+			return (self.pos & 0xFF0000 ) + ((self.pos + pipe + size) & 0xFFFF)
 		else:
-			return " $%02X.b,Y" % address
-
-	def dir_page_indir_long(self):
-		return " [$%02X.b]" % self.pipe8()
-
-	def dir_page_ind_indir_x(self):
-		return " ($%02X.b,X)" % self.pipe8()
-
-	def dir_page_ind_indir_y(self):
-		return " ($%02X.b),Y" % self.pipe8()
-
-	def dir_page_indir_long_y(self):
-		return " [$%02X.b],Y" % self.pipe8()
-
-	def stack_rel(self):
-		return " $%02X.b,S" % self.pipe8()
-
-	def stack_rel_indir_y(self):
-		return " ($%02X.b,S),Y" % self.pipe8()
-
-	def stack_interrupt(self):
-		return " $%02X.b" % self.pipe8()
-
-	def block_move(self):
-		return " $%02X,$%02X" % (self.cart[self.pos+2], self.cart[self.pos+1])
+			address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + size)
+			return self.cart.index(address)
 
 	def branch(self, ins):
 		pipe = self.pipe8_signed()
-
-		if self.cart.hirom:
-			index = (self.pos & 0xFF0000 ) + ((self.pos + pipe + 2) & 0xFFFF)
-		else:
-			address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + 2)
-			index = self.cart.index(address)
+		index = self.branch_index(pipe, 2)
 
 		if self.valid_label(index):
 			if self.no_label:
@@ -1781,12 +1509,7 @@ class Disassembler:
 
 	def pc_rel_long(self, ins):
 		pipe = self.pipe16_signed()
-
-		if self.cart.hirom:
-			index = (self.pos & 0xFF0000 ) + ((self.pos + pipe + 3) & 0xFFFF)
-		else:
-			address = (self.pos << 1 & 0xFF0000 ) | (0x8000 + (self.pos & 0x7FFF) + pipe + 3)
-			index = self.cart.index(address)
+		index = self.branch_index(pipe, 3)
 
 		# wla-dx won't parse BRL/PER $XXXX liternal addresses. Forced to print as data bytes if no label.
 		if self.valid_label(index):
@@ -1819,6 +1542,51 @@ class Disassembler:
 		return val
 
 
+# Disassembler inherited by forked pool workers
+_pool_disasm = None
+
+def _decode_bank_job(job):
+	sections, flags = job
+	disasm = _pool_disasm
+	disasm.code = OrderedDictRange()
+	disasm.flags = flags
+	for start, end in sections:
+		disasm.decode(start, end)
+	return disasm.code.items()
+
+def _decoder_group_job(group):
+	disasm = _pool_disasm
+	order = disasm.decoder_jobs
+	hits, misses = (disasm.cache.hits, disasm.cache.misses) if disasm.cache else (0, 0)
+	code = [(i, disasm.decoder_code(order[i])) for i in group]
+	# Decoders may update the state of the decoders they reference
+	states = [(i, order[i].state()) for i in group]
+	if disasm.cache:
+		hits, misses = disasm.cache.hits - hits, disasm.cache.misses - misses
+	return code, states, hits, misses
+
+def _fill_data_bank_job(bank):
+	disasm = _pool_disasm
+	disasm.code = OrderedDictRange()
+	disasm.fill_data_bank(bank)
+	return disasm.code.items()
+
+def _bank_code_job(bank):
+	# Banks of a cached analysis are decoded again from their plan
+	if _pool_disasm.code_cached:
+		_pool_disasm.restore_bank(bank)
+	return _pool_disasm.bank_code(bank)
+
+class OpcodeRecord:
+	"""
+	Decoded opcode position and the status flags it was decoded with
+	"""
+	__slots__ = ('pos', 'flags')
+
+	def __init__(self, pos, flags):
+		self.pos = pos
+		self.flags = flags
+
 class Instruction:
 	def __init__(self, code, preamble=None, comment=None, post=None):
 		self.code = code
@@ -1840,18 +1608,118 @@ class Instruction:
 			text.append("\n" + self.post)
 		return "".join(text)
 
-class OrderedDictRange(OrderedDict):
+class OrderedDictRange(dict):
+	"""
+	Dictionary of integer keys which iterates in key order and supports
+	range queries. New keys are appended to a pending list and merged into
+	the sorted key index on the next ordered access, so in order inserts
+	are O(1) and range lookups are O(log n + k).
+	"""
+
+	def __init__(self, *args, **kwargs):
+		dict.__init__(self)
+		self._keys = []
+		self._pending = []
+		self.update(*args, **kwargs)
+
+	def __reduce__(self):
+		# Pickle and copy rebuild the key index from the items
+		return (self.__class__, (dict(self),))
+
+	def __setitem__(self, key, value):
+		if key not in self:
+			self._pending.append(key)
+		dict.__setitem__(self, key, value)
+
+	def __delitem__(self, key):
+		dict.__delitem__(self, key)
+		self.sort_keys()
+		del self._keys[bisect.bisect_left(self._keys, key)]
+
+	def __iter__(self):
+		self.sort_keys()
+		return iter(self._keys)
+
+	def update(self, *args, **kwargs):
+		for key, value in dict(*args, **kwargs).items():
+			self[key] = value
+
+	def __ior__(self, other):
+		self.update(other)
+		return self
+
+	def __or__(self, other):
+		result = self.copy()
+		result.update(other)
+		return result
+
+	def setdefault(self, key, default=None):
+		if key not in self:
+			self[key] = default
+		return dict.__getitem__(self, key)
+
+	def popitem(self):
+		# The last item in key order
+		self.sort_keys()
+		if not self._keys:
+			raise KeyError('popitem(): dictionary is empty')
+		key = self._keys[-1]
+		return (key, self.pop(key))
+
+	def copy(self):
+		return self.__class__(self)
+
+	@classmethod
+	def fromkeys(cls, keys, value=None):
+		return cls(dict.fromkeys(keys, value))
+
+	def pop(self, key, *default):
+		if key in self:
+			value = self[key]
+			del self[key]
+			return value
+		return dict.pop(self, key, *default)
+
+	def clear(self):
+		dict.clear(self)
+		self._keys = []
+		self._pending = []
+
+	def keys(self):
+		return list(self)
+
+	def values(self):
+		return [self[k] for k in self]
+
+	def items(self):
+		return [(k, self[k]) for k in self]
 
 	def sort_keys(self):
-		keys = list(self)
-		keys.sort()
-		dict_sort = OrderedDictRange((k, self[k]) for k in keys)
-		self.clear()
-		self.update(dict_sort)
+		# Merge pending keys into the sorted index
+		if self._pending:
+			pending = self._pending
+			self._pending = []
+			pending.sort()
+			if not self._keys or self._keys[-1] < pending[0]:
+				self._keys.extend(pending)
+			else:
+				# Timsort merges the two sorted runs in linear time
+				self._keys.extend(pending)
+				self._keys.sort()
+
+	def delete_range(self, start, stop):
+		self.sort_keys()
+		keys = self._keys
+		left = bisect.bisect_left(keys, start)
+		right = bisect.bisect_left(keys, stop, left)
+		for k in keys[left:right]:
+			dict.__delitem__(self, k)
+		del keys[left:right]
 
 	# Data slicing
 	def item_range(self, start, stop):
-		keys = list(self)
+		self.sort_keys()
+		keys = self._keys
 		left = bisect.bisect_left(keys, start)
 		right = bisect.bisect_left(keys, stop, left)
 		return [ (k, self[k]) for k in keys[left:right] ]
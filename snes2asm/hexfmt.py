@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+Bulk hex formatting of data directives. Rows are sliced out of a single
+rendering of the whole buffer instead of formatting one value at a time.
+"""
+
+import struct
+
+# Bytes of data per output row
+ROW_SIZE = 16
+
+DIRECTIVES = ['.db', '.dw', '.dl', '.dd']
+
+def hex_text(data, size=1):
+	"""
+	Render data as comma separated little endian hex values of size bytes.
+	Trailing bytes short of a whole value are left out.
+	"""
+	if not isinstance(data, (bytes, bytearray, memoryview)):
+		data = bytes(data)
+	data = data[0:len(data) - len(data) % size]
+	if len(data) == 0:
+		return ''
+	if size == 1:
+		return '$' + data.hex(' ').upper().replace(' ', ', $')
+
+	# Reversing the buffer turns each value big endian in reverse order
+	tokens = data[::-1].hex(' ', size).upper().split(' ')
+	tokens.reverse()
+	return '$' + ', $'.join(tokens)
+
+def hex_rows(data, size=1, row_size=ROW_SIZE):
+	"""
+	Yields the offset and value text of each row of the whole values of data
+	"""
+	# Rows hold whole values
+	row_size -= row_size % size
+	text = hex_text(data, size)
+	# Each value renders as "$XX, " with two hex digits per byte
+	stride = 2 * size + 3
+	row_len = (row_size // size) * stride
+	pos = 0
+	for y in range(0, len(data) - len(data) % size, row_size):
+		yield (y, text[pos:pos + row_len - 2])
+		pos += row_len
+
+def data_lines(data, size=1, row_size=ROW_SIZE):
+	"""
+	Yields the offset and data directive line of each row of data. Trailing
+	bytes short of a whole value follow on a .db line.
+	"""
+	directive = DIRECTIVES[size-1] + ' '
+	for y, text in hex_rows(data, size, row_size):
+		yield (y, directive + text)
+	remainder = len(data) % size
+	if remainder:
+		y = len(data) - remainder
+		yield (y, '.db ' + hex_text(data[y:]))
+
+def unpack_values(data, size=1):
+	"""
+	Unpack little endian values of size bytes. Trailing bytes short of a
+	whole value are left out.
+	"""
+	count = len(data) // size
+	if size == 1:
+		return list(data)
+	elif size == 2:
+		return list(struct.unpack('<%dH' % count, data[:count*2]))
+	elif size == 3:
+		return [a | (b << 8) | (c << 16) for a, b, c in zip(data[0::3], data[1::3], data[2::3])]
+	elif size == 4:
+		return list(struct.unpack('<%dI' % count, data[:count*4]))
+	raise ValueError("Invalid value size %d" % size)
@@ -25,16 +25,20 @@ class ProjectMaker:
 		# Write support code
 		filename = "%s/constants.asm" % dir
 		f = open(filename, 'w')
-		f.write(self.disasm.support_code())
+		f.writelines(self.disasm.support_lines())
 		f.close()
 
-		# Write bank assembly code
-		for bank in range(0, self.cart.bank_count()):
-			code = self.disasm.bank_code(bank)
-			filename = "%s/bank%d.asm" % (dir, bank)
-			f = open(filename, 'w')
-			f.write(code)
-			f.close()
+		# Stream bank assembly code and release each bank once written
+		banks = list(range(0, self.cart.bank_count()))
+		banks_lines = self.disasm.banks_lines(banks)
+		for bank in banks:
+			with self.disasm.stats.phase('bank %d' % bank):
+				lines = next(banks_lines)
+				filename = "%s/bank%d.asm" % (dir, bank)
+				f = open(filename, 'w')
+				f.writelines(lines)
+				f.close()
+			self.disasm.release_bank(bank)
 
 
 		# Write decoder files
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 """
-RangeTree is a tree data structure for accessing values assigned to
+RangeTree is an interval index for accessing values assigned to
 numerical ranges which are non-overlapping.
 
 tree = RangeTree()
@@ -11,160 +11,140 @@ tree.add(300,310, 42)
 tree.find(50)
 tree.intersects(200, 305)
 
+RangeMask is a flat lookup built from a RangeTree for fast queries over
+a fixed span of positions.
+
+mask = RangeMask(tree, 0x1000)
+mask.intersects(200, 204)
+
 """
 
-from copy import copy
+import bisect
 
 class RangeTree():
+	"""
+	Sorted array interval index. Entries are kept ordered by start
+	position in parallel arrays so lookups are a bisect over the range
+	ends, O(log n), regardless of insertion order.
+	"""
 	def __init__(self):
-		self.root = None
+		self.starts = []
+		self.ends = []
+		self.values = []
+		self.empty = []
 
 	def find(self, index):
 		"""
 		Returns data value which index falls inside range entry
 		"""
-		node = self.root
-
-		while node:
-			if node.is_parent():
-				if node.left and node.left.contains(index):
-					node = node.left
-				elif node.right and node.right.contains(index):
-					node = node.right
-				else:
-					return None
-			elif node.contains(index):
-				return node.val
-			else:
-				return None
+		i = bisect.bisect_right(self.ends, index)
+		if i < len(self.starts) and self.starts[i] <= index:
+			return self.values[i]
+		return None
 
 	def items(self):
 		"""
 		Returns list of all data values in sequence
 		"""
-		items = []
-		path = []
-		stack = [self.root]
-		while len(stack) != 0:
-			node = stack.pop()
-			if node not in path:
-				path.append(node)
-
-			if node.is_parent():
-				if node.right:
-					stack.append(node.right)
-				if node.left:
-					stack.append(node.left)
-			else:
-				path.append(node)
-				items.append(node.val)
-	
-		return items
+		if self.empty:
+			return [r[2] for r in sorted(self.ranges() + self.empty, key=lambda r: r[0])]
+		return list(self.values)
+
+	def ranges(self):
+		"""
+		Returns list of all non-empty (start, end, value) entries in sequence
+		"""
+		return list(zip(self.starts, self.ends, self.values))
 
 	def intersects(self, start, end):
 		"""
 		Returns left most data value that intersects with first range entry
 		"""
-		node = self.root
-
-		while node:
-			if node.is_parent():
-				if node.left and node.left.intersects(start, end):
-					node = node.left
-				elif node.right and node.right.intersects(start, end):
-					node = node.right
-				else:
-					return None
-			elif node.intersects(start, end):
-				return node.val
-			else:
-				return None
+		i = bisect.bisect_right(self.ends, start)
+		if i < len(self.starts) and self.starts[i] < end and start < end:
+			return self.values[i]
+		return None
 
 	def add(self, start, end, value):
 		"""
 		Add data entry assigned to numeric range
 		"""
-		new_node = _RangeNode(start, end, value)
+		if end < start:
+			raise ValueError("Invalid range %d-%d" % (start, end))
 
-		if self.root == None:
-			self.root = new_node
+		# Empty ranges can never be found or intersected
+		if start == end:
+			self.empty.append((start, end, value))
 			return
 
-		if self.root.intersects(new_node.start, new_node.end):
-			self._add_inner(self.root, new_node)
-		else:
-			if start < self.root.start:
-				self._split_node(self.root, start, self.root.end, new_node, True)
-			else:
-				self._split_node(self.root, self.root.start, end, new_node, False )
+		if self.intersects(start, end) != None:
+			raise ValueError("Range conflict")
 
-	def _add_inner(self, node, new_node):
-		# Find tree node to insert new node into
+		i = bisect.bisect_right(self.ends, start)
+		self.starts.insert(i, start)
+		self.ends.insert(i, end)
+		self.values.insert(i, value)
 
-		if not node.is_parent():
-			raise ValueError("Range conflict")
-			
-		if node.left.intersects(new_node.start, new_node.end):
-			self._add_inner(node.left, new_node)
-		elif node.right.intersects(new_node.start, new_node.end):
-			self._add_inner(node.right, new_node)
-		else:
-			left = node.left.size() <= node.right.size()
-			if left:
-				self._split_node(node.left, node.start, new_node.end, new_node, False)
-			else:
-				self._split_node(node.right, new_node.start, node.end, new_node, True)
-
-	def _split_node(self, node, range_start, range_end, new_node, left):
-		# Create parent node to contain original node and new node
-		tmp_node = copy(node)
-		node.val = None # Mark as parent
-		node.start = range_start
-		node.end = range_end
-		if left:
-			node.left = new_node
-			node.right = tmp_node
-		else:
-			node.left = tmp_node
-			node.right = new_node
+	def __len__(self):
+		return len(self.values) + len(self.empty)
 
 	def __str__(self):
-		return str(self.root)
-
-class _RangeNode():
-	def __init__(self, start, end, val):
-		if end < start:
-			raise ValueError("Invalid range %d-%d" % (start, end))
-		self.start = start
-		self.end = end
-		self.left = None
-		self.right = None
-		self.val = val
+		return "\n".join("N %x-%x => %s" % r for r in self.ranges())
+
+class RangeMask():
+	"""
+	Precomputed coverage of range entries over positions 0 to size.
+	Each position stores the distance to the next covered position capped
+	at 255, so small width queries away from any range are answered with a
+	single index. Queries touching a range fall back to a bisect over the
+	sorted range ends.
+	"""
+
+	MAX_DIST = 255
+
+	def __init__(self, tree, size):
+		ranges = tree.ranges()
+		self.size = size
+		self.starts = [r[0] for r in ranges]
+		self.ends = [r[1] for r in ranges]
+		self.values = [r[2] for r in ranges]
+
+		ramp = bytes(range(self.MAX_DIST, 0, -1))
+		dist = bytearray()
+		pos = 0
+		for start, end, val in ranges:
+			start = min(start, size)
+			end = min(end, size)
+			if start > pos:
+				gap = start - pos
+				if gap > self.MAX_DIST:
+					dist += bytes([self.MAX_DIST]) * (gap - self.MAX_DIST)
+				dist += ramp[-min(gap, self.MAX_DIST):]
+			if end > start:
+				dist += bytes(end - max(start, pos))
+			pos = max(pos, end)
+		if pos < size:
+			dist += bytes([self.MAX_DIST]) * (size - pos)
+		self.dist = dist
 
-	def contains(self, index):
-		return self.start <= index and index < self.end
+	def find(self, index):
+		"""
+		Returns data value which index falls inside range entry
+		"""
+		if 0 <= index < self.size and self.dist[index] != 0:
+			return None
+		i = bisect.bisect_right(self.ends, index)
+		if i < len(self.starts) and self.starts[i] <= index:
+			return self.values[i]
+		return None
 
 	def intersects(self, start, end):
-		return min(self.end, end) - max(self.start, start) > 0
-
-	def width(self):
-		return self.end - self.start
-
-	def size(self):
-		c = 1
-		if self.left:
-			c = c + self.left.size()
-		if self.right:
-			c = c + self.right.size()
-		return c
-
-	def is_parent(self):
-		return self.val == None
-
-	def __str__(self):
-		if self.is_parent():
-			s = "{%x-%x (%x)\n" % (self.start, self.end, self.size())
-			s = s + "[%s]\n[%s] }" % (str(self.left), str(self.right))
-		else:
-			s = "N %x-%x => %s" % (self.start, self.end, str(self.val))
-		return s
+		"""
+		Returns left most data value that intersects with range
+		"""
+		if 0 <= start < self.size and end - start <= self.dist[start]:
+			return None
+		i = bisect.bisect_right(self.ends, start)
+		if i < len(self.starts) and self.starts[i] < end and start < end:
+			return self.values[i]
+		return None
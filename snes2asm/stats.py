@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+"""
+Per phase timing and counters of a disassembly run. Phases record wall
+time and cpu time. With memory tracking they also record the peak Python
+memory allocated since the outermost open phase began, traced with
+tracemalloc. Tracing runs only while phases are open, slows the run down
+and does not see the memory of pool worker processes.
+"""
+
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class Stats:
+
+	def __init__(self, memory=False):
+		self.phases = []
+		self.counters = {}
+		self.depth = 0
+		self.memory = memory
+		# Peak traced memory of each open phase
+		self.peaks = []
+		# Whether tracing was started by these stats
+		self.tracing = False
+
+	def fold_peak(self):
+		# Fold the peak since the last reset into every open phase
+		peak = tracemalloc.get_traced_memory()[1]
+		self.peaks = [max(p, peak) for p in self.peaks]
+		tracemalloc.reset_peak()
+
+	@contextmanager
+	def phase(self, name):
+		entry = {'name': name, 'depth': self.depth}
+		self.phases.append(entry)
+		self.depth += 1
+		if self.memory:
+			if not tracemalloc.is_tracing():
+				tracemalloc.start()
+				self.tracing = True
+			self.fold_peak()
+			self.peaks.append(tracemalloc.get_traced_memory()[0])
+		wall = time.perf_counter()
+		cpu = time.process_time()
+		try:
+			yield entry
+		finally:
+			entry['wall'] = time.perf_counter() - wall
+			entry['cpu'] = time.process_time() - cpu
+			if self.memory:
+				self.fold_peak()
+				entry['peak_memory'] = self.peaks.pop()
+			self.depth -= 1
+			if self.tracing and self.depth == 0:
+				tracemalloc.stop()
+				self.tracing = False
+
+	def count(self, name, value=1):
+		self.counters[name] = self.counters.get(name, 0) + value
+
+	def set(self, name, value):
+		self.counters[name] = value
+
+	def table(self):
+		lines = ["%-40s %10s %10s %10s" % ("Phase", "Wall (ms)", "CPU (ms)", "Peak (MB)")]
+		for entry in self.phases:
+			peak = entry.get('peak_memory')
+			lines.append("%-40s %10.1f %10.1f %10s" % (
+				("  " * entry['depth'] + entry['name'])[:40],
+				entry.get('wall', 0) * 1000,
+				entry.get('cpu', 0) * 1000,
+				"%.1f" % (peak / 1048576.0) if peak != None else "-"
+			))
+		lines.append("")
+		lines.append("%-40s %10s" % ("Counter", "Value"))
+		for name, value in sorted(self.counters.items()):
+			lines.append("%-40s %10d" % (name, value))
+		return "\n".join(lines) + "\n"
+
+	def json(self):
+		return json.dumps({'phases': self.phases, 'counters': self.counters}, indent=2, sort_keys=True)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+import random
 
 from snes2asm.compression import aplib
 
@@ -13,5 +14,31 @@ class AplibTest(unittest.TestCase):
 		stringBytes = bytearray("aaaaaaaaaaaaaacaaaaaa".encode('utf-8'))
 		self.assertEqual(stringBytes, aplib.decompress(aplib.compress(stringBytes)))
 
+	def test_find_longest_match(self):
+		rng = random.Random(0)
+		for n in range(0, 40):
+			data = bytes(rng.randrange(rng.randint(1, 4)) for i in range(rng.randint(1, 150)))
+			finder = aplib.match_finder(data)
+			for pos in range(0, len(data)):
+				self.assertEqual(brute_force(data, pos), finder.find(pos))
+
+	def test_large_data(self):
+		rng = random.Random(1)
+		block = bytes(rng.randrange(256) for i in range(0x100))
+		# Short matches far back cannot be encoded as blocks
+		data = bytearray(block[0:16] + bytes(rng.randrange(256) for i in range(33000)) + block[0:3] + block * 16)
+		self.assertEqual(data, aplib.decompress(aplib.compress(data)))
+
+def brute_force(data, pos):
+	# Longest match overlapping pos by at most one byte at the most recent offset
+	best = (0, 0)
+	for start in range(0, pos):
+		length = 0
+		while pos + length < len(data) and start + length <= pos and data[start + length] == data[pos + length]:
+			length += 1
+		if length and length >= best[1]:
+			best = (pos - start, length)
+	return best
+
 if __name__ == '__main__':
     unittest.main()
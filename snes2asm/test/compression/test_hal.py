@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+import random
 
 from snes2asm.compression import hal
+from snes2asm.compression.match import BIT_REVERSE
 
 class HalTest(unittest.TestCase):
 
@@ -214,6 +216,41 @@ class HalTest(unittest.TestCase):
 		self.assertEqual(data, decompressed2)
 		self.assertEqual(compressed1, compressed2)
 
+	def test_rotated_backref(self):
+		"""Test that slow mode references bit rotated earlier data."""
+		block = bytearray((i * 37 + 11) & 0xFF for i in range(64))
+		data = block + block.translate(BIT_REVERSE)
+		compressed = hal.compress(data, fast=False)
+		self.assertEqual(data, hal.decompress(compressed))
+		self.assertLess(len(compressed), len(hal.compress(data)))
+
+	def test_backward_backref(self):
+		"""Test that slow mode references earlier data read backwards."""
+		block = bytearray((i * 37 + 11) & 0xFF for i in range(64))
+		data = block + block[::-1]
+		compressed = hal.compress(data, fast=False)
+		self.assertEqual(data, hal.decompress(compressed))
+		self.assertLess(len(compressed), len(hal.compress(data)))
+
+	def test_slow_mode_roundtrip(self):
+		"""Test slow mode over data mixing every reference type."""
+		rng = random.Random(0)
+		data = bytearray()
+		while len(data) < 0x4000:
+			kind = rng.randrange(4)
+			if kind == 0 or len(data) < 16:
+				data += bytearray(rng.randrange(256) for i in range(rng.randint(1, 40)))
+			else:
+				pos = rng.randrange(len(data) - 8)
+				chunk = data[pos:pos+rng.randint(4, 300)]
+				if kind == 1:
+					chunk = chunk.translate(BIT_REVERSE)
+				elif kind == 2:
+					chunk = chunk[::-1]
+				data += chunk
+		self.assertEqual(data, hal.decompress(hal.compress(data, fast=False)))
+		self.assertEqual(data, hal.decompress(hal.compress(data)))
+
 
 if __name__ == '__main__':
 	unittest.main()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import random
+
+from snes2asm import compression
+from snes2asm.compression import lz1, lz2, lz3, lz5, lz19
+from snes2asm.compression.lz import LEVELS
+
+CODECS = [lz1, lz2, lz3, lz5, lz19]
+
+def sample_data(rng, size):
+	# Runs, words, sequences and repeated chunks like tile data
+	data = bytearray()
+	while len(data) < size:
+		kind = rng.randrange(5)
+		if kind == 0:
+			data += bytes([rng.randrange(256)]) * rng.randint(1, 80)
+		elif kind == 1:
+			data += bytes([rng.randrange(256), rng.randrange(256)]) * rng.randint(1, 40)
+		elif kind == 2:
+			start = rng.randrange(256)
+			data += bytes((start + i) & 0xFF for i in range(rng.randint(1, 40)))
+		elif kind == 3 and len(data) > 8:
+			pos = rng.randrange(len(data) - 4)
+			data += data[pos:pos+rng.randint(4, 64)]
+		else:
+			data += bytes(rng.randrange(256) for i in range(rng.randint(1, 20)))
+	return data[0:size]
+
+def repeated_data(rng, size):
+	# Long repeated slices with occasional changes, matched far beyond
+	# the bounded optimal search
+	data = bytearray(rng.randrange(256) for i in range(256))
+	while len(data) < size:
+		if rng.randrange(4) < 3:
+			pos = rng.randrange(len(data) - 8)
+			chunk = data[pos:pos+rng.randint(8, 600)]
+			if rng.random() < 0.5:
+				chunk[rng.randrange(len(chunk))] ^= rng.randrange(1, 256)
+			data += chunk
+		else:
+			data += bytes([rng.randrange(256)]) * rng.randint(1, 40)
+	return data[0:size]
+
+class LzLevelTest(unittest.TestCase):
+
+	def test_levels(self):
+		rng = random.Random(0)
+		samples = [bytearray(), bytearray([7]), bytearray(2000), bytearray([1, 2] * 1500)]
+		samples += [sample_data(rng, rng.randint(1, 3000)) for i in range(0, 12)]
+		for codec in CODECS:
+			for data in samples:
+				sizes = {}
+				for level in LEVELS:
+					packed = codec.compress(bytearray(data), level)
+					self.assertEqual(data, codec.decompress(packed), "%s %s" % (codec.__name__, level))
+					sizes[level] = len(packed)
+				self.assertLessEqual(sizes['optimal'], sizes['greedy'], codec.__name__)
+
+	def test_optimal_size(self):
+		data = repeated_data(random.Random(5), 0x8000)
+		self.assertLessEqual(len(lz3.compress(bytearray(data), 'optimal')), len(lz3.compress(bytearray(data), 'greedy')))
+
+	def test_long_reverse(self):
+		# Reverse copies longer than a long command cannot be shortened
+		rng = random.Random(2)
+		block = bytearray(rng.randrange(256) for i in range(1100))
+		data = block + block[::-1]
+		for codec in CODECS:
+			for level in LEVELS:
+				self.assertEqual(data, codec.decompress(codec.compress(bytearray(data), level)), "%s %s" % (codec.__name__, level))
+
+	def test_default_level(self):
+		data = sample_data(random.Random(1), 1000)
+		for codec in CODECS:
+			self.assertEqual(codec.compress(bytearray(data)), codec.compress(bytearray(data), 'greedy'))
+
+	def test_names(self):
+		# Shared helper modules are not encodings
+		names = compression.get_names()
+		self.assertIn('lz2', names)
+		self.assertNotIn('lz', names)
+		self.assertNotIn('match', names)
+
+	def test_level_names(self):
+		# Every encoding lists its levels by name
+		for name in compression.get_names():
+			self.assertIsInstance(compression.get_levels(name), list, name)
+		self.assertEqual(['fast', 'greedy', 'lazy'], compression.get_levels('lz77'))
+
+	def test_unsupported_level(self):
+		with self.assertRaises(ValueError):
+			lz2.compress(bytearray(10), 'best')
+		with self.assertRaises(ValueError):
+			compression.compress('rle1', bytearray(10), 'optimal')
+		self.assertEqual(compression.compress('lz2', bytearray(10), 'optimal'), lz2.compress(bytearray(10), 'optimal'))
+
+if __name__ == '__main__':
+	unittest.main()
@@ -20,5 +20,34 @@ class lz4_Test(unittest.TestCase):
         stringBytes = bytearray("aaaaaaaaaa12345cacacacaaaa6ca7c712a6b2248dc409d34b82e58876123a".encode('utf-8'))
         self.assertEqual(stringBytes, lz4.decompress(lz4.compress(stringBytes)))
 
+    def test_long_runs(self):
+
+        literalBytes = bytearray(range(0, 256)) * 2 + bytearray(range(0, 40))
+        self.assertEqual(literalBytes, lz4.decompress(lz4.compress(literalBytes)))
+
+        repeatBytes = bytearray(b'\x01\x02\x03') * 1000 + bytearray(range(0, 20))
+        packed = lz4.compress(repeatBytes)
+        self.assertEqual(repeatBytes, lz4.decompress(packed))
+        self.assertLess(len(packed), 64)
+
+    def test_acceleration(self):
+
+        tile = bytearray([0x00, 0xFF, 0x0F, 0xF0, 0x33, 0xCC, 0x55, 0xAA])
+        data = bytearray()
+        for i in range(0, 512):
+            data += tile[i % 8:] + bytearray([i & 0xFF, i >> 8]) + tile[:i % 5]
+        for acceleration in [1, 2, 8, 64]:
+            self.assertEqual(data, lz4.decompress(lz4.compress(data, acceleration)))
+        self.assertLessEqual(len(lz4.compress(data, 1)), len(lz4.compress(data, 64)))
+
+        with self.assertRaises(ValueError):
+            lz4.compress(data, 0)
+
+    def test_large_input(self):
+
+        # Sources past the 16-bit offset range are not referenced
+        data = bytearray(range(0, 256)) * 300
+        self.assertEqual(data, lz4.decompress(lz4.compress(data)))
+
 if __name__ == '__main__':
     unittest.main()
@@ -170,6 +170,29 @@ class TestLZ77(unittest.TestCase):
         with self.assertRaises(TypeError):
             lz77.decompress("not bytes")
 
+    def test_levels(self):
+        """Test every compression level against the same data"""
+        tile = b'\x00\xFF\x0F\xF0\x33\xCC\x55\xAA' * 4
+        data = tile * 8 + bytes(range(256)) + b'\x00\x00\x01\x01\x02\x02' * 50 + tile[::-1] * 8
+        for level in lz77.LEVELS:
+            compressed = lz77.compress(data, level)
+            self.assertEqual(lz77.decompress(compressed), data)
+            self.assertLess(len(compressed), len(data) // 2)
+
+    def test_lazy_matching(self):
+        """Test that a literal is emitted before a longer match"""
+        # 'ABC' matches at once but 'BCDEFGH' is longer one byte later
+        data = b'ABCxBCDEFGHyABCDEFGH'
+        greedy = lz77.compress(data, 'greedy')
+        lazy = lz77.compress(data, 'lazy')
+        self.assertEqual(lz77.decompress(lazy), data)
+        self.assertLess(len(lazy), len(greedy))
+
+    def test_invalid_level(self):
+        """Test that an unknown level raises ValueError"""
+        with self.assertRaises(ValueError):
+            lz77.compress(b'data', 'optimal')
+
 
 class TestLZ77EdgeCases(unittest.TestCase):
     """Test edge cases and boundary conditions"""
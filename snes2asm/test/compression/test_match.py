@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import random
+
+from snes2asm.compression.match import MatchFinder, INVERT, BIT_REVERSE, suffix_array, previous_match_lengths, increasing, repeat_copy
+from snes2asm.compression import lz1, lz2, lz3, lz5, lz19
+
+def brute_force(data, offset, table=None):
+	target = bytes(data).translate(table) if table else data
+	best = (0, 0)
+	for index in range(0, offset):
+		length = 0
+		while offset + length < len(data) and data[index + length] == target[offset + length]:
+			length += 1
+		if length > best[0]:
+			best = (length, index)
+	return best
+
+def brute_force_reverse(data, offset):
+	best = (0, 0)
+	for index in range(offset - 1, -1, -1):
+		length = 0
+		while offset + length < len(data) and index - length >= 0 and data[index - length] == data[offset + length]:
+			length += 1
+		if length > best[0]:
+			best = (length, index - length + 1)
+	return best
+
+class MatchTest(unittest.TestCase):
+
+	def test_longest(self):
+		rng = random.Random(0)
+		for n in range(0, 60):
+			data = bytearray(rng.randrange(rng.randint(1, 4)) * 0x55 for i in range(rng.randint(0, 120)))
+			finder = MatchFinder(data)
+			for offset in range(0, len(data)):
+				self.assertEqual(brute_force(data, offset), finder.longest(offset))
+				self.assertEqual(brute_force(data, offset, INVERT), finder.longest(offset, INVERT))
+				self.assertEqual(brute_force(data, offset, BIT_REVERSE), finder.longest(offset, BIT_REVERSE))
+				self.assertEqual(brute_force_reverse(data, offset), finder.longest_reverse(offset))
+
+	def test_roundtrip(self):
+		overlap = bytearray(b'abcabcabcabcabcabcx')
+		long_run = bytearray([7] * 3000 + [1, 2] * 1500)
+		reverse = bytearray([0, 2, 0, 2, 2, 1, 1, 0, 2, 0, 0, 2])
+		# Reverse copies longer than a long command
+		rng = random.Random(3)
+		block = bytearray(rng.randrange(256) for i in range(1100))
+		long_reverse = block + block[::-1]
+		for module in [lz1, lz2, lz3, lz5, lz19]:
+			for data in [overlap, long_run, reverse, long_reverse]:
+				self.assertEqual(data, module.decompress(module.compress(data)))
+
+	def test_suffix_array(self):
+		rng = random.Random(1)
+		for n in range(0, 60):
+			data = bytes(rng.randrange(rng.randint(1, 4)) for i in range(rng.randint(0, 200)))
+			order, rank = suffix_array(data)
+			self.assertEqual(sorted(range(0, len(data)), key=lambda i: data[i:]), order)
+			self.assertEqual(list(range(0, len(data))), [rank[i] for i in order])
+			self.assertEqual([brute_force(data, offset)[0] for offset in range(0, len(data))], previous_match_lengths(data))
+
+	def test_repeat_copy(self):
+		rng = random.Random(2)
+		for n in range(0, 200):
+			out = bytearray(rng.randrange(256) for i in range(rng.randint(1, 20)))
+			start = rng.randrange(len(out))
+			length = rng.randint(1, 100)
+			table = rng.choice([None, INVERT, BIT_REVERSE])
+			# Byte at a time copy reading the bytes it writes
+			expected = bytearray(out)
+			for pos in range(start, start + length):
+				expected.append(table[expected[pos]] if table else expected[pos])
+			self.assertEqual(expected[len(out):], repeat_copy(out, start, length, table))
+
+	def test_increasing(self):
+		for start, length in [(0, 0), (5, 10), (250, 10), (255, 1024), (128, 3000)]:
+			self.assertEqual(bytes((start + i) & 0xFF for i in range(length)), increasing(start, length))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,5 +14,8 @@ class RLE2Test(unittest.TestCase):
 		stringBytes = bytearray("azazaz12222234".encode('utf-8'))
 		self.assertEqual(stringBytes, rle2.decompress(rle2.compress(stringBytes)))
 
+		stringBytes = bytearray("abababa".encode('utf-8'))
+		self.assertEqual(stringBytes, rle2.decompress(rle2.compress(stringBytes)))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import shutil
+import tempfile
+from argparse import Namespace
+from snes2asm import batch
+
+class BatchTest(unittest.TestCase):
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.rom = os.path.join(os.path.dirname(__file__), 'classickong.smc')
+		self.options = Namespace(input=None, verbose=None, output_dir=self.path, config=None, banks=None, hirom=None, lorom=None, fastrom=None, slowrom=None, nolabel=None, empty_fill=255, hex=None, mmap=None, jobs=2, cache=None, cache_dir=None, cache_size=0, stats=None, stats_json=None, batch=None, timeout=None, batch_report=None)
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def manifest(self, text):
+		file_path = os.path.join(self.path, 'manifest.yaml')
+		f = open(file_path, 'w')
+		f.write(text)
+		f.close()
+		return file_path
+
+	def test_load_manifest(self):
+		jobs, timeout = batch.load_manifest(self.manifest("timeout: 30\njobs:\n  - rom: a.sfc\n    config: a.yaml\n    output: out/a\n  - rom: roms/b.smc\n    options:\n      hirom: true\n"), '/out')
+		self.assertEqual(30, timeout)
+		self.assertEqual(os.path.join(self.path, 'a.sfc'), jobs[0].rom)
+		self.assertEqual(os.path.join(self.path, 'a.yaml'), jobs[0].config)
+		self.assertEqual(os.path.join(self.path, 'out/a'), jobs[0].output)
+		self.assertEqual('/out/b', jobs[1].output)
+
+		options = jobs[1].command_options(self.options)
+		self.assertTrue(options.hirom)
+		self.assertEqual(1, options.jobs)
+		self.assertEqual(None, self.options.hirom)
+
+		self.assertRaises(ValueError, batch.load_manifest, self.manifest("jobs:\n  - rom: a.sfc\n    options:\n      jobs: 4\n"))
+		self.assertRaises(ValueError, batch.load_manifest, self.manifest("jobs:\n  - config: a.yaml\n"))
+
+	def test_run_batch(self):
+		jobs = [batch.BatchJob(self.rom, output=os.path.join(self.path, 'out', 'rom')), batch.BatchJob(os.path.join(self.path, 'missing.smc'), output=self.path)]
+		results = batch.run_batch(jobs, self.options, 2)
+
+		self.assertEqual(['ok', 'failed'], [result['status'] for result in results])
+		self.assertTrue(os.path.isfile(os.path.join(self.path, 'out', 'rom', 'bank0.asm')))
+		self.assertGreater(results[0]['counters']['instructions'], 0)
+		self.assertIn('FileNotFoundError', results[1]['error'])
+		self.assertEqual({'ok': 1, 'failed': 1, 'timeout': 0, 'jobs': 2, 'seconds': 1.0}, batch.summary(results, 1.0))
+
+	def test_timeout(self):
+		results = batch.run_batch([batch.BatchJob(self.rom, output=self.path)], self.options, 1, 0.01)
+		self.assertEqual('timeout', results[0]['status'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import shutil
+import tempfile
+from argparse import Namespace
+from snes2asm.cartridge import Cartridge
+from snes2asm.disassembler import Disassembler
+from snes2asm.decoder import Headers, PaletteDecoder, GraphicDecoder
+from snes2asm.cache import AnalysisCache, describe
+
+class CacheTest(unittest.TestCase):
+
+	def setUp(self):
+		self.cart = Cartridge()
+		self.cart.open(os.path.join(os.path.dirname(__file__), 'classickong.smc'))
+		self.path = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.path)
+
+	def disassemble(self, width=128, jobs=1):
+		disasm = Disassembler(self.cart, Namespace(hex=None, nolabel=None, jobs=jobs))
+		disasm.cache = AnalysisCache(self.path, self.cart)
+		disasm.add_decoder(Headers(self.cart.header, self.cart.header+80))
+		palette = PaletteDecoder(0x1FB00, 0x1FC00, label='pal')
+		disasm.add_decoder(palette)
+		disasm.add_decoder(GraphicDecoder('gfx', 0x1FC00, 0x20000, palette=palette, width=width))
+		disasm.run()
+		banks = list(range(0, self.cart.bank_count()))
+		return disasm, [text for text, in disasm.banks_lines(banks)]
+
+	def test_rerun(self):
+		disasm, output = self.disassemble()
+		self.assertEqual(0, disasm.cache.hits)
+
+		# Unchanged inputs are restored from the cache
+		cached, cached_output = self.disassemble()
+		self.assertEqual(0, cached.cache.misses)
+		self.assertTrue(cached.code_cached)
+		self.assertEqual(output, cached_output)
+		self.assertEqual(disasm.decoders.find(0x1FC00).files, cached.decoders.find(0x1FC00).files)
+
+		# Only the edited decoder and its bank are recomputed
+		edited, edited_output = self.disassemble(width=64)
+		self.assertEqual(2, edited.cache.misses)
+		self.assertEqual(output, edited_output)
+
+	def test_jobs(self):
+		disasm, output = self.disassemble()
+		shutil.rmtree(self.path)
+		os.mkdir(self.path)
+
+		# Banks missing from the cache are rendered on the pool
+		pooled, pooled_output = self.disassemble(jobs=2)
+		self.assertEqual(output, pooled_output)
+		self.assertEqual(self.cart.bank_count() + 4, pooled.cache.misses)
+
+		# Including banks of a cached analysis
+		for name in os.listdir(self.path):
+			if name.startswith('bank-'):
+				os.remove(os.path.join(self.path, name))
+		restored, restored_output = self.disassemble(jobs=2)
+		self.assertTrue(restored.code_cached)
+		self.assertEqual(output, restored_output)
+		self.assertEqual(self.cart.bank_count(), restored.cache.misses)
+
+	def test_rom_revision(self):
+		self.disassemble()
+
+		# Decoders over unchanged data are shared with other revisions of the rom
+		self.cart.data[0x10000] ^= 0xFF
+		revision, output = self.disassemble()
+		self.assertFalse(revision.code_cached)
+		self.assertEqual(3, revision.cache.hits)
+		self.assertEqual(self.cart.bank_count() + 1, revision.cache.misses)
+
+	def test_evict(self):
+		disasm, output = self.disassemble()
+		entries = len(os.listdir(self.path))
+		self.assertEqual(0, disasm.cache.evict())
+
+		# Least recently used entries are removed first
+		old = os.path.join(self.path, sorted(os.listdir(self.path))[0])
+		os.utime(old, (0, 0))
+		disasm.cache.max_size = sum(os.path.getsize(os.path.join(self.path, f)) for f in os.listdir(self.path)) - 1
+		self.assertEqual(1, disasm.cache.evict())
+		self.assertFalse(os.path.exists(old))
+		self.assertEqual(entries - 1, len(os.listdir(self.path)))
+
+	def test_describe(self):
+		palette = PaletteDecoder(0, 32, label='pal')
+		gfx = GraphicDecoder('gfx', 0, 32, palette=palette)
+		self.assertEqual(describe(gfx), describe(GraphicDecoder('gfx', 0, 32, palette=PaletteDecoder(0, 32, label='pal'))))
+		self.assertNotEqual(describe(gfx), describe(GraphicDecoder('gfx', 0, 32, palette=PaletteDecoder(0, 64, label='pal'))))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,8 @@
 
 import unittest
 import os
+import shutil
+import tempfile
 from snes2asm.cartridge import Cartridge
 
 class CartridgeTest(unittest.TestCase):
@@ -45,5 +47,50 @@ class CartridgeTest(unittest.TestCase):
 		self.assertEqual(0x80B7, self.cart.evec_reset)
 		self.assertEqual(0x8000, self.cart.evec_irq)
 
+	def test_maps(self):
+		# LoROM
+		self.assertEqual(0x018000, self.cart.address(0x8000))
+		self.assertEqual(0x80B7, self.cart.index(self.cart.evec_reset) + 0x8000)
+		self.assertEqual([0x8000, -1, -1, 0x8000], self.cart.indexes([0x018000, 0x010000, 0x7E8000, 0x818000]))
+
+		for extended, hirom, size, address in [(False, False, 0x200000, 0x808000), (False, True, 0x400000, 0xC00000), (True, False, 0x600000, 0x808000), (True, True, 0x600000, 0xC00000)]:
+			cart = Cartridge()
+			cart.data = bytearray(size)
+			cart.extended = extended
+			cart.hirom = hirom
+			cart.build_maps()
+
+			# Rom positions translate to addresses and back
+			positions = list(range(0, size, 0x2345))
+			self.assertEqual(positions, cart.indexes(cart.addresses(positions)))
+			self.assertEqual(0, cart.index(address))
+			self.assertEqual(-1, cart.index(0x7E8000))
+			self.assertEqual(-1, cart.index(0x000000))
+
+		# ExHiROM upper 4MB in banks 40-7D and 00-3F
+		self.assertEqual([0x400000, 0x408000, 0x5FFFFF, -1], cart.indexes([0x400000, 0x008000, 0x5FFFFF, 0x000000]))
+		self.assertEqual(0xC08000, cart.address(0x8000))
+		self.assertEqual(0x410000, cart.address(0x410000))
+
+	def test_mmap(self):
+		path = tempfile.mkdtemp()
+		try:
+			# Rom with a copier header
+			filename = os.path.join(path, 'copier.smc')
+			f = open(filename, 'wb')
+			f.write(bytes(0x200) + self.cart.data)
+			f.close()
+
+			cart = Cartridge({'mmap': True})
+			cart.open(filename)
+			self.assertIsInstance(cart[0:16], memoryview)
+			self.assertEqual(self.cart.size(), cart.size())
+			self.assertEqual(self.cart[0x7FB0:0x8000], cart[0x7FB0:0x8000])
+			self.assertEqual(self.cart.title, cart.title)
+			self.assertEqual(self.cart.evec_reset, cart.evec_reset)
+			del cart
+		finally:
+			shutil.rmtree(path)
+
 if __name__ == '__main__':
     unittest.main()
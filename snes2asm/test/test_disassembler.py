@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+from argparse import Namespace
+from snes2asm.cartridge import Cartridge
+from snes2asm.disassembler import Disassembler, OpcodeRecord
+from snes2asm.decoder import Headers
+from snes2asm.configurator import Configurator
+
+class DisassemblerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.cart = Cartridge()
+		self.cart.open(os.path.join(os.path.dirname(__file__), 'classickong.smc'))
+		self.disasm = Disassembler(self.cart, Namespace(hex=None, nolabel=None))
+
+	def test_trace_code(self):
+		reset = self.cart.index(self.cart.evec_reset)
+		nodes = self.disasm.trace_code(reset)
+
+		self.assertGreater(nodes, 1)
+		self.assertTrue(self.disasm.code_map[reset] & Disassembler.OP_CODE)
+
+		# Already traced code is only visited once
+		self.assertEqual(1, self.disasm.trace_code(reset))
+		self.assertEqual(0, self.disasm.trace_code(-1))
+
+	def test_mark_code(self):
+		self.disasm.flags = Disassembler.OP_ACC16
+		self.disasm.mark_code(0x10, 3)
+		self.assertEqual(bytearray([0, 0x21, 2, 2, 0]), self.disasm.code_map[0xF:0x14])
+
+		# Operands are clipped at the end of the rom
+		size = self.cart.size()
+		self.disasm.mark_code(size - 2, 4)
+		self.assertEqual(size, len(self.disasm.code_map))
+		self.assertEqual(Disassembler.OP_PARAM, self.disasm.code_map[size - 1])
+
+	def test_format_op(self):
+		self.disasm.pos = 0x10
+		self.cart.data[0x10:0x14] = bytearray([0xA9, 0x34, 0x12, 0x00])
+
+		# Immediate size follows the accumulator flag
+		self.disasm.flags = 0
+		self.assertEqual(3, self.disasm.opSize(0xA9))
+		self.assertEqual("lda #$1234.w", self.disasm.format_op(0xA9).code)
+		self.disasm.flags = Disassembler.OP_ACC16
+		self.assertEqual(2, self.disasm.opSize(0xA9))
+		self.assertEqual("lda #$34.b", self.disasm.format_op(0xA9).code)
+
+		# Register symbols and variables
+		ins = self.disasm.format_op(0x8D)
+		self.assertEqual(("sta $1234.w", None), (ins.code, ins.comment))
+		self.cart.data[0x11:0x13] = bytearray([0x00, 0x21])
+		ins = self.disasm.format_op(0x8D)
+		self.assertEqual(("sta INIDSP.w", "Screen Display"), (ins.code, ins.comment))
+		self.disasm.set_memory(0x00, "counter")
+		self.assertEqual("lda counter.b,X", self.disasm.format_op(0xB5).code)
+
+		# Flag changes
+		self.cart.data[0x11] = 0x30
+		ins = self.disasm.format_op(0xC2)
+		self.assertEqual(("rep #$30", ".ACCU 16\n.INDEX 16"), (ins.code, ins.preamble))
+		self.assertEqual(0, self.disasm.flags)
+
+	def test_render_op(self):
+		reset = self.cart.index(self.cart.evec_reset)
+		self.disasm.trace_code(reset)
+		self.disasm.decode(reset, reset + 16)
+
+		# Opcodes are kept as records until rendered
+		record = self.disasm.code[reset]
+		self.assertIsInstance(record, OpcodeRecord)
+		self.assertEqual(reset, record.pos)
+
+		self.disasm.flags = 0
+		ins = self.disasm.render_op(record)
+		self.assertEqual(self.disasm.format_op(self.cart[reset]).code, ins.code)
+		self.assertEqual(record.flags, self.disasm.code_map[reset] & Disassembler.OP_FLAGS)
+
+	def test_find_valid_code_paths(self):
+		self.disasm.find_valid_code_paths()
+		self.assertGreater(self.disasm.trace_nodes, 0)
+		self.assertEqual(0, self.disasm.pos)
+
+	def test_parallel_banks(self):
+		banks = list(range(0, self.cart.bank_count()))
+		output = []
+		for jobs in [1, 2]:
+			disasm = Disassembler(self.cart, Namespace(hex=None, nolabel=None, jobs=jobs))
+			disasm.add_decoder(Headers(self.cart.header, self.cart.header+80))
+			disasm.run()
+			output.append(list(disasm.banks_code(banks)))
+
+		self.assertEqual(output[0], output[1])
+
+	def test_parallel_decoders(self):
+		output = []
+		for jobs in [1, 2]:
+			disasm = Disassembler(self.cart, Namespace(hex=None, nolabel=None, jobs=jobs))
+			Configurator(os.path.join(os.path.dirname(__file__), 'classickong.yaml')).apply(disasm)
+			order = disasm.decoder_order()
+			components = disasm.decoder_components(order)
+			disasm.run_decoders()
+			files = [decoder.files for decoder in order]
+			code = [(pos, instr.text()) for pos, instr in disasm.code.items()]
+			output.append((files, code, disasm.data_labels))
+
+		# Palettes are grouped with the graphics using them
+		self.assertLess(len(components), len(order))
+		self.assertEqual(sorted(sum(components, [])), list(range(0, len(order))))
+		self.assertEqual(output[0], output[1])
+
+	def test_bank_lines(self):
+		self.disasm.add_decoder(Headers(self.cart.header, self.cart.header+80))
+		self.disasm.run()
+
+		lines = list(self.disasm.bank_lines(1))
+		self.assertEqual(".ENDS\n", lines[-1])
+		self.assertEqual(self.disasm.bank_code(1), "".join(lines))
+
+		# Written banks can be released
+		self.disasm.release_bank(1)
+		bank_size = self.cart.bank_size()
+		self.assertEqual([], self.disasm.code.item_range(bank_size, bank_size * 2))
+		self.assertNotEqual([], self.disasm.code.item_range(0, bank_size))
+
+if __name__ == '__main__':
+    unittest.main()
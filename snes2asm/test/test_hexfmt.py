@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from snes2asm import hexfmt
+
+class HexFmtTest(unittest.TestCase):
+
+	data = bytearray([0x00, 0x01, 0x7F, 0x80, 0xFE, 0xFF, 0x12, 0x34, 0x56, 0x78, 0x9A, 0xBC])
+
+	def test_hex_text(self):
+		self.assertEqual('', hexfmt.hex_text(b''))
+		self.assertEqual('$00, $01, $7F', hexfmt.hex_text(self.data[0:3]))
+		self.assertEqual('$0100, $807F, $FFFE', hexfmt.hex_text(self.data[0:6], 2))
+		self.assertEqual('$7F0100, $FFFE80', hexfmt.hex_text(self.data[0:6], 3))
+		self.assertEqual('$807F0100, $3412FFFE', hexfmt.hex_text(self.data[0:8], 4))
+		self.assertEqual('$00, $01', hexfmt.hex_text(memoryview(self.data)[0:2]))
+
+	def test_data_lines(self):
+		data = bytearray(range(0, 40))
+		for size, directive, form in [(1, '.db', '$%02X'), (2, '.dw', '$%04X'), (4, '.dd', '$%08X')]:
+			lines = list(hexfmt.data_lines(data, size))
+			self.assertEqual([0, 16, 32], [y for y, line in lines])
+			values = hexfmt.unpack_values(data[32:40], size)
+			self.assertEqual(directive + ' ' + ', '.join(form % v for v in values), lines[-1][1])
+
+		# 24-bit rows are cut at whole values
+		lines = list(hexfmt.data_lines(data[0:30], 3))
+		self.assertEqual([(0, '.dl $020100, $050403, $080706, $0B0A09, $0E0D0C'), (15, '.dl $11100F, $141312, $171615, $1A1918, $1D1C1B')], lines)
+
+		lines = list(hexfmt.data_lines(data[0:36], 3, 18))
+		self.assertEqual([(0, '.dl $020100, $050403, $080706, $0B0A09, $0E0D0C, $11100F'), (18, '.dl $141312, $171615, $1A1918, $1D1C1B, $201F1E, $232221')], lines)
+
+	def test_partial_values(self):
+		# Bytes short of a whole value are written as bytes
+		self.assertEqual('$0100', hexfmt.hex_text(self.data[0:3], 2))
+		self.assertEqual('$807F0100', hexfmt.hex_text(self.data[0:7], 4))
+		self.assertEqual([(0, '.dd $807F0100'), (4, '.db $FE, $FF, $12')], list(hexfmt.data_lines(self.data[0:7], 4)))
+		self.assertEqual([(0, '.dw $0100, $807F, $FFFE, $3412'), (8, '.dw $7856'), (10, '.db $9A')], list(hexfmt.data_lines(self.data[0:11], 2, 8)))
+		self.assertEqual([(0, '.db $00, $01')], list(hexfmt.data_lines(self.data[0:2], 3)))
+		self.assertEqual([0x0100], hexfmt.unpack_values(self.data[0:3], 2))
+
+	def test_unpack_values(self):
+		self.assertEqual([0x0100, 0x807F], hexfmt.unpack_values(self.data[0:4], 2))
+		self.assertEqual([0x7F0100, 0xFFFE80], hexfmt.unpack_values(self.data[0:6], 3))
+		self.assertEqual([0x807F0100], hexfmt.unpack_values(self.data[0:4], 4))
+		self.assertRaises(ValueError, hexfmt.unpack_values, self.data, 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+import copy
+import pickle
 from snes2asm.disassembler import OrderedDictRange
 
 class OrderedDictRangeTest(unittest.TestCase):
@@ -21,5 +23,67 @@ class OrderedDictRangeTest(unittest.TestCase):
 		self.dict.sort_keys()
 		self.assertEqual([(1, 'A')], self.dict.item_range(1,2) )
 
+	def test_unordered_insert(self):
+
+		self.dict[0] = '#'
+		self.dict[10] = 'J'
+		self.dict[5] = 'E'
+		self.assertEqual([(0, '#'), (1, 'A')], self.dict.item_range(0,2) )
+		self.assertEqual([(4, 'D'), (5, 'E'), (10, 'J')], self.dict.item_range(4,11) )
+		self.assertEqual([0, 1, 2, 3, 4, 5, 10], list(self.dict) )
+
+	def test_delete(self):
+
+		self.dict[0] = '#'
+		del self.dict[0]
+		del self.dict[2]
+		self.assertEqual('D', self.dict.pop(4))
+		self.assertEqual([(1, 'A'), (3, 'C')], self.dict.item_range(0,10) )
+
+	def test_delete_range(self):
+
+		self.dict[0] = '#'
+		self.dict.delete_range(1, 4)
+		self.assertEqual([(0, '#'), (4, 'D')], self.dict.item_range(0,10) )
+		self.assertEqual(2, len(self.dict))
+
+	def test_dict_methods(self):
+
+		self.assertEqual('B', self.dict.setdefault(2, '#'))
+		self.assertEqual('E', self.dict.setdefault(0, 'E'))
+		self.assertEqual([(0, 'E'), (1, 'A')], self.dict.item_range(0,2) )
+		self.assertEqual((4, 'D'), self.dict.popitem())
+		self.assertEqual([0, 1, 2, 3], list(self.dict) )
+		self.assertEqual([(3, 'C')], self.dict.item_range(3,10) )
+
+		clone = self.dict.copy()
+		self.assertIsInstance(clone, OrderedDictRange)
+		clone[-1] = 'Z'
+		self.assertEqual([-1, 0, 1, 2, 3], list(clone) )
+		self.assertEqual([0, 1, 2, 3], list(self.dict) )
+
+		merged = self.dict | {9: 'I'}
+		self.assertIsInstance(merged, OrderedDictRange)
+		self.assertEqual([(3, 'C'), (9, 'I')], merged.item_range(3,10) )
+		self.dict |= {7: 'G'}
+		self.assertEqual([(3, 'C'), (7, 'G')], self.dict.item_range(3,10) )
+
+		keys = OrderedDictRange.fromkeys([5, 3], 0)
+		self.assertIsInstance(keys, OrderedDictRange)
+		self.assertEqual([(3, 0), (5, 0)], keys.item_range(0,10) )
+
+		empty = OrderedDictRange()
+		self.assertRaises(KeyError, empty.popitem)
+
+	def test_pickle(self):
+
+		self.dict[0] = '#'
+		for clone in [pickle.loads(pickle.dumps(self.dict)), copy.copy(self.dict)]:
+			self.assertEqual([(0, '#'), (1, 'A')], clone.item_range(0,2) )
+			# Copies keep their own key index
+			clone[10] = 'J'
+			self.assertEqual([0, 1, 2, 3, 4, 10], list(clone) )
+			self.assertEqual([0, 1, 2, 3, 4], list(self.dict) )
+
 if __name__ == '__main__':
     unittest.main()
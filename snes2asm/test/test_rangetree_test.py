@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import unittest
-from snes2asm.rangetree import RangeTree
+from snes2asm.rangetree import RangeTree, RangeMask
 
 class RangeTreeTest(unittest.TestCase):
 	
@@ -24,5 +24,32 @@ class RangeTreeTest(unittest.TestCase):
 
 		self.assertEqual(['A','M','B','C'], self.tree.items() )
 
+	def test_conflict(self):
+
+		self.tree.add(10, 20, 'A')
+		self.tree.add(0, 10, 'B')
+		self.tree.add(20, 20, 'E')
+		self.assertRaises(ValueError, self.tree.add, 15, 25, 'C')
+		self.assertRaises(ValueError, self.tree.add, 5, 4, 'D')
+		self.assertEqual(['B','A','E'], self.tree.items() )
+		self.assertEqual(None, self.tree.find(20) )
+
+	def test_mask(self):
+
+		self.tree.add(0, 5, 'A')
+		self.tree.add(600, 610, 'B')
+		self.tree.add(10, 15, 'M')
+
+		mask = RangeMask(self.tree, 1000)
+		self.assertEqual(1000, len(mask.dist))
+		self.assertEqual('A', mask.find(4) )
+		self.assertEqual(None, mask.find(5) )
+		self.assertEqual('M', mask.find(10) )
+		self.assertEqual(None, mask.find(700) )
+		self.assertEqual(None, mask.intersects(5, 10) )
+		self.assertEqual('M', mask.intersects(7, 11) )
+		self.assertEqual('B', mask.intersects(20, 900) )
+		self.assertEqual(None, mask.intersects(610, 2000) )
+
 if __name__ == '__main__':
     unittest.main()
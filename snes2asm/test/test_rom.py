@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from argparse import Namespace
+from snes2asm.cartridge import Cartridge
+from snes2asm.disassembler import Disassembler
+from snes2asm.benchmark.rom import make_rom
+
+class RomTest(unittest.TestCase):
+
+	def cartridge(self, size, mapping):
+		data = make_rom(size, mapping)
+		cart = Cartridge({})
+		cart.set(data)
+		self.assertEqual(sum(data) & 0xFFFF, cart.check_sum)
+		self.assertEqual(0xFFFF, cart.check_sum ^ cart.comp_check)
+		return cart
+
+	def test_mapping(self):
+		lorom = self.cartridge(0x20000, 'lorom')
+		self.assertFalse(lorom.hirom)
+		hirom = self.cartridge(0x40000, 'hirom')
+		self.assertTrue(hirom.hirom)
+		exhirom = self.cartridge(0x410000, 'exhirom')
+		self.assertTrue(exhirom.hirom and exhirom.extended)
+
+		# Reset code jumps to the entry routine of every bank
+		reset = exhirom.index(exhirom.evec_reset)
+		self.assertEqual(0x408000, reset)
+		self.assertEqual(bytearray([0x78, 0x18, 0xFB, 0xC2, 0x30, 0x22]), exhirom.data[reset:reset+6])
+
+		self.assertRaises(ValueError, make_rom, 0x400000, 'exhirom')
+		self.assertRaises(ValueError, make_rom, 0x20000, 'exlorom')
+		self.assertEqual(make_rom(0x20000, 'lorom', 1), make_rom(0x20000, 'lorom', 1))
+
+	def test_trace(self):
+		cart = self.cartridge(0x40000, 'hirom')
+		disasm = Disassembler(cart, Namespace(hex=None, nolabel=None))
+		disasm.find_valid_code_paths()
+
+		# Code is traced in every bank
+		bank_size = cart.bank_size()
+		for bank in range(0, cart.bank_count()):
+			code = disasm.code_map[bank * bank_size:(bank + 1) * bank_size]
+			self.assertGreater(len(code) - code.count(0), bank_size // 8)
+
+	def test_hirom_labels(self):
+		cart = self.cartridge(0x40000, 'hirom')
+		disasm = Disassembler(cart, Namespace(hex=None, nolabel=None))
+		disasm.run()
+
+		# Long jumps into mirrored banks get bank alias labels. The lower
+		# halves of banks 00-3F and 80-BF are not rom.
+		expected = [(0xC00000, 'LC00000'), (0x400000, 'L400000'), (0x808000, 'L808000'), (0x800000, '$800000'), (0x000000, '$000000')]
+		for address, label in expected:
+			cart.data[0x30000:0x30004] = bytearray([0x22, address & 0xFF, (address >> 8) & 0xFF, address >> 16])
+			disasm.pos = 0x30000
+			self.assertEqual('\tjsl %s.l' % label, disasm.jmp_abs_long('jsl').text())
+		self.assertEqual(set([0xC00000, 0x400000]), disasm.code_label_bank_aliases[0])
+		self.assertEqual(set([0x800000]), disasm.code_label_bank_aliases[0x8000])
+		self.assertEqual([0, 0x8000, -1, -1], cart.indexes([0xC00000, 0x808000, 0x800000, 0x007FFF]))
+
+if __name__ == '__main__':
+    unittest.main()
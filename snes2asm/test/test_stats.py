@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+import json
+import tracemalloc
+from argparse import Namespace
+from snes2asm.cartridge import Cartridge
+from snes2asm.disassembler import Disassembler
+from snes2asm.decoder import Headers
+from snes2asm.stats import Stats
+
+class StatsTest(unittest.TestCase):
+
+	def test_phase(self):
+		stats = Stats()
+		with stats.phase('outer'):
+			with stats.phase('inner'):
+				stats.count('values', 2)
+			stats.count('values')
+		stats.set('size', 10)
+
+		self.assertEqual(['outer', 'inner'], [entry['name'] for entry in stats.phases])
+		self.assertEqual([0, 1], [entry['depth'] for entry in stats.phases])
+		self.assertGreaterEqual(stats.phases[0]['wall'], stats.phases[1]['wall'])
+		self.assertEqual({'values': 3, 'size': 10}, stats.counters)
+
+		# Phases are closed when an error is raised
+		try:
+			with stats.phase('error'):
+				raise ValueError()
+		except ValueError:
+			pass
+		self.assertIn('wall', stats.phases[-1])
+		self.assertEqual(0, stats.depth)
+
+		report = json.loads(stats.json())
+		self.assertEqual(3, len(report['phases']))
+		self.assertEqual(3, report['counters']['values'])
+
+		table = stats.table().splitlines()
+		self.assertTrue(table[2].startswith('  inner'))
+		self.assertIn('size', table[-2])
+
+	def test_memory(self):
+		stats = Stats(memory=True)
+		with stats.phase('outer'):
+			with stats.phase('small'):
+				data = bytearray(1 << 16)
+			del data
+			with stats.phase('large'):
+				data = bytearray(1 << 22)
+			del data
+
+		# Each phase reports its own peak and encloses the peaks of its children
+		outer, small, large = [entry['peak_memory'] for entry in stats.phases]
+		self.assertGreaterEqual(large, 1 << 22)
+		self.assertLess(small, 1 << 22)
+		self.assertGreaterEqual(outer, large)
+
+		# Tracing stops with the outermost phase
+		self.assertFalse(tracemalloc.is_tracing())
+		tracemalloc.start()
+		try:
+			with stats.phase('traced'):
+				pass
+			self.assertTrue(tracemalloc.is_tracing())
+		finally:
+			tracemalloc.stop()
+
+		# Memory is only traced when asked for
+		stats = Stats()
+		with stats.phase('untraced'):
+			pass
+		self.assertNotIn('peak_memory', stats.phases[0])
+		self.assertTrue(stats.table().splitlines()[1].endswith(' -'))
+
+	def test_disassembler(self):
+		cart = Cartridge()
+		cart.open(os.path.join(os.path.dirname(__file__), 'classickong.smc'))
+		disasm = Disassembler(cart, Namespace(hex=None, nolabel=None))
+		disasm.add_decoder(Headers(cart.header, cart.header+80))
+		disasm.run()
+		disasm.count_stats()
+
+		names = [entry['name'] for entry in disasm.stats.phases]
+		for name in ['decoders', 'decoder Headers', 'trace', 'decode banks', 'bank 0']:
+			self.assertIn(name, names)
+
+		counters = disasm.stats.counters
+		self.assertGreater(counters['instructions'], 0)
+		self.assertEqual(cart.size(), counters['code bytes'] + counters['data bytes'])
+		self.assertEqual(len(disasm.code_labels), counters['code labels'])
+
+if __name__ == '__main__':
+    unittest.main()